@@ -0,0 +1,234 @@
+"""A local fake of the Evergreen API serving synthetic data for benchmarks."""
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List
+
+from aiohttp import web
+
+
+@dataclass
+class FakeServerConfig:
+    """
+    Configuration of the fake server.
+
+    latency: Seconds to wait before responding to each request.
+    page_size: Number of items in each page of a paginated endpoint.
+    n_pages: Number of pages each paginated endpoint returns.
+    padding: Number of extra bytes of text added to each item, to vary payload size.
+    log_lines: Number of lines in each log.
+    """
+
+    latency: float = 0.0
+    page_size: int = 100
+    n_pages: int = 20
+    padding: int = 0
+    log_lines: int = 100_000
+
+    @property
+    def n_items(self) -> int:
+        """Get the number of items returned by each paginated endpoint."""
+        return self.page_size * self.n_pages
+
+
+def make_task(index: int, padding: int = 0) -> Dict[str, Any]:
+    """
+    Create the JSON of a synthetic task.
+
+    :param index: Index of the task, used to make its fields unique.
+    :param padding: Number of extra bytes of text to add to the task.
+    :return: JSON of the task.
+    """
+    return {
+        "task_id": f"mongodb_mongo_master_linux_task_{index}",
+        "activated": True,
+        "activated_by": "mci",
+        "artifacts": [],
+        "build_id": f"build_{index // 100}",
+        "build_variant": f"variant_{index % 20}",
+        "create_time": "2020-09-01T12:00:00.000Z",
+        "depends_on": [],
+        "dispatch_time": "2020-09-01T12:01:00.000Z",
+        "display_name": f"task_{index % 50}",
+        "display_only": False,
+        "distro_id": "ubuntu1804-large",
+        "est_wait_to_start_ms": 0,
+        "estimated_cost": 0.0,
+        "execution": 0,
+        "execution_tasks": None,
+        "expected_duration_ms": 600_000,
+        "finish_time": "2020-09-01T12:11:00.000Z",
+        "generate_task": False,
+        "generated_by": "",
+        "host_id": f"host_{index % 200}",
+        "ingest_time": "2020-09-01T12:00:00.000Z",
+        "logs": {
+            "all_log": f"https://evergreen.example.com/task_log_raw/{index}/0?type=ALL",
+            "task_log": f"https://evergreen.example.com/task_log_raw/{index}/0?type=T",
+            "agent_log": f"https://evergreen.example.com/task_log_raw/{index}/0?type=E",
+            "system_log": f"https://evergreen.example.com/task_log_raw/{index}/0?type=S",
+        },
+        "mainline": True,
+        "order": 20_000 + index,
+        "project_id": "mongodb-mongo-master",
+        "priority": 0,
+        "restarts": 0,
+        "revision": f"{index:040x}",
+        "scheduled_time": "2020-09-01T12:00:30.000Z",
+        "start_time": "2020-09-01T12:01:00.000Z",
+        "status": "failed" if index % 10 == 0 else "success",
+        "status_details": {
+            "status": "failed" if index % 10 == 0 else "success",
+            "type": "test",
+            "desc": "x" * padding,
+            "timed_out": False,
+        },
+        "task_group": None,
+        "task_group_max_hosts": None,
+        "time_taken_ms": 600_000,
+        "version_id": f"version_{index // 1000}",
+    }
+
+
+def make_version(index: int, padding: int = 0) -> Dict[str, Any]:
+    """
+    Create the JSON of a synthetic version.
+
+    :param index: Index of the version, used to make its fields unique.
+    :param padding: Number of extra bytes of text to add to the version.
+    :return: JSON of the version.
+    """
+    return {
+        "version_id": f"mongodb_mongo_master_{index:040x}",
+        "create_time": "2020-09-01T12:00:00.000Z",
+        "start_time": "2020-09-01T12:01:00.000Z",
+        "finish_time": "2020-09-01T14:00:00.000Z",
+        "revision": f"{index:040x}",
+        "order": 50_000 - index,
+        "project": "mongodb-mongo-master",
+        "author": "Some Developer",
+        "author_email": "developer@example.com",
+        "message": "SERVER-12345 Make a change" + "x" * padding,
+        "status": "success",
+        "repo": "mongo",
+        "branch": "master",
+        "errors": [],
+        "requester": "gitter_request",
+        "build_variants_status": [
+            {"build_variant": f"variant_{i}", "build_id": f"build_{index}_{i}"} for i in range(20)
+        ],
+    }
+
+
+def make_test_stats(index: int, padding: int = 0) -> Dict[str, Any]:
+    """
+    Create the JSON of a synthetic test stats object.
+
+    :param index: Index of the stats, used to make its fields unique.
+    :param padding: Number of extra bytes of text to add to the stats.
+    :return: JSON of the stats.
+    """
+    return {
+        "test_file": f"jstests/core/test_{index % 5000}.js" + "x" * padding,
+        "task_name": f"task_{index % 50}",
+        "variant": f"variant_{index % 20}",
+        "distro": "ubuntu1804-large",
+        "date": f"2020-09-{index % 28 + 1:02d}",
+        "num_pass": 100 + index % 7,
+        "num_fail": index % 3,
+        "avg_duration_pass": 1.5 + index % 11,
+    }
+
+
+def make_log(n_lines: int) -> bytes:
+    """
+    Create a synthetic log.
+
+    :param n_lines: Number of lines in the log.
+    :return: Contents of the log.
+    """
+    return b"".join(
+        b"[2020/09/01 12:00:%02d.000] [js_test:test_%d] line %d of the log\n" % (i % 60, i % 97, i)
+        for i in range(n_lines)
+    )
+
+
+def _paginated(
+    config: FakeServerConfig, make_item: Callable[[int, int], Dict[str, Any]]
+) -> Callable[[web.Request], Any]:
+    """
+    Create a handler for a paginated endpoint.
+
+    Pages are encoded once when the handler is created, so the server adds as little time
+    as possible to each request.
+
+    :param config: Server configuration.
+    :param make_item: Function to create an item from its index and padding.
+    :return: Request handler.
+    """
+    pages: List[bytes] = [
+        json.dumps(
+            [
+                make_item(page * config.page_size + i, config.padding)
+                for i in range(config.page_size)
+            ]
+        ).encode()
+        for page in range(config.n_pages)
+    ]
+
+    async def handler(request: web.Request) -> web.Response:
+        page = int(request.query.get("page", "0"))
+        if config.latency:
+            await asyncio.sleep(config.latency)
+        headers = {}
+        if page + 1 < len(pages):
+            next_url = request.url.with_query({**request.query, "page": str(page + 1)})
+            headers["Link"] = f'<{next_url}>; rel="next"'
+        body = pages[page] if page < len(pages) else b"[]"
+        return web.Response(body=body, headers=headers, content_type="application/json")
+
+    return handler
+
+
+def create_app(config: FakeServerConfig) -> web.Application:
+    """
+    Create the fake server application.
+
+    :param config: Server configuration.
+    :return: Application serving paginated tasks, versions and test stats, and logs.
+    """
+    log = make_log(config.log_lines)
+
+    async def log_handler(request: web.Request) -> web.Response:
+        if config.latency:
+            await asyncio.sleep(config.latency)
+        return web.Response(body=log, content_type="text/plain")
+
+    app = web.Application()
+    app.router.add_get("/rest/v2/builds/{build_id}/tasks", _paginated(config, make_task))
+    app.router.add_get("/rest/v2/projects/{project_id}/versions", _paginated(config, make_version))
+    app.router.add_get(
+        "/rest/v2/projects/{project_id}/test_stats", _paginated(config, make_test_stats)
+    )
+    app.router.add_get("/logs/{name}", log_handler)
+    return app
+
+
+@asynccontextmanager
+async def running_server(config: FakeServerConfig) -> AsyncIterator[str]:
+    """
+    Run the fake server on a free local port.
+
+    :param config: Server configuration.
+    :return: Base URL of the running server.
+    """
+    runner = web.AppRunner(create_app(config), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        await runner.cleanup()
@@ -0,0 +1,115 @@
+"""Measurements taken by benchmarks."""
+import resource
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Sequence
+
+from aiohttp import TraceConfig, TraceRequestEndParams, TraceRequestStartParams
+
+
+def percentile(values: Sequence[float], pct: float) -> Optional[float]:
+    """
+    Get a percentile of some values, using linear interpolation.
+
+    :param values: Values to get the percentile of.
+    :param pct: Percentile to get, between 0 and 100.
+    :return: The percentile, None if there are no values.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def peak_rss_mb() -> float:
+    """Get the peak resident set size of this process in megabytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class RequestTimer:
+    """Record how long each HTTP request takes, from sending it to receiving its headers."""
+
+    def __init__(self) -> None:
+        """Initialize the timer with no recorded requests."""
+        self.latencies_ms: List[float] = []
+        self.trace_config = TraceConfig()
+        self.trace_config.on_request_start.append(self._on_request_start)
+        self.trace_config.on_request_end.append(self._on_request_end)
+
+    async def _on_request_start(
+        self, session: Any, context: SimpleNamespace, params: TraceRequestStartParams
+    ) -> None:
+        """Record the start of a request."""
+        context.start = time.perf_counter()
+
+    async def _on_request_end(
+        self, session: Any, context: SimpleNamespace, params: TraceRequestEndParams
+    ) -> None:
+        """Record the end of a request."""
+        self.latencies_ms.append((time.perf_counter() - context.start) * 1000)
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    Result of running a benchmark.
+
+    name: Name of the benchmark.
+    n_items: Number of items processed.
+    seconds: Wall clock time taken.
+    items_per_sec: Number of items processed per second.
+    p50_ms: Median latency of a request or operation in milliseconds.
+    p99_ms: 99th percentile latency of a request or operation in milliseconds.
+    peak_rss_mb: Peak resident set size of the benchmark process in megabytes.
+    extra: Additional measurements specific to the benchmark.
+    """
+
+    name: str
+    n_items: int
+    seconds: float
+    items_per_sec: float
+    p50_ms: Optional[float]
+    p99_ms: Optional[float]
+    peak_rss_mb: float
+    extra: Dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def create(
+        cls,
+        name: str,
+        n_items: int,
+        seconds: float,
+        latencies_ms: Sequence[float],
+        extra: Optional[Dict[str, float]] = None,
+    ) -> "BenchmarkResult":
+        """
+        Summarize the measurements of a benchmark.
+
+        :param name: Name of the benchmark.
+        :param n_items: Number of items processed.
+        :param seconds: Wall clock time taken.
+        :param latencies_ms: Latency of each request or operation in milliseconds.
+        :param extra: Additional measurements specific to the benchmark.
+        :return: Result of the benchmark.
+        """
+        return cls(
+            name=name,
+            n_items=n_items,
+            seconds=seconds,
+            items_per_sec=n_items / seconds if seconds > 0 else 0.0,
+            p50_ms=percentile(latencies_ms, 50),
+            p99_ms=percentile(latencies_ms, 99),
+            peak_rss_mb=peak_rss_mb(),
+            extra=extra or {},
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the result to a JSON serializable dictionary."""
+        return asdict(self)
@@ -0,0 +1,148 @@
+"""
+Run benchmarks against a local fake Evergreen server and compare results across commits.
+
+Each benchmark runs in its own process, so peak memory use is measured per benchmark.
+Results are written to a JSON file named after the current commit.
+
+    python -m benchmarks.run
+    python -m benchmarks.run --only tasks parse_task --latency 0.005
+    python -m benchmarks.run --compare results/abc1234.json results/def5678.json
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.fake_server import FakeServerConfig
+
+DEFAULT_OUTPUT_DIR = Path(__file__).parent / "results"
+COMPARED_METRICS = ("items_per_sec", "p50_ms", "p99_ms", "peak_rss_mb")
+
+
+def current_commit() -> str:
+    """Get the short hash of the checked out commit, marked if there are local changes."""
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+        dirty = subprocess.call(["git", "diff", "--quiet", "HEAD"], stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+
+def run_single(name: str, config: FakeServerConfig) -> Dict[str, Any]:
+    """
+    Run one benchmark in this process.
+
+    :param name: Name of the benchmark.
+    :param config: Configuration of the fake server.
+    :return: Result of the benchmark.
+    """
+    from benchmarks.suite import BENCHMARKS
+
+    return asyncio.run(BENCHMARKS[name](config)).to_dict()
+
+
+def run_isolated(name: str, config: FakeServerConfig) -> Dict[str, Any]:
+    """
+    Run one benchmark in a new process.
+
+    :param name: Name of the benchmark.
+    :param config: Configuration of the fake server.
+    :return: Result of the benchmark.
+    """
+    output = subprocess.check_output(
+        [sys.executable, "-m", "benchmarks.run", "--single", name, "--config"]
+        + [json.dumps(asdict(config))],
+        text=True,
+    )
+    return json.loads(output)
+
+
+def compare(base_path: Path, head_path: Path) -> None:
+    """
+    Print the change in each metric between two result files.
+
+    :param base_path: Results to compare against.
+    :param head_path: Results to compare.
+    """
+    base = json.loads(base_path.read_text())
+    head = json.loads(head_path.read_text())
+    print(
+        f"{'benchmark':<24} {'metric':<14} {base['commit']:>14} {head['commit']:>14} {'change':>8}"
+    )
+    for name, head_result in head["results"].items():
+        base_result = base["results"].get(name)
+        if base_result is None:
+            continue
+        for metric in COMPARED_METRICS:
+            before, after = base_result.get(metric), head_result.get(metric)
+            if before is None or after is None:
+                continue
+            change = f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+            print(f"{name:<24} {metric:<14} {before:>14.2f} {after:>14.2f} {change:>8}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Run the benchmarks.
+
+    :param argv: Command line arguments, defaults to sys.argv.
+    """
+    from benchmarks.suite import BENCHMARKS
+
+    defaults = FakeServerConfig()
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="Benchmarks to run.")
+    parser.add_argument("--latency", type=float, default=defaults.latency)
+    parser.add_argument("--page-size", type=int, default=defaults.page_size)
+    parser.add_argument("--n-pages", type=int, default=defaults.n_pages)
+    parser.add_argument("--padding", type=int, default=defaults.padding)
+    parser.add_argument("--log-lines", type=int, default=defaults.log_lines)
+    parser.add_argument("--output-dir", type=Path, default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--label", help="Name of the results file, defaults to the commit.")
+    parser.add_argument("--compare", nargs=2, type=Path, metavar=("BASE", "HEAD"))
+    parser.add_argument("--single", help=argparse.SUPPRESS)
+    parser.add_argument("--config", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    if args.single:
+        print(json.dumps(run_single(args.single, FakeServerConfig(**json.loads(args.config)))))
+        return
+
+    config = FakeServerConfig(
+        latency=args.latency,
+        page_size=args.page_size,
+        n_pages=args.n_pages,
+        padding=args.padding,
+        log_lines=args.log_lines,
+    )
+    commit = current_commit()
+    results = {}
+    for name in args.only or sorted(BENCHMARKS):
+        result = run_isolated(name, config)
+        results[name] = result
+        print(
+            f"{name:<24} {result['items_per_sec']:>12.0f} items/s"
+            f"  p50 {result['p50_ms'] or 0:>8.3f}ms  p99 {result['p99_ms'] or 0:>8.3f}ms"
+            f"  rss {result['peak_rss_mb']:>7.1f}MB"
+        )
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = args.output_dir / f"{args.label or commit}.json"
+    output_path.write_text(
+        json.dumps({"commit": commit, "config": asdict(config), "results": results}, indent=2)
+    )
+    print(f"Results written to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""The benchmarks that can be run."""
+import time
+from datetime import datetime
+from typing import (
+    Any,
+    AsyncIterable,
+    Awaitable,
+    Callable,
+    Coroutine,
+    Dict,
+    List,
+    Optional,
+    Type,
+)
+
+from aiohttp import ClientSession
+from pydantic import BaseModel
+
+from benchmarks.fake_server import (
+    FakeServerConfig,
+    make_task,
+    make_test_stats,
+    make_version,
+    running_server,
+)
+from benchmarks.measure import BenchmarkResult, RequestTimer
+from evg.api import AioEvergreenApi
+from evg.api_requests import StatsSpecification
+from evg.models.evg_stats import EvgTestStats
+from evg.models.evg_task import EvgTask
+from evg.models.evg_version import EvgVersion
+from evg.models.parsing import ModelParser
+from evg.parse_pool import ParsePool
+
+Benchmark = Callable[[FakeServerConfig], Coroutine[Any, Any, BenchmarkResult]]
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+N_PARSE_ITEMS = 5000
+
+
+def benchmark(name: str) -> Callable[[Benchmark], Benchmark]:
+    """
+    Register a benchmark.
+
+    :param name: Name to register the benchmark under.
+    :return: Decorator registering the benchmark.
+    """
+
+    def register(fn: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = fn
+        return fn
+
+    return register
+
+
+async def _time_iteration(
+    name: str,
+    config: FakeServerConfig,
+    iterate: Callable[[AioEvergreenApi, str], Awaitable[AsyncIterable[Any]]],
+    validate_models: bool = True,
+    parse_pool: Optional[ParsePool] = None,
+) -> BenchmarkResult:
+    """
+    Time iterating over the results of a request to the fake server.
+
+    :param name: Name of the benchmark.
+    :param config: Configuration of the fake server.
+    :param iterate: Function to start the request, given an API client and the server URL.
+    :param validate_models: Whether the API client should validate models.
+    :param parse_pool: Worker processes for the API client to build models in.
+    :return: Result of the benchmark.
+    """
+    timer = RequestTimer()
+    async with running_server(config) as base_url:
+        async with ClientSession(trace_configs=[timer.trace_config]) as session:
+            api = AioEvergreenApi(
+                session, base_url, validate_models=validate_models, parse_pool=parse_pool
+            )
+            n_items = 0
+            n_bytes = 0
+            start = time.perf_counter()
+            async for item in await iterate(api, base_url):
+                n_items += 1
+                if isinstance(item, (bytes, str)):
+                    n_bytes += len(item)
+            seconds = time.perf_counter() - start
+    extra = {"n_requests": float(len(timer.latencies_ms))}
+    if n_bytes:
+        extra["mb_per_sec"] = n_bytes / seconds / (1024 * 1024)
+    return BenchmarkResult.create(name, n_items, seconds, timer.latencies_ms, extra)
+
+
+@benchmark("tasks")
+async def iterate_tasks(config: FakeServerConfig) -> BenchmarkResult:
+    """Iterate over validated task models."""
+    return await _time_iteration(
+        "tasks", config, lambda api, _: api.tasks_by_build("build"), validate_models=True
+    )
+
+
+@benchmark("tasks_unvalidated")
+async def iterate_tasks_unvalidated(config: FakeServerConfig) -> BenchmarkResult:
+    """Iterate over task models built without validation."""
+    return await _time_iteration(
+        "tasks_unvalidated",
+        config,
+        lambda api, _: api.tasks_by_build("build"),
+        validate_models=False,
+    )
+
+
+@benchmark("tasks_parse_pool")
+async def iterate_tasks_parse_pool(config: FakeServerConfig) -> BenchmarkResult:
+    """Iterate over validated task models built in worker processes."""
+    with ParsePool(min_offload_bytes=0) as parse_pool:
+        return await _time_iteration(
+            "tasks_parse_pool",
+            config,
+            lambda api, _: api.tasks_by_build("build"),
+            parse_pool=parse_pool,
+        )
+
+
+@benchmark("versions")
+async def iterate_versions(config: FakeServerConfig) -> BenchmarkResult:
+    """Iterate over validated version models."""
+    return await _time_iteration(
+        "versions", config, lambda api, _: api.versions_by_project("mongodb-mongo-master")
+    )
+
+
+@benchmark("test_stats")
+async def iterate_test_stats(config: FakeServerConfig) -> BenchmarkResult:
+    """Iterate over validated test stats models."""
+    spec = StatsSpecification(
+        project_id="mongodb-mongo-master",
+        after_date=datetime(2020, 9, 1),
+        before_date=datetime(2020, 9, 28),
+    )
+    return await _time_iteration("test_stats", config, lambda api, _: api.test_stats(spec))
+
+
+@benchmark("raw_tasks")
+async def iterate_raw_tasks(config: FakeServerConfig) -> BenchmarkResult:
+    """Iterate over decoded task JSON without building models."""
+    return await _time_iteration(
+        "raw_tasks", config, lambda api, _: api.raw_iterator("builds/build/tasks")
+    )
+
+
+async def _stream_log_lines(api: AioEvergreenApi, base_url: str) -> AsyncIterable[str]:
+    """Stream the lines of a log from the fake server."""
+    return api.stream_log(f"{base_url}/logs/task")
+
+
+async def _stream_log_chunks(api: AioEvergreenApi, base_url: str) -> AsyncIterable[bytes]:
+    """Stream the raw chunks of a log from the fake server."""
+    return api.stream_log_chunks(f"{base_url}/logs/task")
+
+
+@benchmark("stream_log")
+async def stream_log(config: FakeServerConfig) -> BenchmarkResult:
+    """Stream a log line by line."""
+    return await _time_iteration("stream_log", config, _stream_log_lines)
+
+
+@benchmark("stream_log_chunks")
+async def stream_log_chunks(config: FakeServerConfig) -> BenchmarkResult:
+    """Stream a log in raw chunks."""
+    return await _time_iteration("stream_log_chunks", config, _stream_log_chunks)
+
+
+def _time_parsing(
+    name: str, model: Type[BaseModel], items: List[Dict[str, Any]], validate: bool
+) -> BenchmarkResult:
+    """
+    Time building models from decoded JSON.
+
+    :param name: Name of the benchmark.
+    :param model: Type of model to build.
+    :param items: Decoded JSON of each model.
+    :param validate: Whether to validate the models.
+    :return: Result of the benchmark, with the latency of building each model.
+    """
+    parser = ModelParser(model, validate)
+    latencies_ms = []
+    start = time.perf_counter()
+    for item in items:
+        item_start = time.perf_counter()
+        parser(item)
+        latencies_ms.append((time.perf_counter() - item_start) * 1000)
+    seconds = time.perf_counter() - start
+    return BenchmarkResult.create(
+        name, len(items), seconds, latencies_ms, {"us_per_model": seconds / len(items) * 1e6}
+    )
+
+
+@benchmark("parse_task")
+async def parse_task(config: FakeServerConfig) -> BenchmarkResult:
+    """Build validated task models."""
+    items = [make_task(i, config.padding) for i in range(N_PARSE_ITEMS)]
+    return _time_parsing("parse_task", EvgTask, items, True)
+
+
+@benchmark("parse_task_unvalidated")
+async def parse_task_unvalidated(config: FakeServerConfig) -> BenchmarkResult:
+    """Build task models without validation."""
+    items = [make_task(i, config.padding) for i in range(N_PARSE_ITEMS)]
+    return _time_parsing("parse_task_unvalidated", EvgTask, items, False)
+
+
+@benchmark("parse_version")
+async def parse_version(config: FakeServerConfig) -> BenchmarkResult:
+    """Build validated version models."""
+    items = [make_version(i, config.padding) for i in range(N_PARSE_ITEMS)]
+    return _time_parsing("parse_version", EvgVersion, items, True)
+
+
+@benchmark("parse_test_stats")
+async def parse_test_stats(config: FakeServerConfig) -> BenchmarkResult:
+    """Build validated test stats models."""
+    items = [make_test_stats(i, config.padding) for i in range(N_PARSE_ITEMS)]
+    return _time_parsing("parse_test_stats", EvgTestStats, items, True)
@@ -1 +1,21 @@
-from evg.api_factory import EvgApiFactory
+"""Async Evergreen API client."""
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from evg.api_factory import EvgApiFactory
+
+__all__ = ["EvgApiFactory"]
+
+
+def __getattr__(name: str) -> Any:
+    """
+    Import the API factory when it is first used, so submodules can be imported cheaply.
+
+    :param name: Name of the attribute being accessed.
+    :return: Value of the attribute.
+    """
+    if name == "EvgApiFactory":
+        from evg.api_factory import EvgApiFactory
+
+        return EvgApiFactory
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,31 +1,109 @@
 """Async version of the evergreen API."""
 import asyncio
-from typing import Any, AsyncIterable, Callable, Dict, List, NamedTuple, Optional, TypeVar
+import time
+from pathlib import Path
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 
-from aiohttp import ClientResponse, ClientSession
+from aiohttp import ClientError, ClientResponse, ClientResponseError, ClientSession
 
 from evg.api_requests import StatsSpecification
+from evg.concurrency import BulkResult, bulk_fetch, iterate_async, merge_iterables
+from evg.instrumentation import ApiHooks, endpoint_name, timed_parser
+from evg.json_decoder import JsonDecoder, get_default_json_decoder, is_empty_json_list
+from evg.log_download import DEFAULT_MAX_ATTEMPTS, DownloadResult, download_to_file
+from evg.loop_monitor import is_monitoring, record_work
+from evg.memory_cache import TaskCache
+from evg.models.evg_build import EvgBuild
 from evg.models.evg_manifest import EvgManifest
 from evg.models.evg_patch import EvgPatch
 from evg.models.evg_project import EvgProject
 from evg.models.evg_stats import EvgTaskStats, EvgTestStats
 from evg.models.evg_task import EvgTask
 from evg.models.evg_version import EvgVersion, Requester
+from evg.models.parsing import M, ModelParser
+from evg.pagination import (
+    CooperativeConfig,
+    PageBuffer,
+    PageFetcher,
+    PaginatedIterator,
+    PrefetchConfig,
+)
+from evg.parse_pool import ParsePool
+from evg.response_cache import ResponseCache
+from evg.retry import RetryPolicy
+from evg.throttle import THROTTLED_STATUSES, RequestThrottle
 from evg.url_creator import UrlCreator
 
 T = TypeVar("T")
 
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_LOG_CHUNK_SIZE = 256 * 1024
+
 
 class _ResponseData(NamedTuple):
     """
     Response from a paginated HTTP call.
 
-    json_data: List of returned data.
+    json_data: List of returned data, None if the body was not decoded.
     next_link: Link to next batch of data.
+    body: Undecoded response body.
     """
 
-    json_data: List[Dict[str, Any]]
+    json_data: Any
     next_link: Optional[str]
+    body: bytes = b""
+
+    @property
+    def size(self) -> int:
+        """Get the size of the response body in bytes."""
+        return len(self.body)
+
+    def is_empty(self) -> bool:
+        """Determine if the response contains no data."""
+        if self.json_data is not None:
+            return not self.json_data
+        return is_empty_json_list(self.body)
+
+
+def _identity(item: T) -> T:
+    """
+    Return the given item unchanged.
+
+    :param item: Item to return.
+    :return: The given item.
+    """
+    return item
+
+
+async def _filter_by_status(
+    tasks: AsyncIterable[EvgTask], statuses: FrozenSet[str]
+) -> AsyncIterable[EvgTask]:
+    """
+    Filter tasks by status.
+
+    :param tasks: Tasks to filter.
+    :param statuses: Statuses of tasks to keep.
+    :return: Iterable over the tasks with one of the given statuses.
+    """
+    async for task in tasks:
+        if task.status in statuses:
+            yield task
 
 
 def _get_next_url(response: ClientResponse) -> Optional[str]:
@@ -44,103 +122,523 @@ def _get_next_url(response: ClientResponse) -> Optional[str]:
 class AioEvergreenApi:
     """Async evergreen API object."""
 
-    def __init__(self, session: ClientSession, api_server: str) -> None:
+    def __init__(
+        self,
+        session: ClientSession,
+        api_server: str,
+        prefetch: Optional[PrefetchConfig] = None,
+        response_cache: Optional[ResponseCache] = None,
+        task_cache: Optional[TaskCache] = None,
+        throttle: Optional[RequestThrottle] = None,
+        validate_models: bool = True,
+        json_decoder: Optional[JsonDecoder] = None,
+        hooks: Optional[ApiHooks] = None,
+        retry: Optional[RetryPolicy] = None,
+        parse_pool: Optional[ParsePool] = None,
+        cooperative: Optional[CooperativeConfig] = None,
+        on_close: Optional[Callable[[], Any]] = None,
+    ) -> None:
         """
         Initialize the Evergreen API Client.
 
         :param session: HTTP session to use.
         :param api_server: API server to make queries to.
+        :param prefetch: How far to read ahead when iterating over paginated responses.
+        :param response_cache: Persistent cache to serve responses from.
+        :param task_cache: In-memory cache to serve `task_by_id` from.
+        :param throttle: Client side rate and concurrency limits to apply to requests.
+        :param validate_models: Validate responses when building models. Skipping validation
+            is much faster, but leaves values as they were decoded from JSON (dates as strings
+            and nested models as dictionaries).
+        :param json_decoder: Function to decode JSON response bodies, defaults to orjson if it
+            is installed and the standard library otherwise. It is also used by the parse
+            pool's workers, so it must be picklable if a parse pool is given.
+        :param hooks: Hooks to report requests, retries, cache lookups, pages and model
+            building to.
+        :param retry: How to retry requests failing with a transient error, such as a timeout,
+            a dropped connection or a 5xx response.
+        :param parse_pool: Worker processes to decode pages and build models in when iterating
+            over paginated responses, None to do so on the event loop.
+        :param cooperative: When to yield to the event loop while iterating over paginated
+            responses, so other tasks can run between items of a large page. None to only
+            yield while waiting for a page.
+        :param on_close: Function to call when the client is closed, such as one releasing a
+            shared session.
         """
         self.session: Optional[ClientSession] = session
         self.url_creator = UrlCreator(api_server)
+        self.prefetch = prefetch if prefetch is not None else PrefetchConfig()
+        self.response_cache = response_cache
+        self.task_cache = task_cache
+        self.throttle = throttle
+        self.validate_models = validate_models
+        self.json_decoder = json_decoder if json_decoder is not None else get_default_json_decoder()
+        self.hooks = hooks
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.parse_pool = parse_pool
+        self.cooperative = cooperative
+        self._on_close = on_close
 
     def close(self) -> None:
-        """Close the session this API client was using."""
+        """Stop using the session this API client was using."""
+        if self.session is not None and self._on_close is not None:
+            self._on_close()
         self.session = None
 
-    async def _make_get_request(self, url: str, params: Optional[Dict[str, Any]]) -> _ResponseData:
+    def _parser(
+        self, model: Type[M], fields: Optional[Iterable[str]] = None
+    ) -> Callable[[Dict[str, Any]], M]:
+        """
+        Get a parser to build models from responses.
+
+        :param model: Type of model to build.
+        :param fields: Only build models with these fields, None to include all fields.
+        :return: Parser for the given model, reporting to the hooks if there are any.
+        """
+        parser = ModelParser(model, self.validate_models, fields)
+        if self.hooks is None:
+            return parser
+        return timed_parser(parser, model.__name__, self.hooks)
+
+    def _decode(self, url: str, body: bytes) -> Any:
+        """
+        Decode a JSON response body.
+
+        :param url: URL the body was returned from.
+        :param body: Response body.
+        :return: Decoded body.
+        """
+        if self.hooks is None and not is_monitoring():
+            return self.json_decoder(body)
+        start = time.perf_counter()
+        json_data = self.json_decoder(body)
+        seconds = time.perf_counter() - start
+        if self.hooks is not None:
+            self.hooks.on_decode(endpoint_name(url), seconds)
+        if is_monitoring():
+            record_work(endpoint_name(url), "JSON decoding", seconds)
+        return json_data
+
+    async def _make_get_request(
+        self, url: str, params: Optional[Dict[str, Any]], decode: bool = True
+    ) -> _ResponseData:
         """
         Make a GET request.
 
         :param url: URL to make request to.
         :param params: Params to send to URL.
+        :param decode: Whether to decode the response body.
         :return: Response from GET request.
         """
         if self.session is None:
             return _ResponseData([], None)
 
-        async with self.session.get(url, params=params) as resp:
-            return _ResponseData(await resp.json(), _get_next_url(resp))
+        if self.response_cache is not None:
+            cached = self.response_cache.get(url, params)
+            if self.hooks is not None:
+                self.hooks.on_cache_lookup(endpoint_name(url), cached is not None)
+            if cached is not None:
+                json_data = self._decode(url, cached.body) if decode else None
+                return _ResponseData(json_data, cached.next_link, cached.body)
+
+        body, next_link = await self._fetch(self.session, url, params)
+        json_data = None
+        if decode or self.response_cache is not None:
+            json_data = self._decode(url, body)
+
+        if self.response_cache is not None:
+            self.response_cache.put(url, params, body, next_link, json_data)
+        return _ResponseData(json_data if decode else None, next_link, body)
+
+    async def _fetch(
+        self, session: ClientSession, url: str, params: Optional[Dict[str, Any]]
+    ) -> Tuple[bytes, Optional[str]]:
+        """
+        Fetch the body of a GET request from the server.
+
+        Requests failing with a transient error are retried as allowed by the retry policy.
+        Each page of a paginated request is fetched separately, so a failure part way through
+        retries only the failed page.
+
+        :param session: HTTP session to make the request with.
+        :param url: URL to make request to.
+        :param params: Params to send to URL.
+        :return: Body of the response and link to the next batch of data.
+        """
+        attempt = 0
+        while True:
+            try:
+                return await self._fetch_throttled(session, url, params)
+            except (ClientError, asyncio.TimeoutError) as err:
+                if attempt >= self.retry.max_retries or not self._is_retryable(err):
+                    raise
+                delay = self.retry.backoff(attempt, err)
+                if self.hooks is not None:
+                    status = err.status if isinstance(err, ClientResponseError) else 0
+                    self.hooks.on_retry(endpoint_name(url), status, delay)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def _is_retryable(self, error: BaseException) -> bool:
+        """
+        Determine if a failed request should be retried by the retry policy.
+
+        Throttled responses are left to the throttle if one is configured, since it has
+        already retried them.
+
+        :param error: Error the request failed with.
+        :return: True if the request should be retried.
+        """
+        if (
+            self.throttle is not None
+            and isinstance(error, ClientResponseError)
+            and error.status in THROTTLED_STATUSES
+        ):
+            return False
+        return self.retry.is_transient(error)
+
+    async def _fetch_throttled(
+        self, session: ClientSession, url: str, params: Optional[Dict[str, Any]]
+    ) -> Tuple[bytes, Optional[str]]:
+        """
+        Fetch the body of a GET request, waiting for the throttle if one is configured.
+
+        If a throttle is configured, the request waits for its permission to run and is
+        retried with backoff if the server throttles it.
+
+        :param session: HTTP session to make the request with.
+        :param url: URL to make request to.
+        :param params: Params to send to URL.
+        :return: Body of the response and link to the next batch of data.
+        """
+        if self.throttle is None:
+            return await self._get(session, url, params)
+
+        attempt = 0
+        while True:
+            try:
+                async with self.throttle.slot():
+                    response = await self._get(session, url, params, raise_throttled=True)
+                self.throttle.on_success()
+                return response
+            except ClientResponseError as err:
+                if (
+                    err.status not in THROTTLED_STATUSES
+                    or attempt >= self.throttle.config.max_retries
+                ):
+                    raise
+                delay = self.throttle.on_throttled(attempt, err.headers)
+                if self.hooks is not None:
+                    self.hooks.on_retry(endpoint_name(url), err.status, delay)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _get(
+        self,
+        session: ClientSession,
+        url: str,
+        params: Optional[Dict[str, Any]],
+        raise_throttled: bool = False,
+    ) -> Tuple[bytes, Optional[str]]:
+        """
+        Send a single GET request and read the whole response body.
+
+        :param session: HTTP session to make the request with.
+        :param url: URL to make request to.
+        :param params: Params to send to URL.
+        :param raise_throttled: Raise an error if the server throttled the request.
+        :return: Body of the response and link to the next batch of data.
+        """
+        start = time.perf_counter()
+        status = 0
+        try:
+            async with session.get(url, params=params) as resp:
+                status = resp.status
+                if resp.status in self.retry.retry_statuses or (
+                    raise_throttled and resp.status in THROTTLED_STATUSES
+                ):
+                    resp.raise_for_status()
+                body = await resp.read()
+        except ClientResponseError as err:
+            self._report_request(url, err.status, start, 0)
+            raise
+        except (ClientError, asyncio.TimeoutError):
+            self._report_request(url, status, start, 0)
+            raise
+        self._report_request(url, status, start, len(body))
+        return body, _get_next_url(resp)
+
+    def _report_request(self, url: str, status: int, start: float, n_bytes: int) -> None:
+        """
+        Report a completed or failed request to the hooks.
+
+        :param url: URL requested.
+        :param status: HTTP status of the response, 0 if no response was received.
+        :param start: Time the request was started, from `time.perf_counter`.
+        :param n_bytes: Size of the response body read.
+        """
+        if self.hooks is not None:
+            seconds = time.perf_counter() - start
+            self.hooks.on_request(endpoint_name(url), status, seconds, n_bytes)
 
-    async def _response_iterator(
+    async def _fill_page_buffer(
+        self,
+        buffer: PageBuffer[_ResponseData],
+        url: str,
+        params: Optional[Dict[str, Any]],
+        decode: bool,
+    ) -> None:
+        """
+        Follow the pages of a paginated request, adding each page to the given buffer.
+
+        :param buffer: Buffer to add pages to.
+        :param url: URL of the first page.
+        :param params: Params to send with each page request.
+        :param decode: Whether to decode the response bodies.
+        """
+        next_url: Optional[str] = url
+        try:
+            while next_url:
+                await buffer.wait_for_room()
+                response = await self._make_get_request(next_url, params, decode)
+                if response.is_empty():
+                    break
+                n_items = len(response.json_data) if response.json_data is not None else 0
+                if self.hooks is not None:
+                    self.hooks.on_page(endpoint_name(next_url), n_items)
+                await buffer.put(response, n_items, response.size)
+                next_url = response.next_link
+        except asyncio.CancelledError:
+            raise
+        except Exception as err:
+            await buffer.close(err)
+        else:
+            await buffer.close()
+
+    async def _page_iterator(
+        self, url: str, params: Optional[Dict[str, Any]] = None, decode: bool = True
+    ) -> AsyncIterator[_ResponseData]:
+        """
+        Iterate over the pages of a paginated request.
+
+        Pages are fetched ahead of the consumer as allowed by the prefetch configuration.
+
+        :param url: URL of the first page.
+        :param params: Params to send with each page request.
+        :param decode: Whether to decode the response bodies.
+        :return: Iterator over pages of data.
+        """
+        buffer: PageBuffer[_ResponseData] = PageBuffer(self.prefetch)
+        fetcher = asyncio.create_task(self._fill_page_buffer(buffer, url, params, decode))
+        try:
+            while True:
+                page = await buffer.get()
+                if page is None:
+                    break
+                yield page
+        finally:
+            fetcher.cancel()
+
+    def _response_iterator(
         self,
         url: str,
         transform_fn: Callable[[Dict[str, Any]], T],
         params: Optional[Dict[str, Any]] = None,
-    ) -> AsyncIterable[T]:
-        response = await self._make_get_request(url, params)
-        while True:
-            if not response.json_data:
-                break
+        model: str = "dict",
+    ) -> PaginatedIterator[T]:
+        """
+        Iterate over the items of a paginated request.
+
+        :param url: URL of the first page.
+        :param transform_fn: Function to convert each decoded item.
+        :param params: Params to send with each page request.
+        :param model: What the items are converted to, used to report work to a stall monitor.
+        :return: Resumable iterator over the converted items.
+        """
+
+        async def fetch_pages(start_url: str) -> AsyncIterator[Tuple[Any, Optional[str]]]:
+            async for response in self._page_iterator(start_url, params):
+                yield response.json_data, response.next_link
+
+        return self._paginated(url, fetch_pages, transform_fn, model)
+
+    def _model_iterator(
+        self,
+        url: str,
+        model: Type[M],
+        fields: Optional[Iterable[str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> PaginatedIterator[M]:
+        """
+        Iterate over models built from the items of a paginated request.
+
+        If a parse pool is configured, pages are decoded and models are built in its worker
+        processes. Hooks are not told about models built in worker processes.
 
-            next_response = None
-            if response.next_link:
-                next_response = asyncio.create_task(
-                    self._make_get_request(response.next_link, params)
-                )
+        :param url: URL of the first page.
+        :param model: Type of model to build.
+        :param fields: Only build models with these fields, None to include all fields.
+        :param params: Params to send with each page request.
+        :return: Resumable iterator over the models.
+        """
+        parse_pool = self.parse_pool
+        if parse_pool is None:
+            return self._response_iterator(url, self._parser(model, fields), params, model.__name__)
+        parser = ModelParser(model, self.validate_models, fields)
+
+        async def fetch_pages(start_url: str) -> AsyncIterator[Tuple[Any, Optional[str]]]:
+            bodies = (
+                (response.body, response.next_link)
+                async for response in self._page_iterator(start_url, params, decode=False)
+            )
+            async for models, next_link in parse_pool.parse_pages(
+                bodies, parser, self.json_decoder
+            ):
+                yield models, next_link
+
+        return self._paginated(url, fetch_pages, _identity, model.__name__)
+
+    def _paginated(
+        self,
+        url: str,
+        fetch_pages: PageFetcher,
+        transform_fn: Callable[[Any], T],
+        model: str,
+    ) -> PaginatedIterator[T]:
+        """
+        Create an iterator over the items of a paginated request.
 
-            for item in response.json_data:
-                yield transform_fn(item)
+        :param url: URL of the first page.
+        :param fetch_pages: Function iterating over the items and next link of each page.
+        :param transform_fn: Function to convert each item.
+        :param model: What the items are converted to, used to report work to a stall monitor.
+        :return: Resumable iterator over the converted items.
+        """
+        return PaginatedIterator(
+            url, fetch_pages, transform_fn, self.cooperative, endpoint_name(url), model
+        )
+
+    # Raw data
+
+    async def raw_iterator(
+        self, endpoint: str, params: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterable[Dict[str, Any]]:
+        """
+        Get an iterable over the decoded JSON objects returned by a paginated endpoint.
 
-            if next_response:
-                response = await next_response
-            else:
-                break
+        No models are built, this is useful when the data is going to be serialized again.
+
+        :param endpoint: REST V2 endpoint to query, for example "builds/{build_id}/tasks".
+        :param params: Params to send with the request.
+        :return: Iterable over decoded JSON objects.
+        """
+        url = self.url_creator.rest_v2(endpoint)
+        return self._response_iterator(url, _identity, params)
+
+    async def raw_pages(
+        self, endpoint: str, params: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterable[bytes]:
+        """
+        Get an iterable over the undecoded pages returned by a paginated endpoint.
+
+        Each page is the JSON encoded list of objects exactly as returned by the server.
+
+        :param endpoint: REST V2 endpoint to query, for example "builds/{build_id}/tasks".
+        :param params: Params to send with the request.
+        :return: Iterable over response bodies.
+        """
+        url = self.url_creator.rest_v2(endpoint)
+        return self._raw_page_iterator(url, params)
+
+    def _raw_page_iterator(
+        self, url: str, params: Optional[Dict[str, Any]]
+    ) -> PaginatedIterator[bytes]:
+        """
+        Iterate over the undecoded bodies of a paginated request.
+
+        :param url: URL of the first page.
+        :param params: Params to send with each page request.
+        :return: Resumable iterator over the response bodies.
+        """
+
+        async def fetch_pages(start_url: str) -> AsyncIterator[Tuple[Any, Optional[str]]]:
+            async for response in self._page_iterator(start_url, params, decode=False):
+                yield [response.body], response.next_link
+
+        return self._paginated(url, fetch_pages, _identity, "bytes")
 
     # Projects
 
-    async def all_project(self) -> AsyncIterable[EvgProject]:
-        """Get an iterable over all evergreen projects."""
+    async def all_project(
+        self, fields: Optional[Iterable[str]] = None
+    ) -> AsyncIterable[EvgProject]:
+        """
+        Get an iterable over all evergreen projects.
+
+        :param fields: Only populate these fields of each project, None to populate all fields.
+        :return: Iterable over projects.
+        """
         url = self.url_creator.rest_v2("projects")
-        return self._response_iterator(url, transform_fn=lambda d: EvgProject(**d))
+        return self._model_iterator(url, EvgProject, fields)
 
     # Versions
 
     async def versions_by_project(
-        self, project_id: str, requester: Requester = Requester.GITTER_REQUEST
+        self,
+        project_id: str,
+        requester: Requester = Requester.GITTER_REQUEST,
+        fields: Optional[Iterable[str]] = None,
     ) -> AsyncIterable[EvgVersion]:
         """
         Get an iterable over the versions of a given project.
 
         :param project_id: ID of project to query.
         :param requester: Iterate of version created by this requester type.
+        :param fields: Only populate these fields of each version, None to populate all fields.
         :return: Iterable over versions.
         """
         url = self.url_creator.rest_v2(f"projects/{project_id}/versions")
         params = {"requester": requester.evg_value()}
-        return self._response_iterator(url, lambda v: EvgVersion(**v), params)
+        return self._model_iterator(url, EvgVersion, fields, params)
+
+    async def version_by_id(self, version_id: str) -> EvgVersion:
+        """
+        Get a version by its ID.
+
+        :param version_id: ID of version to query.
+        :return: Data about the version.
+        """
+        url = self.url_creator.rest_v2(f"versions/{version_id}")
+        response = await self._make_get_request(url, None)
+        return self._parser(EvgVersion)(response.json_data)
 
     # Patches
 
-    async def patches_by_project(self, project_id: str) -> AsyncIterable[EvgPatch]:
+    async def patches_by_project(
+        self, project_id: str, fields: Optional[Iterable[str]] = None
+    ) -> AsyncIterable[EvgPatch]:
         """
         Get an iterable over the patches for a given projects.
 
         :param project_id: ID of project to query.
+        :param fields: Only populate these fields of each patch, None to populate all fields.
         :return: Iterable over patches.
         """
         url = self.url_creator.rest_v2(f"projects/{project_id}/patches")
-        return self._response_iterator(url, lambda p: EvgPatch(**p))
+        return self._model_iterator(url, EvgPatch, fields)
 
-    async def patches_by_user(self, user_id: str) -> AsyncIterable[EvgPatch]:
+    async def patches_by_user(
+        self, user_id: str, fields: Optional[Iterable[str]] = None
+    ) -> AsyncIterable[EvgPatch]:
         """
         Get an iterable over the patches submitted by a user.
 
         :param user_id: ID of user to query.
+        :param fields: Only populate these fields of each patch, None to populate all fields.
         :return: Iterable over patches.
         """
         url = self.url_creator.rest_v2(f"users/{user_id}/patches")
-        return self._response_iterator(url, lambda p: EvgPatch(**p))
+        return self._model_iterator(url, EvgPatch, fields)
 
     # Tasks
 
@@ -148,35 +646,164 @@ class AioEvergreenApi:
         """
         Get a task by its ID.
 
+        If a task cache is configured, the task may be served from the cache and concurrent
+        calls for the same task share a single request.
+
+        :param task_id: ID of task to query.
+        :return: Data about the task.
+        """
+        if self.task_cache is not None:
+            return await self.task_cache.get_or_load(task_id, lambda: self._fetch_task(task_id))
+        return await self._fetch_task(task_id)
+
+    async def _fetch_task(self, task_id: str) -> EvgTask:
+        """
+        Get a task by its ID from the server.
+
         :param task_id: ID of task to query.
         :return: Data about the task.
         """
         url = self.url_creator.rest_v2(f"tasks/{task_id}")
-        async with self.session.get(url) as response:
-            return EvgTask(**await response.json())
+        response = await self._make_get_request(url, None)
+        return self._parser(EvgTask)(response.json_data)
+
+    async def tasks_by_ids(
+        self,
+        task_ids: Iterable[str],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        ordered: bool = False,
+    ) -> AsyncIterable[BulkResult]:
+        """
+        Get an iterable over the tasks with the given IDs.
+
+        Each result holds the task ID and either the task or the error raised fetching it.
+
+        :param task_ids: IDs of tasks to query, duplicates are only queried once.
+        :param max_concurrency: Maximum number of tasks to query at once.
+        :param ordered: If True, yield results in the order given, otherwise as they arrive.
+        :return: Iterable over the result of querying each task.
+        """
+        return bulk_fetch(task_ids, self.task_by_id, max_concurrency, ordered)
+
+    async def task_with_executions(self, task_id: str) -> EvgTask:
+        """
+        Get a task by its ID, including all of its previous executions.
+
+        The previous executions are available with `get_execution` and `get_executions`.
+
+        :param task_id: ID of task to query.
+        :return: Data about the task and its previous executions.
+        """
+        url = self.url_creator.rest_v2(f"tasks/{task_id}")
+        response = await self._make_get_request(url, {"fetch_all_executions": "true"})
+        return self._parser(EvgTask)(response.json_data)
+
+    async def tasks_with_executions(
+        self,
+        task_ids: Iterable[str],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        ordered: bool = False,
+    ) -> AsyncIterable[BulkResult]:
+        """
+        Get an iterable over the tasks with the given IDs, including all of their executions.
+
+        Each result holds the task ID and either the task or the error raised fetching it.
 
-    async def tasks_by_build(self, build_id: str) -> AsyncIterable[EvgTask]:
+        :param task_ids: IDs of tasks to query, duplicates are only queried once.
+        :param max_concurrency: Maximum number of tasks to query at once.
+        :param ordered: If True, yield results in the order given, otherwise as they arrive.
+        :return: Iterable over the result of querying each task.
+        """
+        return bulk_fetch(task_ids, self.task_with_executions, max_concurrency, ordered)
+
+    async def tasks_by_build(
+        self, build_id: str, fields: Optional[Iterable[str]] = None
+    ) -> AsyncIterable[EvgTask]:
         """
         Get an iterable over all tasks for the specified build.
 
         :param build_id: ID of build to query.
+        :param fields: Only populate these fields of each task, None to populate all fields.
         :return: Iterable over tasks.
         """
         url = self.url_creator.rest_v2(f"builds/{build_id}/tasks")
-        return self._response_iterator(url, lambda t: EvgTask(**t))
+        return self._model_iterator(url, EvgTask, fields)
+
+    async def tasks_by_version(
+        self,
+        version: EvgVersion,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        ordered: bool = False,
+        build_variants: Optional[Iterable[str]] = None,
+        statuses: Optional[Iterable[str]] = None,
+        fields: Optional[Iterable[str]] = None,
+    ) -> AsyncIterable[EvgTask]:
+        """
+        Get an iterable over the tasks of a version, querying its builds concurrently.
+
+        :param version: Version to get tasks of.
+        :param max_concurrency: Maximum number of builds to query at once.
+        :param ordered: If True, yield tasks build by build, otherwise as they arrive.
+        :param build_variants: Only get tasks of these build variants, None to get all tasks.
+        :param statuses: Only get tasks with these statuses, None to get all tasks.
+        :param fields: Only populate these fields of each task, None to populate all fields.
+        :return: Iterable over tasks.
+        """
+        return await self.tasks_for_versions(
+            [version], max_concurrency, ordered, build_variants, statuses, fields
+        )
+
+    async def tasks_for_versions(
+        self,
+        versions: Union[Iterable[EvgVersion], AsyncIterable[EvgVersion]],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        ordered: bool = False,
+        build_variants: Optional[Iterable[str]] = None,
+        statuses: Optional[Iterable[str]] = None,
+        fields: Optional[Iterable[str]] = None,
+    ) -> AsyncIterable[EvgTask]:
+        """
+        Get an iterable over the tasks of several versions, querying all their builds concurrently.
+
+        Versions can be given as an async iterable, such as the one returned by
+        `versions_by_project`, in which case they are only taken from it as builds are queried.
+
+        :param versions: Versions to get tasks of.
+        :param max_concurrency: Maximum number of builds to query at once.
+        :param ordered: If True, yield tasks build by build in version order, otherwise as they
+            arrive.
+        :param build_variants: Only get tasks of these build variants, None to get all tasks.
+        :param statuses: Only get tasks with these statuses, None to get all tasks.
+        :param fields: Only populate these fields of each task, None to populate all fields.
+        :return: Iterable over tasks.
+        """
+        variants = list(build_variants) if build_variants is not None else None
+        if statuses is not None and fields is not None:
+            fields = set(fields) | {"status"}
+
+        async def builds() -> AsyncIterator[AsyncIterable[EvgTask]]:
+            async for version in iterate_async(versions):
+                for build_id in version.get_build_ids(variants):
+                    yield await self.tasks_by_build(build_id, fields)
+
+        tasks = merge_iterables(builds(), max_concurrency, ordered)
+        if statuses is None:
+            return tasks
+        return _filter_by_status(tasks, frozenset(statuses))
 
     async def tasks_by_project_and_commit(
-        self, project_id: str, revision: str
+        self, project_id: str, revision: str, fields: Optional[Iterable[str]] = None
     ) -> AsyncIterable[EvgTask]:
         """
         Get an iterable over all tasks for git commit and project.
 
         :param project_id: ID of project to query.
         :param revision: Git commit to query.
+        :param fields: Only populate these fields of each task, None to populate all fields.
         :return: Iterable over tasks.
         """
         url = self.url_creator.rest_v2(f"projects/{project_id}/revisions/{revision}/tasks")
-        return self._response_iterator(url, lambda t: EvgTask(**t))
+        return self._model_iterator(url, EvgTask, fields)
 
     async def manifest_for_task(self, task_id: str) -> EvgManifest:
         """
@@ -186,33 +813,154 @@ class AioEvergreenApi:
         :return: Manifest for specified task.
         """
         url = self.url_creator.rest_v2(f"tasks/{task_id}/manifest")
-        with self.session.get(url) as response:
-            response.raise_for_status()
-            return EvgManifest(**await response.json())
+        response = await self._make_get_request(url, None)
+        return self._parser(EvgManifest)(response.json_data)
+
+    async def manifests_for_tasks(
+        self,
+        task_ids: Iterable[str],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        ordered: bool = False,
+    ) -> AsyncIterable[BulkResult]:
+        """
+        Get an iterable over the manifests for the given tasks.
+
+        Each result holds the task ID and either the manifest or the error raised fetching it.
+
+        :param task_ids: IDs of tasks to query, duplicates are only queried once.
+        :param max_concurrency: Maximum number of manifests to query at once.
+        :param ordered: If True, yield results in the order given, otherwise as they arrive.
+        :return: Iterable over the result of querying each manifest.
+        """
+        return bulk_fetch(task_ids, self.manifest_for_task, max_concurrency, ordered)
+
+    # Builds
+
+    async def build_by_id(self, build_id: str) -> EvgBuild:
+        """
+        Get a build by its ID.
+
+        :param build_id: ID of build to query.
+        :return: Data about the build.
+        """
+        url = self.url_creator.rest_v2(f"builds/{build_id}")
+        response = await self._make_get_request(url, None)
+        return self._parser(EvgBuild)(response.json_data)
+
+    async def builds_by_version(
+        self, version_id: str, fields: Optional[Iterable[str]] = None
+    ) -> AsyncIterable[EvgBuild]:
+        """
+        Get an iterable over the builds of a version.
+
+        :param version_id: ID of version to query.
+        :param fields: Only populate these fields of each build, None to populate all fields.
+        :return: Iterable over builds.
+        """
+        url = self.url_creator.rest_v2(f"versions/{version_id}/builds")
+        return self._model_iterator(url, EvgBuild, fields)
+
+    async def builds_by_ids(
+        self,
+        build_ids: Iterable[str],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        ordered: bool = False,
+    ) -> AsyncIterable[BulkResult]:
+        """
+        Get an iterable over the builds with the given IDs.
+
+        Each result holds the build ID and either the build or the error raised fetching it.
+
+        :param build_ids: IDs of builds to query, duplicates are only queried once.
+        :param max_concurrency: Maximum number of builds to query at once.
+        :param ordered: If True, yield results in the order given, otherwise as they arrive.
+        :return: Iterable over the result of querying each build.
+        """
+        return bulk_fetch(build_ids, self.build_by_id, max_concurrency, ordered)
 
     # Stats
 
-    async def test_stats(self, stats_spec: StatsSpecification) -> AsyncIterable[EvgTestStats]:
+    async def test_stats(
+        self, stats_spec: StatsSpecification, fields: Optional[Iterable[str]] = None
+    ) -> AsyncIterable[EvgTestStats]:
         """
         Get an iterable of test stats for the given specification.
 
         :param stats_spec: Specification of which tests to query.
+        :param fields: Only populate these fields of each stat, None to populate all fields.
         :return: Iterable of test stats.
         """
         params = stats_spec.get_params()
         url = self.url_creator.rest_v2(f"projects/{stats_spec.project_id}/test_stats")
-        return self._response_iterator(url, lambda s: EvgTestStats(**s), params=params)
+        return self._model_iterator(url, EvgTestStats, fields, params)
 
-    async def task_stats(self, stats_spec: StatsSpecification) -> AsyncIterable[EvgTaskStats]:
+    async def task_stats(
+        self, stats_spec: StatsSpecification, fields: Optional[Iterable[str]] = None
+    ) -> AsyncIterable[EvgTaskStats]:
         """
         Get an iterable of task stats for the given specification.
 
         :param stats_spec: Specification of which tasks to query.
+        :param fields: Only populate these fields of each stat, None to populate all fields.
         :return: Iterable of tasks stats.
         """
         params = stats_spec.get_params()
         url = self.url_creator.rest_v2(f"projects/{stats_spec.project_id}/task_stats")
-        return self._response_iterator(url, lambda s: EvgTaskStats(**s), params=params)
+        return self._model_iterator(url, EvgTaskStats, fields, params)
+
+    async def test_stats_sharded(
+        self,
+        stats_spec: StatsSpecification,
+        shard_days: int,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        ordered: bool = True,
+        split_variants: bool = False,
+        split_tasks: bool = False,
+        fields: Optional[Iterable[str]] = None,
+    ) -> AsyncIterable[EvgTestStats]:
+        """
+        Get an iterable of test stats, querying sub-ranges of the specification concurrently.
+
+        :param stats_spec: Specification of which tests to query.
+        :param shard_days: Number of days to include in each sub-query.
+        :param max_concurrency: Maximum number of sub-queries to run at once.
+        :param ordered: If True, yield results in shard order, otherwise as they arrive.
+        :param split_variants: Run a separate sub-query for each variant in the specification.
+        :param split_tasks: Run a separate sub-query for each task in the specification.
+        :param fields: Only populate these fields of each stat, None to populate all fields.
+        :return: Iterable of test stats.
+        """
+        shards = stats_spec.shard(shard_days, split_variants, split_tasks)
+        return merge_iterables(
+            [await self.test_stats(shard, fields) for shard in shards], max_concurrency, ordered
+        )
+
+    async def task_stats_sharded(
+        self,
+        stats_spec: StatsSpecification,
+        shard_days: int,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        ordered: bool = True,
+        split_variants: bool = False,
+        split_tasks: bool = False,
+        fields: Optional[Iterable[str]] = None,
+    ) -> AsyncIterable[EvgTaskStats]:
+        """
+        Get an iterable of task stats, querying sub-ranges of the specification concurrently.
+
+        :param stats_spec: Specification of which tasks to query.
+        :param shard_days: Number of days to include in each sub-query.
+        :param max_concurrency: Maximum number of sub-queries to run at once.
+        :param ordered: If True, yield results in shard order, otherwise as they arrive.
+        :param split_variants: Run a separate sub-query for each variant in the specification.
+        :param split_tasks: Run a separate sub-query for each task in the specification.
+        :param fields: Only populate these fields of each stat, None to populate all fields.
+        :return: Iterable of task stats.
+        """
+        shards = stats_spec.shard(shard_days, split_variants, split_tasks)
+        return merge_iterables(
+            [await self.task_stats(shard, fields) for shard in shards], max_concurrency, ordered
+        )
 
     async def stream_log(self, log_url: str) -> AsyncIterable[str]:
         """
@@ -224,3 +972,69 @@ class AioEvergreenApi:
         async with self.session.get(log_url, params={"text": "true"}) as reader:
             async for line in reader.content:
                 yield line.decode("utf-8")
+
+    async def stream_log_chunks(
+        self, log_url: str, chunk_size: int = DEFAULT_LOG_CHUNK_SIZE
+    ) -> AsyncGenerator[bytes, None]:
+        """
+        Stream the raw contents of the given log URL, without splitting or decoding lines.
+
+        :param log_url: URL of log to stream.
+        :param chunk_size: Maximum number of bytes in each chunk.
+        :return: Async Generator over chunks of the log.
+        """
+        if self.session is None:
+            return
+
+        async with self.session.get(log_url, params={"text": "true"}) as reader:
+            reader.raise_for_status()
+            async for chunk in reader.content.iter_chunked(chunk_size):
+                yield chunk
+
+    async def download_log(
+        self,
+        log_url: str,
+        path: Union[str, Path],
+        chunk_size: int = DEFAULT_LOG_CHUNK_SIZE,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    ) -> DownloadResult:
+        """
+        Download the given log URL to a file, without splitting or decoding lines.
+
+        A partial download left by an earlier, interrupted call is resumed with a Range request.
+        The size of the file is checked against the size reported by the server.
+
+        :param log_url: URL of log to download.
+        :param path: Path to write the log to.
+        :param chunk_size: Maximum number of bytes to write at once.
+        :param max_attempts: Maximum number of requests to make if the download is interrupted.
+        :return: Result of the download.
+        """
+        if self.session is None:
+            raise RuntimeError("Can not download logs with a closed client")
+        return await download_to_file(
+            self.session, log_url, path, {"text": "true"}, chunk_size, max_attempts
+        )
+
+    async def download_logs(
+        self,
+        destinations: Mapping[str, Union[str, Path]],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        ordered: bool = False,
+    ) -> AsyncIterable[BulkResult]:
+        """
+        Download several logs to files concurrently.
+
+        Each result holds the log URL and either the download result or the error raised
+        downloading it.
+
+        :param destinations: Path to write each log to, keyed by log URL.
+        :param max_concurrency: Maximum number of logs to download at once.
+        :param ordered: If True, yield results in the order given, otherwise as they finish.
+        :return: Iterable over the result of downloading each log.
+        """
+
+        async def download(log_url: str) -> DownloadResult:
+            return await self.download_log(log_url, destinations[log_url])
+
+        return bulk_fetch(destinations, download, max_concurrency, ordered)
@@ -1,24 +1,107 @@
 """Factory to create API objects."""
+import asyncio
 from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, List, Optional, Set
 
-from aiohttp import ClientSession
+from aiohttp import ClientSession, ClientTimeout, TCPConnector, TraceConfig
 
 from evg.api import AioEvergreenApi
-from evg.evg_config import EvgConfig
+from evg.evg_config import ConnectionPoolConfig, EvgConfig
+from evg.instrumentation import ApiHooks
+from evg.json_decoder import JsonDecoder
+from evg.memory_cache import TaskCache
+from evg.pagination import CooperativeConfig, PrefetchConfig
+from evg.parse_pool import ParsePool
+from evg.response_cache import ResponseCache
+from evg.retry import RetryPolicy
+from evg.throttle import RequestThrottle
+
+
+def _brotli_available() -> bool:
+    """Determine if a brotli decoder is installed for aiohttp to use."""
+    for module in ["brotli", "brotlicffi"]:
+        try:
+            __import__(module)
+            return True
+        except ImportError:
+            pass
+    return False
+
+
+def _accept_encoding(compression: bool) -> str:
+    """
+    Get the content encodings to request responses in.
+
+    :param compression: Whether to request compressed responses.
+    :return: Value for the Accept-Encoding header.
+    """
+    if not compression:
+        return "identity"
+    if _brotli_available():
+        return "gzip, deflate, br"
+    return "gzip, deflate"
 
 
 class EvgApiFactory:
-    """A factory for creating API clients."""
+    """
+    A factory for creating API clients.
+
+    All clients created by a factory share a single HTTP session and its connection pool.
+    """
 
-    def __init__(self, evg_config: EvgConfig) -> None:
+    def __init__(
+        self,
+        evg_config: EvgConfig,
+        prefetch: Optional[PrefetchConfig] = None,
+        response_cache: Optional[ResponseCache] = None,
+        task_cache: Optional[TaskCache] = None,
+        pool_config: Optional[ConnectionPoolConfig] = None,
+        throttle: Optional[RequestThrottle] = None,
+        validate_models: bool = True,
+        json_decoder: Optional[JsonDecoder] = None,
+        hooks: Optional[ApiHooks] = None,
+        trace_configs: Optional[List[TraceConfig]] = None,
+        retry: Optional[RetryPolicy] = None,
+        parse_pool: Optional[ParsePool] = None,
+        cooperative: Optional[CooperativeConfig] = None,
+    ) -> None:
         """
         Initialize evergreen api factory.
 
         :param evg_config: Evergreen API configuration.
+        :param prefetch: How far API clients should read ahead on paginated responses.
+        :param response_cache: Persistent cache for API clients to serve responses from.
+        :param task_cache: In-memory task cache shared by API clients.
+        :param pool_config: Configuration of the shared connection pool.
+        :param throttle: Client side rate and concurrency limits shared by API clients.
+        :param validate_models: Whether API clients should validate responses when building
+            models.
+        :param json_decoder: Function for API clients to decode JSON response bodies with.
+        :param hooks: Hooks for API clients to report requests, pages and model building to.
+        :param trace_configs: aiohttp trace configs to add to the shared HTTP session, such as
+            one from `evg.instrumentation.create_trace_config`.
+        :param retry: How API clients should retry requests failing with a transient error.
+        :param parse_pool: Worker processes for API clients to decode pages and build models in.
+        :param cooperative: When API clients should yield to the event loop while iterating over
+            paginated responses.
         """
         self.evg_config = evg_config
+        self.prefetch = prefetch
+        self.response_cache = response_cache
+        self.task_cache = task_cache
+        self.pool_config = pool_config if pool_config is not None else ConnectionPoolConfig()
+        self.throttle = throttle
+        self.validate_models = validate_models
+        self.json_decoder = json_decoder
+        self.hooks = hooks
+        self.trace_configs = trace_configs
+        self.retry = retry
+        self.parse_pool = parse_pool
+        self.cooperative = cooperative
+        self._session: Optional[ClientSession] = None
+        self._session_users = 0
+        self._closing: Set["asyncio.Task[None]"] = set()
 
     @classmethod
     def from_file(cls, path: Path) -> "EvgApiFactory":
@@ -42,21 +125,141 @@ class EvgApiFactory:
             return cls(config)
         return None
 
+    def _create_session(self) -> ClientSession:
+        """Create an HTTP session using the configured connection pool and timeouts."""
+        config = self.evg_config
+        read_timeout = config.read_timeout if config.read_timeout else config.network_timeout
+        timeout = ClientTimeout(
+            total=config.network_timeout, connect=config.connect_timeout, sock_read=read_timeout
+        )
+        connector = TCPConnector(
+            limit=self.pool_config.limit,
+            limit_per_host=self.pool_config.limit_per_host,
+            keepalive_timeout=self.pool_config.keepalive_timeout,
+            ttl_dns_cache=self.pool_config.dns_cache_ttl,
+        )
+        headers = config.get_auth_headers()
+        headers["Accept-Encoding"] = _accept_encoding(self.pool_config.compression)
+        return ClientSession(
+            headers=headers,
+            connector=connector,
+            timeout=timeout,
+            raise_for_status=True,
+            trace_configs=self.trace_configs,
+        )
+
+    def _acquire_session(self) -> ClientSession:
+        """Get the shared HTTP session, creating it if needed."""
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+            self._session_users = 0
+        self._session_users += 1
+        return self._session
+
+    def _detach_unused_session(self, session: ClientSession) -> bool:
+        """
+        Stop using the shared HTTP session.
+
+        :param session: Session that is no longer used.
+        :return: True if nothing else is using the session, so it should be closed.
+        """
+        if session is not self._session:
+            # The session was already closed by `close`.
+            return False
+        self._session_users -= 1
+        if self._session_users > 0:
+            return False
+        self._session = None
+        self._session_users = 0
+        return True
+
+    async def _release_session(self, session: ClientSession) -> None:
+        """
+        Stop using the shared HTTP session, closing it once nothing else is using it.
+
+        :param session: Session that is no longer used.
+        """
+        if self._detach_unused_session(session):
+            await session.close()
+
+    def _release_client_session(self, session: ClientSession) -> None:
+        """
+        Stop using the shared HTTP session when a manually managed client is closed.
+
+        The session is closed in the background once nothing else is using it. Without a running
+        event loop it is kept open until `close` is called on this factory.
+
+        :param session: Session that is no longer used.
+        """
+        if not self._detach_unused_session(session):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._session = session
+            return
+        task = loop.create_task(session.close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
     @asynccontextmanager
     async def evergreen_api(self):
-        """Use a context manager to create an API session."""
-        headers = self.evg_config.get_auth_headers()
-        async with ClientSession(headers=headers, raise_for_status=True) as session:
-            api = AioEvergreenApi(session, self.evg_config.api_server)
+        """
+        Use a context manager to create an API client.
+
+        The shared HTTP session is closed once the last open context exits.
+        """
+        session = self._acquire_session()
+        api = self._create_api(session)
+        try:
             yield api
-        api.close()
+        finally:
+            api.close()
+            await self._release_session(session)
 
     def get_evergreen_api_client(self) -> AioEvergreenApi:
         """
         Get a client that needs to be manually closed.
 
-        You should class `close()` on the returned object once finished.
+        You should call `close()` on the returned object once finished. The shared HTTP session
+        is closed once the last client using it is closed, or by calling `close()` on this
+        factory.
+        """
+        session = self._acquire_session()
+        return self._create_api(session, on_close=lambda: self._release_client_session(session))
+
+    async def close(self) -> None:
+        """Close the shared HTTP session, regardless of which clients are still using it."""
+        if self._session is not None:
+            session = self._session
+            self._session = None
+            self._session_users = 0
+            await session.close()
+        if self._closing:
+            await asyncio.gather(*self._closing)
+
+    def _create_api(
+        self, session: ClientSession, on_close: Optional[Callable[[], Any]] = None
+    ) -> AioEvergreenApi:
+        """
+        Create an API client using the given session.
+
+        :param session: HTTP session for the client to use.
+        :param on_close: Function for the client to call when it is closed.
+        :return: API client configured by this factory.
         """
-        headers = self.evg_config.get_auth_headers()
-        session = ClientSession(headers=headers, raise_for_status=True)
-        return AioEvergreenApi(session, self.evg_config.api_server)
+        return AioEvergreenApi(
+            session,
+            self.evg_config.api_server,
+            prefetch=self.prefetch,
+            response_cache=self.response_cache,
+            task_cache=self.task_cache,
+            throttle=self.throttle,
+            validate_models=self.validate_models,
+            json_decoder=self.json_decoder,
+            hooks=self.hooks,
+            retry=self.retry,
+            parse_pool=self.parse_pool,
+            cooperative=self.cooperative,
+            on_close=on_close,
+        )
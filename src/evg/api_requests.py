@@ -1,11 +1,12 @@
 """Objects for making requests to the API."""
-from dataclasses import dataclass
-from datetime import datetime
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
 from typing import Any, Dict, List, NamedTuple, Optional
 
 from evg.models.evg_version import Requester
 
 EVG_DATE_FORMAT = "%Y-%m-%d"
+STATS_SORT_LATEST = "latest"
 
 
 def format_evergreen_date(when: datetime) -> str:
@@ -84,3 +85,56 @@ class StatsSpecification:
             params["sort"] = self.sort
 
         return params
+
+    def shard(
+        self, shard_days: int, split_variants: bool = False, split_tasks: bool = False
+    ) -> List["StatsSpecification"]:
+        """
+        Split this specification into smaller specifications that can be queried independently.
+
+        The date range is split into sub-ranges of `shard_days` days. If `group_num_days` is set,
+        the shard size is rounded up to a multiple of it so that no aggregated group is split
+        across shards. Date ranges are ordered to match the `sort` order of this specification.
+        A remainder shorter than a calendar day is merged into the last full shard, since the
+        endpoint only accepts whole dates.
+
+        :param shard_days: Number of days to include in each shard.
+        :param split_variants: Also create a separate shard for each variant in `variants`.
+        :param split_tasks: Also create a separate shard for each task in `tasks`.
+        :return: List of specifications covering the same stats as this one.
+        """
+        if self.after_date is None or self.before_date is None:
+            raise ValueError("after_date and before_date are required to shard a stats query")
+        if shard_days < 1:
+            raise ValueError("shard_days must be at least 1")
+
+        if self.group_num_days:
+            n_groups = -(-shard_days // self.group_num_days)
+            shard_days = n_groups * self.group_num_days
+
+        date_ranges = []
+        start = self.after_date
+        while start < self.before_date:
+            end = min(start + timedelta(days=shard_days), self.before_date)
+            date_ranges.append((start, end))
+            start = end
+        if len(date_ranges) > 1:
+            last_start, last_end = date_ranges[-1]
+            if format_evergreen_date(last_start) == format_evergreen_date(last_end):
+                date_ranges[-2:] = [(date_ranges[-2][0], last_end)]
+        if self.sort == STATS_SORT_LATEST:
+            date_ranges.reverse()
+
+        variants: List[Optional[List[str]]] = [self.variants]
+        if split_variants and self.variants:
+            variants = [[variant] for variant in self.variants]
+        tasks: List[Optional[List[str]]] = [self.tasks]
+        if split_tasks and self.tasks:
+            tasks = [[task] for task in self.tasks]
+
+        return [
+            replace(self, after_date=after, before_date=before, variants=variant, tasks=task)
+            for after, before in date_ranges
+            for variant in variants
+            for task in tasks
+        ]
@@ -0,0 +1 @@
+"""Command line interface to the Evergreen API."""
@@ -0,0 +1,585 @@
+"""Command line interface to query the Evergreen API."""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+)
+
+if TYPE_CHECKING:
+    from datetime import datetime
+
+    from evg.api import AioEvergreenApi
+    from evg.api_factory import EvgApiFactory
+
+DEFAULT_CONCURRENCY = 4
+FLUSH_INTERVAL_SEC = 0.1
+FORMATS = ["ndjson", "csv"]
+REQUESTERS = [
+    "patch_request",
+    "gitter_request",
+    "github_pull_request",
+    "merge_test",
+    "ad_hoc",
+    "trigger_request",
+]
+
+
+class CliError(Exception):
+    """An error to report to the user without a traceback."""
+
+
+class NdjsonWriter:
+    """Write items to a stream as one JSON object per line."""
+
+    def __init__(
+        self,
+        stream: IO[str],
+        fields: Optional[List[str]],
+        default: Callable[[Any], Any],
+        flush_interval: float = FLUSH_INTERVAL_SEC,
+    ) -> None:
+        """
+        Initialize the writer.
+
+        :param stream: Stream to write to.
+        :param fields: Only write these fields of each item, None to write all fields.
+        :param default: Function to convert values the json module can not encode.
+        :param flush_interval: Seconds between flushes of the stream.
+        """
+        self.stream = stream
+        self.fields = fields
+        self.flush_interval = flush_interval
+        self._last_flush = time.monotonic()
+        self._encode = json.JSONEncoder(default=default, separators=(",", ":")).encode
+
+    def write(self, item: Dict[str, Any]) -> None:
+        """
+        Write an item, flushing the stream if it has not been flushed recently.
+
+        :param item: Item to write.
+        """
+        if self.fields is not None:
+            item = {field: item.get(field) for field in self.fields}
+        self.stream.write(self._encode(item))
+        self.stream.write("\n")
+        self._maybe_flush()
+
+    def _maybe_flush(self) -> None:
+        """Flush the stream if the flush interval has passed."""
+        now = time.monotonic()
+        if now - self._last_flush >= self.flush_interval:
+            self.flush()
+            self._last_flush = now
+
+    def flush(self) -> None:
+        """Flush the stream."""
+        self.stream.flush()
+
+
+class CsvWriter(NdjsonWriter):
+    """
+    Write items to a stream as CSV rows.
+
+    The columns are the given fields, or the fields of the first item. Nested values are
+    written as JSON.
+    """
+
+    def __init__(
+        self,
+        stream: IO[str],
+        fields: Optional[List[str]],
+        default: Callable[[Any], Any],
+        flush_interval: float = FLUSH_INTERVAL_SEC,
+    ) -> None:
+        """
+        Initialize the writer.
+
+        :param stream: Stream to write to.
+        :param fields: Columns to write, None to use the fields of the first item.
+        :param default: Function to convert values the json module can not encode.
+        :param flush_interval: Seconds between flushes of the stream.
+        """
+        super().__init__(stream, fields, default, flush_interval)
+        self._default = default
+        self._writer: Any = None
+
+    def _csv_value(self, value: Any) -> Any:
+        """
+        Convert a value to write in a CSV cell.
+
+        :param value: Value to convert.
+        :return: Value to write.
+        """
+        if value is None or isinstance(value, (str, int, float)):
+            return value
+        if isinstance(value, (dict, list, tuple)):
+            return self._encode(value)
+        return self._csv_value(self._default(value))
+
+    def write(self, item: Dict[str, Any]) -> None:
+        """
+        Write an item, flushing the stream if it has not been flushed recently.
+
+        :param item: Item to write.
+        """
+        if self._writer is None:
+            import csv
+
+            fields = self.fields if self.fields is not None else list(item)
+            self._writer = csv.DictWriter(
+                self.stream, fields, restval="", extrasaction="ignore", lineterminator="\n"
+            )
+            self._writer.writeheader()
+        self._writer.writerow({key: self._csv_value(value) for key, value in item.items()})
+        self._maybe_flush()
+
+
+def _as_dict(item: Any) -> Dict[str, Any]:
+    """
+    Get the fields of an item.
+
+    :param item: Decoded JSON object or model.
+    :return: Fields of the item.
+    """
+    if isinstance(item, dict):
+        return item
+    return item.__dict__
+
+
+def _create_writer(args: argparse.Namespace, stream: IO[str]) -> NdjsonWriter:
+    """
+    Create a writer for the output format requested.
+
+    :param args: Parsed command line arguments.
+    :param stream: Stream to write to.
+    :return: Writer for items.
+    """
+    from pydantic.json import pydantic_encoder
+
+    if args.format == "csv":
+        return CsvWriter(stream, args.fields, pydantic_encoder)
+    return NdjsonWriter(stream, args.fields, pydantic_encoder)
+
+
+async def _write_items(items: AsyncIterable[Any], args: argparse.Namespace, stream: IO[str]) -> int:
+    """
+    Write items as they arrive, stopping once the limit is reached.
+
+    :param items: Items to write.
+    :param args: Parsed command line arguments.
+    :param stream: Stream to write to.
+    :return: Exit code of the command.
+    """
+    writer = _create_writer(args, stream)
+    n_items = 0
+    try:
+        if args.limit is None or args.limit > 0:
+            async for item in items:
+                writer.write(_as_dict(item))
+                n_items += 1
+                if args.limit is not None and n_items >= args.limit:
+                    break
+    finally:
+        aclose = getattr(items, "aclose", None)
+        if aclose is not None:
+            await aclose()
+        writer.flush()
+    return 0
+
+
+async def _merge(sources: Sequence[AsyncIterable[Any]], concurrency: int) -> AsyncIterable[Any]:
+    """
+    Iterate over several sources concurrently, yielding items as they arrive.
+
+    :param sources: Sources to iterate over.
+    :param concurrency: Maximum number of sources to iterate at once.
+    :return: Iterable over the items of all sources.
+    """
+    from evg.concurrency import merge_iterables
+
+    if len(sources) == 1:
+        return sources[0]
+    return merge_iterables(sources, concurrency, ordered=False)
+
+
+async def _filter_status(items: AsyncIterable[Any], statuses: List[str]) -> AsyncIterator[Any]:
+    """
+    Filter items by their status.
+
+    :param items: Items to filter.
+    :param statuses: Statuses of the items to keep.
+    :return: Iterator over the items with one of the statuses.
+    """
+    wanted = frozenset(statuses)
+    async for item in items:
+        if _as_dict(item).get("status") in wanted:
+            yield item
+
+
+# Commands
+
+
+async def _projects(api: "AioEvergreenApi", args: argparse.Namespace, stream: IO[str]) -> int:
+    """Write all projects."""
+    items: AsyncIterable[Any]
+    if args.raw:
+        items = await api.raw_iterator("projects")
+    else:
+        items = await api.all_project(args.fields)
+    return await _write_items(items, args, stream)
+
+
+async def _versions(api: "AioEvergreenApi", args: argparse.Namespace, stream: IO[str]) -> int:
+    """Write the versions of a project, newest first."""
+    from evg.models.evg_version import Requester
+
+    requester = Requester(args.requester)
+    items: AsyncIterable[Any]
+    if args.raw:
+        params = {"requester": requester.evg_value()}
+        items = await api.raw_iterator(f"projects/{args.project_id}/versions", params)
+    else:
+        items = await api.versions_by_project(args.project_id, requester, args.fields)
+    return await _write_items(items, args, stream)
+
+
+async def _patches(api: "AioEvergreenApi", args: argparse.Namespace, stream: IO[str]) -> int:
+    """Write the patches of a project or of a user, newest first."""
+    items: AsyncIterable[Any]
+    if args.raw:
+        if args.user:
+            items = await api.raw_iterator(f"users/{args.user}/patches")
+        else:
+            items = await api.raw_iterator(f"projects/{args.project_id}/patches")
+    elif args.user:
+        items = await api.patches_by_user(args.user, args.fields)
+    else:
+        items = await api.patches_by_project(args.project_id, args.fields)
+    return await _write_items(items, args, stream)
+
+
+async def _tasks(api: "AioEvergreenApi", args: argparse.Namespace, stream: IO[str]) -> int:
+    """Write the tasks of builds or versions, querying builds concurrently."""
+    build_ids = list(args.build or [])
+    for version_id in args.version or []:
+        version = await api.version_by_id(version_id)
+        build_ids.extend(version.get_build_ids(args.variant))
+    fields = args.fields
+    if args.status and fields is not None:
+        fields = fields + ["status"]
+
+    sources: List[AsyncIterable[Any]]
+    if args.raw:
+        sources = [await api.raw_iterator(f"builds/{build_id}/tasks") for build_id in build_ids]
+    else:
+        sources = [await api.tasks_by_build(build_id, fields) for build_id in build_ids]
+    tasks = await _merge(sources, args.concurrency)
+    if args.status:
+        tasks = _filter_status(tasks, args.status)
+    return await _write_items(tasks, args, stream)
+
+
+async def _stats(api: "AioEvergreenApi", args: argparse.Namespace, stream: IO[str]) -> int:
+    """Write test or task stats of a project, querying date ranges concurrently."""
+    from evg.api_requests import StatsSpecification
+
+    spec = StatsSpecification(
+        project_id=args.project_id,
+        after_date=args.after,
+        before_date=args.before,
+        group_num_days=args.group_num_days,
+        tests=args.test,
+        tasks=args.task,
+        variants=args.variant,
+        distros=args.distro,
+        group_by=args.group_by,
+        sort=args.sort,
+    )
+    specs = spec.shard(args.shard_days) if args.shard_days else [spec]
+    endpoint = f"projects/{args.project_id}/{args.kind}_stats"
+
+    sources: List[AsyncIterable[Any]]
+    if args.raw:
+        sources = [await api.raw_iterator(endpoint, shard.get_params()) for shard in specs]
+    elif args.kind == "test":
+        sources = [await api.test_stats(shard, args.fields) for shard in specs]
+    else:
+        sources = [await api.task_stats(shard, args.fields) for shard in specs]
+    return await _write_items(await _merge(sources, args.concurrency), args, stream)
+
+
+async def _logs(api: "AioEvergreenApi", args: argparse.Namespace, stream: IO[str]) -> int:
+    """Write logs of tasks to stdout, or download them to a directory."""
+    log_urls: Dict[str, str] = {}
+    exit_code = 0
+    async for result in await api.tasks_by_ids(args.task_id, args.concurrency, ordered=True):
+        log_url = result.value.logs.get(args.type) if result.error is None else None
+        if log_url:
+            log_urls[result.key] = log_url
+        else:
+            reason = result.error if result.error is not None else f"no {args.type}"
+            print(f"evg-api: {result.key}: {reason}", file=sys.stderr)
+            exit_code = 1
+
+    if args.output_dir is None:
+        stream.flush()
+        output = stream.buffer  # type: ignore[attr-defined]
+        for log_url in log_urls.values():
+            async for chunk in api.stream_log_chunks(log_url):
+                output.write(chunk)
+            output.flush()
+        return exit_code
+
+    from pathlib import Path
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    task_ids = {log_url: task_id for task_id, log_url in log_urls.items()}
+    destinations = {log_url: output_dir / f"{task_id}.log" for task_id, log_url in log_urls.items()}
+
+    async def downloads() -> AsyncIterator[Dict[str, Any]]:
+        nonlocal exit_code
+        async for result in await api.download_logs(destinations, args.concurrency):
+            task_id = task_ids[result.key]
+            if result.error is not None:
+                print(f"evg-api: {task_id}: {result.error}", file=sys.stderr)
+                exit_code = 1
+            else:
+                yield {"task_id": task_id, **result.value._asdict()}
+
+    await _write_items(downloads(), args, stream)
+    return exit_code
+
+
+# Arguments
+
+
+def _date(value: str) -> "datetime":
+    """
+    Parse a date given on the command line.
+
+    :param value: Date in ISO format, for example 2020-09-01.
+    :return: Parsed date.
+    """
+    from datetime import datetime
+
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date: {value!r}")
+
+
+def _field_list(value: str) -> List[str]:
+    """
+    Parse a comma separated list of fields.
+
+    :param value: Comma separated fields.
+    :return: List of fields.
+    """
+    return [field.strip() for field in value.split(",") if field.strip()]
+
+
+def _positive_int(value: str) -> int:
+    """
+    Parse a positive integer.
+
+    :param value: Integer given on the command line.
+    :return: Parsed integer.
+    """
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1: {value}")
+    return number
+
+
+def create_parser() -> argparse.ArgumentParser:
+    """Create the parser for command line arguments."""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        "--config", help="Evergreen configuration file, defaults to ~/.evergreen.yml."
+    )
+    common.add_argument(
+        "--format", choices=FORMATS, default="ndjson", help="Output format (default: ndjson)."
+    )
+    common.add_argument(
+        "--fields", type=_field_list, help="Comma separated fields to output, defaults to all."
+    )
+    common.add_argument("--limit", type=int, help="Stop after writing this many items.")
+    common.add_argument(
+        "--concurrency",
+        type=_positive_int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Maximum number of queries to run at once (default: {DEFAULT_CONCURRENCY}).",
+    )
+    common.add_argument(
+        "--raw",
+        action="store_true",
+        help="Output the JSON returned by the server without building models.",
+    )
+
+    parser = argparse.ArgumentParser(prog="evg-api", description="Query the Evergreen API.")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND", required=True)
+
+    projects = commands.add_parser("projects", parents=[common], help="List all projects.")
+    projects.set_defaults(handler=_projects)
+
+    versions = commands.add_parser(
+        "versions", parents=[common], help="List the versions of a project."
+    )
+    versions.add_argument("project_id", help="ID of project to query.")
+    versions.add_argument(
+        "--requester",
+        choices=REQUESTERS,
+        default="gitter_request",
+        help="List versions created by this requester (default: gitter_request).",
+    )
+    versions.set_defaults(handler=_versions)
+
+    patches = commands.add_parser(
+        "patches", parents=[common], help="List the patches of a project or a user."
+    )
+    patches.add_argument("project_id", nargs="?", help="ID of project to query.")
+    patches.add_argument("--user", help="List the patches of this user instead of a project.")
+    patches.set_defaults(handler=_patches)
+
+    tasks = commands.add_parser(
+        "tasks", parents=[common], help="List the tasks of builds or versions."
+    )
+    source = tasks.add_mutually_exclusive_group(required=True)
+    source.add_argument("--build", nargs="+", metavar="BUILD_ID", help="IDs of builds to query.")
+    source.add_argument(
+        "--version", nargs="+", metavar="VERSION_ID", help="IDs of versions to query."
+    )
+    tasks.add_argument(
+        "--variant", action="append", help="Only list tasks of this build variant of a version."
+    )
+    tasks.add_argument("--status", action="append", help="Only list tasks with this status.")
+    tasks.set_defaults(handler=_tasks)
+
+    stats = commands.add_parser("stats", parents=[common], help="List test or task stats.")
+    stats.add_argument("kind", choices=["test", "task"], help="Kind of stats to query.")
+    stats.add_argument("project_id", help="ID of project to query.")
+    stats.add_argument("--after", type=_date, required=True, help="Start date, e.g. 2020-09-01.")
+    stats.add_argument("--before", type=_date, required=True, help="End date, e.g. 2020-09-08.")
+    stats.add_argument("--group-num-days", type=int, help="Number of days to aggregate over.")
+    stats.add_argument("--test", action="append", help="Only include this test.")
+    stats.add_argument("--task", action="append", help="Only include this task.")
+    stats.add_argument("--variant", action="append", help="Only include this build variant.")
+    stats.add_argument("--distro", action="append", help="Only include this distro.")
+    stats.add_argument("--group-by", choices=["test_task_variant", "test_task", "test"])
+    stats.add_argument("--sort", choices=["earliest", "latest"])
+    stats.add_argument(
+        "--shard-days",
+        type=_positive_int,
+        help="Split the date range into queries of this many days, run concurrently.",
+    )
+    stats.set_defaults(handler=_stats)
+
+    logs = commands.add_parser(
+        "logs", parents=[common], help="Write the logs of tasks to stdout or to files."
+    )
+    logs.add_argument("task_id", nargs="+", help="IDs of tasks to get logs of.")
+    logs.add_argument("--type", default="task_log", help="Type of log (default: task_log).")
+    logs.add_argument(
+        "--output-dir",
+        help="Download each log to <task_id>.log in this directory, listing the results.",
+    )
+    logs.set_defaults(handler=_logs)
+
+    return parser
+
+
+def _create_api_factory(args: argparse.Namespace) -> "EvgApiFactory":
+    """
+    Create an API factory from the configuration requested.
+
+    :param args: Parsed command line arguments.
+    :return: Factory to create API clients with.
+    """
+    from pathlib import Path
+
+    from evg.api_factory import EvgApiFactory
+
+    if args.config is not None:
+        return EvgApiFactory.from_file(Path(args.config))
+    api_factory = EvgApiFactory.from_default_config()
+    if api_factory is None:
+        raise CliError("no evergreen configuration found, use --config to give one")
+    return api_factory
+
+
+async def run_command(api: "AioEvergreenApi", args: argparse.Namespace, stream: IO[str]) -> int:
+    """
+    Run the command given on the command line.
+
+    :param api: API client to query.
+    :param args: Parsed command line arguments.
+    :param stream: Stream to write the output to.
+    :return: Exit code of the command.
+    """
+    return await args.handler(api, args, stream)
+
+
+async def _run(args: argparse.Namespace) -> int:
+    """
+    Run a command with a client created from the configuration requested.
+
+    :param args: Parsed command line arguments.
+    :return: Exit code of the command.
+    """
+    from aiohttp import ClientError
+
+    api_factory = _create_api_factory(args)
+    try:
+        async with api_factory.evergreen_api() as api:
+            return await run_command(api, args, sys.stdout)
+    except ClientError as err:
+        raise CliError(str(err))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Run the command line interface.
+
+    Results are written to stdout as they arrive. Only the argument parser is built before the
+    command runs, the API client, its models and aiohttp are imported after parsing so
+    `--help` starts quickly.
+
+    :param argv: Command line arguments, defaults to those of the process.
+    :return: Exit code.
+    """
+    parser = create_parser()
+    args = parser.parse_args(argv)
+    if args.command == "patches" and (args.project_id is None) == (args.user is None):
+        parser.error("patches requires either a project ID or --user")
+
+    import asyncio
+
+    try:
+        return asyncio.run(_run(args))
+    except CliError as err:
+        print(f"evg-api: error: {err}", file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        # The reader went away, for example `head` got all the lines it wanted. Point stdout at
+        # devnull so flushing it on exit does not raise again.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,285 @@
+"""Helpers for running many API iterables concurrently."""
+import asyncio
+from enum import Enum
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+T = TypeVar("T")
+K = TypeVar("K")
+
+DEFAULT_BUFFER_SIZE = 1000
+
+
+class _Signal(Enum):
+    """Kind of entry placed on a merge queue."""
+
+    ITEM = "item"
+    ERROR = "error"
+    DONE = "done"
+    END = "end"
+
+
+class BulkResult(NamedTuple):
+    """
+    Result of fetching one item of a bulk request.
+
+    key: Key the item was requested with.
+    value: Item that was fetched, None if the request failed.
+    error: Error raised while fetching the item, None if the request succeeded.
+    """
+
+    key: Any
+    value: Any
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the item was fetched successfully."""
+        return self.error is None
+
+
+async def iterate_async(items: Union[Iterable[T], AsyncIterable[T]]) -> AsyncIterator[T]:
+    """
+    Iterate over a sync or async iterable asynchronously.
+
+    :param items: Items to iterate over.
+    :return: Async iterator over the items.
+    """
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def _drain_source(
+    index: int,
+    source: AsyncIterable[Any],
+    queue: "asyncio.Queue[Tuple[_Signal, int, Any]]",
+    semaphore: asyncio.Semaphore,
+) -> None:
+    """
+    Copy the contents of the given source to a queue.
+
+    The caller acquires the semaphore before starting to drain a source, it is released once
+    the source is drained.
+
+    :param index: Index of the source being drained.
+    :param source: Iterable to drain.
+    :param queue: Queue to copy items to.
+    :param semaphore: Semaphore limiting how many sources are drained at once.
+    """
+    try:
+        async for item in source:
+            await queue.put((_Signal.ITEM, index, item))
+    except asyncio.CancelledError:
+        raise
+    except Exception as err:
+        await queue.put((_Signal.ERROR, index, err))
+        return
+    finally:
+        semaphore.release()
+    await queue.put((_Signal.DONE, index, None))
+
+
+async def _start_sources(
+    sources: Union[Iterable[AsyncIterable[Any]], AsyncIterable[AsyncIterable[Any]]],
+    semaphore: asyncio.Semaphore,
+    shared_queue: Optional["asyncio.Queue[Tuple[_Signal, int, Any]]"],
+    buffer_size: int,
+    started: "asyncio.Queue[Tuple[_Signal, int, Any]]",
+    tasks: List["asyncio.Task[None]"],
+) -> None:
+    """
+    Start draining each source once there is capacity to do so.
+
+    The queue of each source started is put on `started`, in order, followed by an END entry
+    holding the number of sources, or an ERROR entry if iterating over the sources failed. The
+    final entry is also put on the shared queue, if there is one.
+
+    :param sources: Iterables to drain.
+    :param semaphore: Semaphore limiting how many sources are drained at once.
+    :param shared_queue: Queue to drain all sources to, None to use a queue for each source.
+    :param buffer_size: Size of the queue for each source.
+    :param started: Queue to put the queue of each started source on.
+    :param tasks: List to add the task draining each source to.
+    """
+    n_sources = 0
+    try:
+        async for source in iterate_async(sources):
+            await semaphore.acquire()
+            queue: "asyncio.Queue[Tuple[_Signal, int, Any]]" = (
+                shared_queue if shared_queue is not None else asyncio.Queue(buffer_size)
+            )
+            tasks.append(asyncio.create_task(_drain_source(n_sources, source, queue, semaphore)))
+            started.put_nowait((_Signal.ITEM, n_sources, queue))
+            n_sources += 1
+    except asyncio.CancelledError:
+        raise
+    except Exception as err:
+        end: Tuple[_Signal, int, Any] = (_Signal.ERROR, -1, err)
+    else:
+        end = (_Signal.END, -1, n_sources)
+    started.put_nowait(end)
+    if shared_queue is not None:
+        await shared_queue.put(end)
+
+
+async def _read_in_order(started: "asyncio.Queue[Tuple[_Signal, int, Any]]") -> AsyncIterator[Any]:
+    """
+    Read the items of each source in turn, in the order the sources were started.
+
+    :param started: Queue of the queue of each source started.
+    :return: Iterator over the items of all sources.
+    """
+    while True:
+        signal, _, value = await started.get()
+        if signal == _Signal.END:
+            return
+        if signal == _Signal.ERROR:
+            raise value
+        queue = value
+        while True:
+            signal, _, value = await queue.get()
+            if signal == _Signal.ITEM:
+                yield value
+            elif signal == _Signal.ERROR:
+                raise value
+            else:
+                break
+
+
+async def _read_as_available(
+    shared_queue: "asyncio.Queue[Tuple[_Signal, int, Any]]",
+) -> AsyncIterator[Any]:
+    """
+    Read the items of all sources as they arrive.
+
+    :param shared_queue: Queue all sources are drained to.
+    :return: Iterator over the items of all sources.
+    """
+    n_sources: Optional[int] = None
+    n_done = 0
+    while n_sources is None or n_done < n_sources:
+        signal, _, value = await shared_queue.get()
+        if signal == _Signal.ITEM:
+            yield value
+        elif signal == _Signal.ERROR:
+            raise value
+        elif signal == _Signal.END:
+            n_sources = value
+        else:
+            n_done += 1
+
+
+async def merge_iterables(
+    sources: Union[Iterable[AsyncIterable[T]], AsyncIterable[AsyncIterable[T]]],
+    max_concurrency: int,
+    ordered: bool = True,
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+) -> AsyncIterator[T]:
+    """
+    Iterate over several async iterables concurrently, merging their results.
+
+    At most `max_concurrency` sources are iterated at once, sources are started in the
+    order given. Sources can be given as an async iterable, in which case the next source is
+    only taken from it once there is capacity to start it. If any source raises an error, the
+    remaining sources are cancelled and the error is raised to the caller.
+
+    :param sources: Iterables to merge.
+    :param max_concurrency: Maximum number of sources to iterate at once.
+    :param ordered: If True, yield all of the items from each source in the order the sources
+        were given, otherwise yield items as soon as any source produces them.
+    :param buffer_size: Number of items to buffer ahead of the consumer for each source (or
+        across all sources if not ordered).
+    :return: Iterator over the items of all sources.
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+    shared_queue: Optional["asyncio.Queue[Tuple[_Signal, int, Any]]"] = (
+        None if ordered else asyncio.Queue(buffer_size)
+    )
+    started: "asyncio.Queue[Tuple[_Signal, int, Any]]" = asyncio.Queue()
+    tasks: List["asyncio.Task[None]"] = []
+    starter = asyncio.create_task(
+        _start_sources(sources, semaphore, shared_queue, buffer_size, started, tasks)
+    )
+    items = _read_in_order(started) if shared_queue is None else _read_as_available(shared_queue)
+    try:
+        async for item in items:
+            yield item
+    finally:
+        starter.cancel()
+        for task in tasks:
+            task.cancel()
+
+
+async def bulk_fetch(
+    keys: Iterable[K],
+    fetch_fn: Callable[[K], Awaitable[Any]],
+    max_concurrency: int,
+    ordered: bool = False,
+) -> AsyncIterator[BulkResult]:
+    """
+    Fetch an item for each of the given keys with a bounded number of concurrent requests.
+
+    Duplicate keys are only fetched once. A failure to fetch one item is reported in its
+    result and does not stop the other items from being fetched.
+
+    :param keys: Keys of items to fetch.
+    :param fetch_fn: Function to fetch the item for a key.
+    :param max_concurrency: Maximum number of items to fetch at once.
+    :param ordered: If True, yield results in the order of the keys, otherwise yield results
+        as soon as they are fetched.
+    :return: Iterator over the result of fetching each key.
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+
+    unique_keys = list(dict.fromkeys(keys))
+    work = iter(enumerate(unique_keys))
+    results: "asyncio.Queue[Tuple[int, BulkResult]]" = asyncio.Queue(maxsize=max_concurrency)
+
+    async def worker() -> None:
+        for index, key in work:
+            try:
+                result = BulkResult(key, await fetch_fn(key))
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:
+                result = BulkResult(key, None, err)
+            await results.put((index, result))
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(max_concurrency, len(unique_keys)))]
+    try:
+        pending: Dict[int, BulkResult] = {}
+        next_index = 0
+        for _ in unique_keys:
+            index, result = await results.get()
+            if not ordered:
+                yield result
+                continue
+
+            pending[index] = result
+            while next_index in pending:
+                yield pending.pop(next_index)
+                next_index += 1
+    finally:
+        for task in workers:
+            task.cancel()
@@ -9,6 +9,7 @@ import yaml
 from pydantic.main import BaseModel
 
 DEFAULT_NETWORK_TIMEOUT_SEC = math.ceil(timedelta(minutes=5).total_seconds())
+DEFAULT_CONNECT_TIMEOUT_SEC = 30
 DEFAULT_API_SERVER = "https://evergreen.mongodb.com"
 CONFIG_FILE_LOCATIONS = [
     Path.home() / "cli_bin" / ".evergreen.yml",
@@ -41,6 +42,25 @@ class EvgConfigFile(BaseModel):
             return cls(**yaml.safe_load(fstream))
 
 
+@dataclass
+class ConnectionPoolConfig:
+    """
+    Configuration of the HTTP connections used to talk to evergreen.
+
+    limit: Maximum number of open connections.
+    limit_per_host: Maximum number of open connections to a single host.
+    keepalive_timeout: Seconds to keep idle connections open for reuse.
+    dns_cache_ttl: Seconds to cache DNS lookups for.
+    compression: Request compressed (gzip, deflate and brotli if available) responses.
+    """
+
+    limit: int = 100
+    limit_per_host: int = 32
+    keepalive_timeout: float = 30.0
+    dns_cache_ttl: int = 300
+    compression: bool = True
+
+
 @dataclass
 class EvgConfig:
     """
@@ -50,12 +70,17 @@ class EvgConfig:
     api_key: API Key of user to authenticate with.
     username: Username of user to authenticate with.
     network_timeout: Timeout to use for network calls.
+    connect_timeout: Timeout to use for establishing connections.
+    read_timeout: Timeout to use for reading data from a connection, defaults to the network
+        timeout.
     """
 
     api_server: str
     api_key: str
     username: str
     network_timeout: int
+    connect_timeout: Optional[int] = DEFAULT_CONNECT_TIMEOUT_SEC
+    read_timeout: Optional[int] = None
 
     @classmethod
     def from_file(
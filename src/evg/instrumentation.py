@@ -0,0 +1,400 @@
+"""Instrumentation of API requests."""
+import bisect
+import math
+import os
+import re
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar, Union
+
+from aiohttp import TraceConfig
+
+T = TypeVar("T")
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+_REST_V2 = "/rest/v2/"
+_LABEL_ESCAPE_RE = re.compile(r'(["\\])')
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def endpoint_name(url: str) -> str:
+    """
+    Get a low cardinality name of the endpoint a URL belongs to.
+
+    REST V2 paths alternate between collection names and IDs, so every second part of the
+    path is replaced with "{id}", for example "tasks/{id}/manifest". Other URLs, such as
+    logs, are named "other".
+
+    :param url: URL of a request.
+    :return: Name of the endpoint.
+    """
+    path = url.split("?", 1)[0]
+    index = path.find(_REST_V2)
+    if index < 0:
+        return "other"
+    parts = path[index + len(_REST_V2) :].strip("/").split("/")
+    return "/".join(part if i % 2 == 0 else "{id}" for i, part in enumerate(parts))
+
+
+class Histogram:
+    """A histogram of observed values with fixed buckets."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        """
+        Initialize an empty histogram.
+
+        :param buckets: Upper bounds of the buckets, in increasing order.
+        """
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """
+        Record a value.
+
+        :param value: Value to record.
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile of the recorded values from the bucket counts.
+
+        :param q: Quantile to estimate, between 0 and 1.
+        :return: Upper bound of the bucket containing the quantile, None if nothing was
+            recorded. Values beyond the last bucket are reported as infinity.
+        """
+        if self.count == 0:
+            return None
+        target = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets + [math.inf], self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return math.inf
+
+
+def _labels(labels: Optional[Dict[str, str]]) -> Labels:
+    """
+    Convert labels to a hashable, ordered form.
+
+    :param labels: Labels of a metric.
+    :return: Sorted label names and values.
+    """
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    """
+    Format labels for the Prometheus text format.
+
+    :param labels: Labels of a metric.
+    :param extra: Additional label to add.
+    :return: Formatted labels, empty if there are none.
+    """
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    formatted = ",".join(f'{k}="{_escape_label_value(v)}"' for k, v in items)
+    return "{" + formatted + "}"
+
+
+def _escape_label_value(value: str) -> str:
+    """
+    Escape a label value for the Prometheus text format.
+
+    :param value: Label value.
+    :return: Value with backslashes, quotes and newlines escaped.
+    """
+    return _LABEL_ESCAPE_RE.sub(r"\\\1", value).replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    """
+    Format a value for the Prometheus text format.
+
+    :param value: Value to format.
+    :return: Formatted value.
+    """
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """
+    An in-memory store of counters and histograms, each identified by a name and labels.
+
+    The registry can be exported in the Prometheus text format, for example to a file read by
+    a node exporter's textfile collector.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+
+    def inc(self, name: str, value: float = 1.0, labels: Optional[Dict[str, str]] = None) -> None:
+        """
+        Increase a counter.
+
+        :param name: Name of the counter.
+        :param value: Amount to increase the counter by.
+        :param labels: Labels of the counter.
+        """
+        series = self.counters.setdefault(name, {})
+        key = _labels(labels)
+        series[key] = series.get(key, 0.0) + value
+
+    def observe(
+        self,
+        name: str,
+        value: float,
+        labels: Optional[Dict[str, str]] = None,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        """
+        Record a value in a histogram.
+
+        :param name: Name of the histogram.
+        :param value: Value to record.
+        :param labels: Labels of the histogram.
+        :param buckets: Buckets to use if the histogram does not exist yet.
+        """
+        series = self.histograms.setdefault(name, {})
+        key = _labels(labels)
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram(buckets)
+        histogram.observe(value)
+
+    def counter(self, name: str, labels: Optional[Dict[str, str]] = None) -> float:
+        """
+        Get the value of a counter.
+
+        :param name: Name of the counter.
+        :param labels: Labels of the counter.
+        :return: Value of the counter, 0 if it has not been increased.
+        """
+        return self.counters.get(name, {}).get(_labels(labels), 0.0)
+
+    def histogram(self, name: str, labels: Optional[Dict[str, str]] = None) -> Optional[Histogram]:
+        """
+        Get a histogram.
+
+        :param name: Name of the histogram.
+        :param labels: Labels of the histogram.
+        :return: The histogram, None if nothing has been recorded in it.
+        """
+        return self.histograms.get(name, {}).get(_labels(labels))
+
+    def clear(self) -> None:
+        """Remove all metrics."""
+        self.counters.clear()
+        self.histograms.clear()
+
+    def to_prometheus_text(self) -> str:
+        """Export all metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        for name, counter_series in sorted(self.counters.items()):
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in sorted(counter_series.items()):
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for name, histogram_series in sorted(self.histograms.items()):
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in sorted(histogram_series.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + [math.inf], histogram.counts):
+                    cumulative += count
+                    le = ("le", _format_value(bound))
+                    lines.append(f"{name}_bucket{_format_labels(labels, le)} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus_text(self, path: Union[str, Path]) -> None:
+        """
+        Write all metrics to a file in the Prometheus text format.
+
+        The file is replaced atomically, so readers never see a partially written file.
+
+        :param path: Path of the file to write.
+        """
+        path = Path(path)
+        temp_path = path.with_name(path.name + ".tmp")
+        temp_path.write_text(self.to_prometheus_text())
+        os.replace(temp_path, path)
+
+
+class ApiHooks:
+    """
+    Interface for observing the work done by an API client.
+
+    All methods do nothing, subclasses override the events they are interested in. Hooks are
+    called synchronously from the event loop, so they should be quick.
+    """
+
+    def on_request(self, endpoint: str, status: int, seconds: float, n_bytes: int) -> None:
+        """
+        Handle a completed HTTP request, or one that failed with an error status or error.
+
+        :param endpoint: Name of the endpoint requested.
+        :param status: HTTP status of the response, 0 if no response was received.
+        :param seconds: Time taken to send the request and read the whole response body, or
+            until the request failed.
+        :param n_bytes: Size of the response body, 0 if the request failed.
+        """
+
+    def on_retry(self, endpoint: str, status: int, delay: float) -> None:
+        """
+        Handle a request that is going to be retried.
+
+        :param endpoint: Name of the endpoint requested.
+        :param status: HTTP status of the failed response, 0 if no response was received.
+        :param delay: Seconds until the request is retried.
+        """
+
+    def on_cache_lookup(self, endpoint: str, hit: bool) -> None:
+        """
+        Handle a lookup in the response cache.
+
+        :param endpoint: Name of the endpoint requested.
+        :param hit: Whether the response was found in the cache.
+        """
+
+    def on_decode(self, endpoint: str, seconds: float) -> None:
+        """
+        Handle decoding a JSON response body.
+
+        :param endpoint: Name of the endpoint requested.
+        :param seconds: Time taken to decode the body.
+        """
+
+    def on_page(self, endpoint: str, n_items: int) -> None:
+        """
+        Handle a page of a paginated request.
+
+        :param endpoint: Name of the endpoint requested.
+        :param n_items: Number of items on the page.
+        """
+
+    def on_parse(self, model: str, seconds: float) -> None:
+        """
+        Handle building a model.
+
+        :param model: Name of the model.
+        :param seconds: Time taken to build the model.
+        """
+
+
+class MetricsHooks(ApiHooks):
+    """Record API client events in a metrics registry."""
+
+    def __init__(self, registry: MetricsRegistry) -> None:
+        """
+        Initialize the hooks.
+
+        :param registry: Registry to record metrics in.
+        """
+        self.registry = registry
+
+    def on_request(self, endpoint: str, status: int, seconds: float, n_bytes: int) -> None:
+        """Record the time taken and bytes transferred by a request."""
+        labels = {"endpoint": endpoint}
+        self.registry.inc("evg_requests_total", 1, {"endpoint": endpoint, "status": str(status)})
+        self.registry.inc("evg_response_bytes_total", n_bytes, labels)
+        self.registry.observe("evg_request_seconds", seconds, labels)
+
+    def on_retry(self, endpoint: str, status: int, delay: float) -> None:
+        """Count a retried request."""
+        self.registry.inc("evg_retries_total", 1, {"endpoint": endpoint, "status": str(status)})
+
+    def on_cache_lookup(self, endpoint: str, hit: bool) -> None:
+        """Count a cache hit or miss."""
+        name = "evg_cache_hits_total" if hit else "evg_cache_misses_total"
+        self.registry.inc(name, 1, {"endpoint": endpoint})
+
+    def on_decode(self, endpoint: str, seconds: float) -> None:
+        """Record the time taken to decode a response."""
+        self.registry.observe("evg_decode_seconds", seconds, {"endpoint": endpoint})
+
+    def on_page(self, endpoint: str, n_items: int) -> None:
+        """Count a page and its items."""
+        labels = {"endpoint": endpoint}
+        self.registry.inc("evg_pages_total", 1, labels)
+        self.registry.inc("evg_items_total", n_items, labels)
+
+    def on_parse(self, model: str, seconds: float) -> None:
+        """Record the time taken to build a model."""
+        self.registry.observe("evg_parse_seconds", seconds, {"model": model})
+
+
+def timed_parser(parser: Callable[[Any], T], model: str, hooks: ApiHooks) -> Callable[[Any], T]:
+    """
+    Wrap a function building models so each call is reported to hooks.
+
+    :param parser: Function building models.
+    :param model: Name of the model built.
+    :param hooks: Hooks to report to.
+    :return: Function building models and reporting how long it took.
+    """
+
+    def parse(data: Any) -> T:
+        start = time.perf_counter()
+        result = parser(data)
+        hooks.on_parse(model, time.perf_counter() - start)
+        return result
+
+    return parse
+
+
+def create_trace_config(registry: MetricsRegistry) -> TraceConfig:
+    """
+    Create an aiohttp trace config recording connection level timings.
+
+    Records DNS lookup and connection setup time by host, time to first byte (until the
+    response headers arrive) by endpoint, and the number of reused connections.
+
+    :param registry: Registry to record metrics in.
+    :return: Trace config to pass to a `ClientSession`.
+    """
+
+    async def on_request_start(session: Any, context: SimpleNamespace, params: Any) -> None:
+        context.request_start = time.perf_counter()
+
+    async def on_request_end(session: Any, context: SimpleNamespace, params: Any) -> None:
+        seconds = time.perf_counter() - context.request_start
+        registry.observe("evg_ttfb_seconds", seconds, {"endpoint": endpoint_name(str(params.url))})
+
+    async def on_dns_start(session: Any, context: SimpleNamespace, params: Any) -> None:
+        context.dns_start = time.perf_counter()
+
+    async def on_dns_end(session: Any, context: SimpleNamespace, params: Any) -> None:
+        seconds = time.perf_counter() - context.dns_start
+        registry.observe("evg_dns_seconds", seconds, {"host": params.host})
+
+    async def on_connect_start(session: Any, context: SimpleNamespace, params: Any) -> None:
+        context.connect_start = time.perf_counter()
+
+    async def on_connect_end(session: Any, context: SimpleNamespace, params: Any) -> None:
+        registry.observe("evg_connect_seconds", time.perf_counter() - context.connect_start)
+
+    async def on_connection_reused(session: Any, context: SimpleNamespace, params: Any) -> None:
+        registry.inc("evg_connections_reused_total")
+
+    trace_config = TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_dns_resolvehost_start.append(on_dns_start)
+    trace_config.on_dns_resolvehost_end.append(on_dns_end)
+    trace_config.on_connection_create_start.append(on_connect_start)
+    trace_config.on_connection_create_end.append(on_connect_end)
+    trace_config.on_connection_reuseconn.append(on_connection_reused)
+    return trace_config
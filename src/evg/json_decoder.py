@@ -0,0 +1,46 @@
+"""Decoding of JSON response bodies."""
+import json
+from typing import Any, Callable, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+JsonDecoder = Callable[[Union[bytes, str]], Any]
+
+
+def stdlib_json_decoder(body: Union[bytes, str]) -> Any:
+    """
+    Decode JSON with the standard library decoder.
+
+    :param body: JSON document to decode.
+    :return: Decoded document.
+    """
+    return json.loads(body)
+
+
+def get_default_json_decoder() -> JsonDecoder:
+    """
+    Get the fastest JSON decoder available.
+
+    orjson is used if it is installed, otherwise the standard library decoder is used.
+
+    :return: Function to decode JSON documents.
+    """
+    if orjson is not None:
+        return orjson.loads
+    return stdlib_json_decoder
+
+
+def is_empty_json_list(body: bytes) -> bool:
+    """
+    Determine if a response body is an empty JSON list without decoding it.
+
+    :param body: Response body.
+    :return: True if the body is empty or an empty list.
+    """
+    if len(body) > 64:
+        return False
+    stripped = b"".join(body.split())
+    return stripped in (b"", b"[]", b"null")
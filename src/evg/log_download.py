@@ -0,0 +1,176 @@
+"""Download logs straight to disk."""
+import asyncio
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional, Union
+
+from aiohttp import ClientConnectionError, ClientPayloadError, ClientSession
+
+DEFAULT_CHUNK_SIZE = 256 * 1024
+DEFAULT_MAX_ATTEMPTS = 3
+PARTIAL_SUFFIX = ".part"
+HTTP_PARTIAL_CONTENT = 206
+HTTP_RANGE_NOT_SATISFIABLE = 416
+_CONTENT_RANGE_RE = re.compile(r"bytes\s+(?:(\d+)-\d+|\*)/(\d+)")
+
+
+class IncompleteDownloadError(IOError):
+    """A download finished with a different size than the server reported."""
+
+
+class DownloadResult(NamedTuple):
+    """
+    Result of downloading a log.
+
+    path: Path the log was written to.
+    size: Size of the log in bytes.
+    resumed_from: Number of bytes that were already downloaded before the first request.
+    """
+
+    path: Path
+    size: int
+    resumed_from: int
+
+
+def partial_path(path: Path) -> Path:
+    """
+    Get the path partial data of a download is written to.
+
+    :param path: Destination of the download.
+    :return: Path of the partial file.
+    """
+    return path.with_name(path.name + PARTIAL_SUFFIX)
+
+
+def parse_content_range(value: Optional[str]) -> Optional[Dict[str, int]]:
+    """
+    Parse the value of a Content-Range header.
+
+    :param value: Header value, such as "bytes 100-199/200" or "bytes */200".
+    :return: Dictionary with the "start" of the range (if given) and the "total" size, or None
+        if the header is missing, invalid or the total size is unknown.
+    """
+    if not value:
+        return None
+    match = _CONTENT_RANGE_RE.match(value)
+    if match is None:
+        return None
+    parsed = {"total": int(match.group(2))}
+    if match.group(1) is not None:
+        parsed["start"] = int(match.group(1))
+    return parsed
+
+
+def _file_size(path: Path) -> int:
+    """
+    Get the size of a file.
+
+    :param path: Path of the file.
+    :return: Size of the file in bytes, 0 if it does not exist.
+    """
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+async def _download_from(
+    session: ClientSession,
+    url: str,
+    partial: Path,
+    offset: int,
+    params: Optional[Dict[str, Any]],
+    chunk_size: int,
+) -> Optional[int]:
+    """
+    Download the rest of a file, starting at the given offset.
+
+    :param session: HTTP session to make the request with.
+    :param url: URL to download.
+    :param partial: Path of the partial file to write to.
+    :param offset: Number of bytes already in the partial file.
+    :param params: Params to send to URL.
+    :param chunk_size: Maximum number of bytes to write at once.
+    :return: Total size of the file according to the server, None if it is unknown.
+    """
+    # Ranges refer to the encoded body, so ask for no content encoding to keep them usable.
+    headers = {"Accept-Encoding": "identity"}
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+
+    # A 416 response is handled below, so it must not be raised by a session created with
+    # raise_for_status=True.
+    async with session.get(url, params=params, headers=headers, raise_for_status=False) as resp:
+        content_range = parse_content_range(resp.headers.get("Content-Range"))
+        if offset and resp.status == HTTP_RANGE_NOT_SATISFIABLE:
+            if content_range is not None and content_range["total"] == offset:
+                return offset
+            # The partial file is larger than the log, so it can not be resumed.
+            return await _download_from(session, url, partial, 0, params, chunk_size)
+        resp.raise_for_status()
+
+        if resp.status == HTTP_PARTIAL_CONTENT:
+            if content_range is None or content_range.get("start") != offset:
+                return await _download_from(session, url, partial, 0, params, chunk_size)
+            mode = "ab"
+            total: Optional[int] = content_range["total"]
+        else:
+            mode = "wb"
+            total = resp.content_length
+        if resp.headers.get("Content-Encoding", "identity") != "identity":
+            total = None
+
+        # Unbuffered, so each chunk is handed directly to the OS without another copy.
+        with open(partial, mode, buffering=0) as output:
+            async for chunk in resp.content.iter_chunked(chunk_size):
+                output.write(chunk)
+    return total
+
+
+async def download_to_file(
+    session: ClientSession,
+    url: str,
+    path: Union[str, Path],
+    params: Optional[Dict[str, Any]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+) -> DownloadResult:
+    """
+    Download a URL to a file, resuming a previous partial download if there is one.
+
+    Chunks are written as they arrive, without splitting or decoding lines, to a partial file
+    next to the destination. It is renamed once the download is complete and its size has
+    been verified. If the partial file already exists, or the connection fails or the body is
+    cut short, only the rest of the file is requested with a Range request.
+
+    :param session: HTTP session to make requests with.
+    :param url: URL to download.
+    :param path: Path to write the file to.
+    :param params: Params to send to URL.
+    :param chunk_size: Maximum number of bytes to write at once.
+    :param max_attempts: Maximum number of requests to make.
+    :return: Result of the download.
+    """
+    path = Path(path)
+    partial = partial_path(path)
+    resumed_from = _file_size(partial)
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            total = await _download_from(
+                session, url, partial, _file_size(partial), params, chunk_size
+            )
+        except (ClientPayloadError, ClientConnectionError, asyncio.TimeoutError):
+            if attempt >= max_attempts:
+                raise
+            continue
+        size = _file_size(partial)
+        if total is None or size >= total or attempt >= max_attempts:
+            break
+
+    if total is not None and size != total:
+        raise IncompleteDownloadError(f"Downloaded {size} bytes of {url}, expected {total}")
+    os.replace(partial, path)
+    return DownloadResult(path, size, resumed_from)
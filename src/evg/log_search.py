@@ -0,0 +1,435 @@
+"""Search task logs for patterns without decoding every line."""
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Deque,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from evg.concurrency import merge_iterables
+from evg.models.evg_task import EvgTask
+
+if TYPE_CHECKING:
+    from evg.api import AioEvergreenApi  # noqa: F401
+
+DEFAULT_MAX_CONCURRENCY = 4
+
+Pattern = Union[str, bytes]
+
+
+@dataclass
+class LogMatch:
+    """
+    A line of a log that matched a search.
+
+    line_number: Line number of the matching line, starting at 1.
+    line: Contents of the matching line, without the line ending.
+    pattern: Pattern that matched the line.
+    before: Lines preceding the matching line.
+    after: Lines following the matching line.
+    log_url: URL of the log the line is from.
+    task_id: Id of the task the log belongs to.
+    log_type: Type of log the line is from, such as "task_log".
+    """
+
+    line_number: int
+    line: bytes
+    pattern: bytes
+    before: List[bytes] = field(default_factory=list)
+    after: List[bytes] = field(default_factory=list)
+    log_url: Optional[str] = None
+    task_id: Optional[str] = None
+    log_type: Optional[str] = None
+
+    def text(self, encoding: str = "utf-8") -> str:
+        """
+        Get the matching line as a string.
+
+        :param encoding: Encoding of the log.
+        :return: Decoded line, with invalid bytes replaced.
+        """
+        return self.line.decode(encoding, errors="replace")
+
+
+@dataclass
+class LogQuery:
+    """
+    Specification of what to search logs for.
+
+    patterns: Regular expressions to search for, a line matches if any of them match.
+    before_context: Number of lines before each match to include.
+    after_context: Number of lines after each match to include.
+    max_matches: Stop searching a log after this many matches, None to search the whole log.
+    ignore_case: Whether to match patterns case insensitively.
+    """
+
+    patterns: Sequence[Pattern]
+    before_context: int = 0
+    after_context: int = 0
+    max_matches: Optional[int] = None
+    ignore_case: bool = False
+
+    def scanner(self) -> "LogScanner":
+        """Create a scanner to run this query over a log."""
+        return LogScanner(
+            self.patterns,
+            self.before_context,
+            self.after_context,
+            self.max_matches,
+            self.ignore_case,
+        )
+
+
+class LogScanner:
+    """
+    Incrementally search a log for lines matching any of a set of patterns.
+
+    Chunks of the log are passed to `feed` in order, and `finish` is called once the whole log
+    has been fed. All patterns are compiled into one regular expression, in multi-line mode so
+    `^` and `$` match at line boundaries, and run over the raw bytes of each chunk. Lines are
+    only split out around matches and the requested context.
+    """
+
+    def __init__(
+        self,
+        patterns: Sequence[Pattern],
+        before_context: int = 0,
+        after_context: int = 0,
+        max_matches: Optional[int] = None,
+        ignore_case: bool = False,
+    ) -> None:
+        """
+        Initialize the scanner.
+
+        :param patterns: Regular expressions to search for.
+        :param before_context: Number of lines before each match to include.
+        :param after_context: Number of lines after each match to include.
+        :param max_matches: Stop searching after this many matches, None for no limit.
+        :param ignore_case: Whether to match patterns case insensitively.
+        """
+        if not patterns:
+            raise ValueError("At least one pattern is required")
+        if before_context < 0 or after_context < 0:
+            raise ValueError("Context must not be negative")
+
+        self.patterns = [p.encode("utf-8") if isinstance(p, str) else p for p in patterns]
+        self.after_context = after_context
+        self.max_matches = max_matches
+        flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+        # Capturing groups would stop the regex engine from skipping ahead to possible match
+        # positions, so the combined regex has none and the pattern that matched is found by
+        # trying each one at the match position afterwards.
+        self._regex = re.compile(b"|".join(b"(?:%s)" % p for p in self.patterns), flags)
+        self._compiled = [re.compile(p, flags) for p in self.patterns]
+
+        self.n_matches = 0
+        self._line_number = 0
+        self._tail = b""
+        self._before: Deque[bytes] = deque(maxlen=before_context)
+        self._pending: List[LogMatch] = []
+
+    @property
+    def limit_reached(self) -> bool:
+        """Whether the maximum number of matches has been found."""
+        return self.max_matches is not None and self.n_matches >= self.max_matches
+
+    @property
+    def done(self) -> bool:
+        """Whether feeding more of the log can not produce any more matches."""
+        return self.limit_reached and not self._pending
+
+    def feed(self, chunk: bytes) -> List[LogMatch]:
+        """
+        Search the next chunk of the log.
+
+        :param chunk: Next chunk of the log.
+        :return: Matches that are complete, including their context.
+        """
+        data = self._tail + chunk if self._tail else chunk
+        end = data.rfind(b"\n") + 1
+        if end == 0:
+            self._tail = data
+            return []
+        self._tail = data[end:]
+        return self._scan(data, end)
+
+    def finish(self) -> List[LogMatch]:
+        """
+        Search the end of the log.
+
+        :return: Remaining matches, which may have less context after them than requested.
+        """
+        completed = []
+        if self._tail:
+            data = self._tail + b"\n"
+            self._tail = b""
+            completed = self._scan(data, len(data))
+        completed.extend(self._pending)
+        self._pending = []
+        return completed
+
+    def _scan(self, data: bytes, end: int) -> List[LogMatch]:
+        """
+        Search complete lines of data.
+
+        :param data: Data to search.
+        :param end: Position just after the last line ending in the data to search.
+        :return: Matches that are complete, including their context.
+        """
+        completed: List[LogMatch] = []
+        position = 0
+        if not self.limit_reached:
+            for match in self._regex.finditer(data, 0, end):
+                start = match.start()
+                if start < position:
+                    # This line has already matched.
+                    continue
+                line_start = data.rfind(b"\n", 0, start) + 1
+                line_end = data.find(b"\n", start)
+                self._consume(data, position, line_start, completed)
+
+                line = data[line_start:line_end]
+                self._add_after_context(line, completed)
+                self._line_number += 1
+                log_match = LogMatch(
+                    line_number=self._line_number,
+                    line=line,
+                    pattern=self._matched_pattern(data, start, end),
+                    before=list(self._before),
+                )
+                self._before.append(line)
+                if self.after_context:
+                    self._pending.append(log_match)
+                else:
+                    completed.append(log_match)
+                self.n_matches += 1
+                position = line_end + 1
+                if self.limit_reached:
+                    break
+        self._consume(data, position, end, completed)
+        return completed
+
+    def _matched_pattern(self, data: bytes, start: int, end: int) -> bytes:
+        """
+        Get the first pattern that matches at a position, as the combined regex would choose.
+
+        :param data: Data being searched.
+        :param start: Position of the match.
+        :param end: Position the search ends at.
+        :return: Pattern that matched.
+        """
+        for pattern, regex in zip(self.patterns, self._compiled):
+            if regex.match(data, start, end):
+                return pattern
+        return self.patterns[0]
+
+    def _consume(self, data: bytes, start: int, stop: int, completed: List[LogMatch]) -> None:
+        """
+        Account for lines that did not match.
+
+        Only the lines needed as context are copied out of the data.
+
+        :param data: Data the lines are in.
+        :param start: Position of the start of the first line.
+        :param stop: Position just after the line ending of the last line.
+        :param completed: List to add matches to once their context is complete.
+        """
+        n_lines = data.count(b"\n", start, stop)
+        if n_lines == 0:
+            return
+
+        if self._pending:
+            needed = self.after_context - len(self._pending[-1].after)
+            line_start = start
+            for _ in range(min(needed, n_lines)):
+                line_end = data.index(b"\n", line_start)
+                self._add_after_context(data[line_start:line_end], completed)
+                line_start = line_end + 1
+
+        if self._before.maxlen and not self.done:
+            lines = []
+            line_end = stop - 1
+            for _ in range(min(self._before.maxlen, n_lines)):
+                line_start = data.rfind(b"\n", start, line_end) + 1 or start
+                lines.append(data[line_start:line_end])
+                line_end = line_start - 1
+            self._before.extend(reversed(lines))
+
+        self._line_number += n_lines
+
+    def _add_after_context(self, line: bytes, completed: List[LogMatch]) -> None:
+        """
+        Add a line to the context of matches waiting for lines after them.
+
+        :param line: Line to add.
+        :param completed: List to add matches to once their context is complete.
+        """
+        if not self._pending:
+            return
+        for log_match in self._pending:
+            log_match.after.append(line)
+        while self._pending and len(self._pending[0].after) >= self.after_context:
+            completed.append(self._pending.pop(0))
+
+
+async def search_log(
+    api: "AioEvergreenApi",
+    log_url: str,
+    query: LogQuery,
+    task_id: Optional[str] = None,
+    log_type: Optional[str] = None,
+) -> AsyncIterator[LogMatch]:
+    """
+    Search a log for lines matching a query.
+
+    Downloading of the log stops once the maximum number of matches has been found.
+
+    :param api: API client to download the log with.
+    :param log_url: URL of the log to search.
+    :param query: What to search for.
+    :param task_id: Id of the task the log belongs to, added to each match.
+    :param log_type: Type of the log, added to each match.
+    :return: Iterator over matching lines, in the order they appear in the log.
+    """
+    scanner = query.scanner()
+    chunks = api.stream_log_chunks(log_url)
+    try:
+        async for chunk in chunks:
+            for log_match in scanner.feed(chunk):
+                log_match.log_url, log_match.task_id, log_match.log_type = (
+                    log_url,
+                    task_id,
+                    log_type,
+                )
+                yield log_match
+            if scanner.done:
+                break
+    finally:
+        await chunks.aclose()
+    for log_match in scanner.finish():
+        log_match.log_url, log_match.task_id, log_match.log_type = log_url, task_id, log_type
+        yield log_match
+
+
+def _search_many(
+    api: "AioEvergreenApi",
+    sources: Iterable[Tuple[str, Optional[str], Optional[str]]],
+    query: LogQuery,
+    max_concurrency: int,
+    ordered: bool,
+) -> AsyncIterator[LogMatch]:
+    """
+    Search several logs concurrently.
+
+    :param api: API client to download logs with.
+    :param sources: URL, task id and log type of each log to search.
+    :param query: What to search for.
+    :param max_concurrency: Maximum number of logs to search at once.
+    :param ordered: If True, yield all matches of each log in the order the logs were given,
+        otherwise yield matches as soon as they are found.
+    :return: Iterator over matching lines.
+    """
+    searches = [
+        search_log(api, log_url, query, task_id, log_type) for log_url, task_id, log_type in sources
+    ]
+    return merge_iterables(searches, max_concurrency, ordered)
+
+
+def _task_log_sources(
+    task: EvgTask, log_types: Optional[Iterable[str]]
+) -> List[Tuple[str, Optional[str], Optional[str]]]:
+    """
+    Get the logs of a task to search.
+
+    :param task: Task to get logs of.
+    :param log_types: Types of logs to include, None to include all logs.
+    :return: URL, task id and log type of each log.
+    """
+    wanted = set(log_types) if log_types is not None else None
+    return [
+        (log_url, task.task_id, log_type)
+        for log_type, log_url in task.logs.items()
+        if log_url and (wanted is None or log_type in wanted)
+    ]
+
+
+def search_logs(
+    api: "AioEvergreenApi",
+    log_urls: Iterable[str],
+    query: LogQuery,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ordered: bool = False,
+) -> AsyncIterator[LogMatch]:
+    """
+    Search several logs concurrently.
+
+    :param api: API client to download logs with.
+    :param log_urls: URLs of the logs to search.
+    :param query: What to search for.
+    :param max_concurrency: Maximum number of logs to search at once.
+    :param ordered: If True, yield all matches of each log in the order the logs were given,
+        otherwise yield matches as soon as they are found.
+    :return: Iterator over matching lines.
+    """
+    return _search_many(
+        api, [(url, None, None) for url in log_urls], query, max_concurrency, ordered
+    )
+
+
+def search_task_logs(
+    api: "AioEvergreenApi",
+    task: EvgTask,
+    query: LogQuery,
+    log_types: Optional[Iterable[str]] = None,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ordered: bool = False,
+) -> AsyncIterator[LogMatch]:
+    """
+    Search the logs of a task concurrently.
+
+    :param api: API client to download logs with.
+    :param task: Task to search the logs of.
+    :param query: What to search for.
+    :param log_types: Types of logs to search, such as "task_log", None to search all logs.
+        Note that "all_log" contains the contents of the other logs.
+    :param max_concurrency: Maximum number of logs to search at once.
+    :param ordered: If True, yield all matches of each log in turn, otherwise yield matches
+        as soon as they are found.
+    :return: Iterator over matching lines.
+    """
+    return _search_many(api, _task_log_sources(task, log_types), query, max_concurrency, ordered)
+
+
+async def search_build_logs(
+    api: "AioEvergreenApi",
+    build_id: str,
+    query: LogQuery,
+    log_types: Optional[Iterable[str]] = ("task_log",),
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ordered: bool = False,
+) -> AsyncIterator[LogMatch]:
+    """
+    Search the logs of all tasks in a build concurrently.
+
+    :param api: API client to query with.
+    :param build_id: Id of build to search the task logs of.
+    :param query: What to search for.
+    :param log_types: Types of logs to search, None to search all logs.
+    :param max_concurrency: Maximum number of logs to search at once.
+    :param ordered: If True, yield all matches of each log in task order, otherwise yield
+        matches as soon as they are found.
+    :return: Iterator over matching lines.
+    """
+    sources = []
+    async for task in await api.tasks_by_build(build_id, fields=["task_id", "logs"]):
+        sources.extend(_task_log_sources(task, log_types))
+    async for log_match in _search_many(api, sources, query, max_concurrency, ordered):
+        yield log_match
@@ -0,0 +1,204 @@
+"""Detection of event loop stalls and the work that caused them."""
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+DEFAULT_THRESHOLD_SEC = 0.1
+DEFAULT_INTERVAL_SEC = 0.02
+DEFAULT_MAX_STALLS = 100
+
+current_operation: ContextVar[Optional[str]] = ContextVar("evg_current_operation", default=None)
+
+_WorkKey = Tuple[str, str, Optional[str]]
+
+
+class _MonitorState(threading.local):
+    """Work recorded on the event loop of the current thread since the monitor last woke up."""
+
+    def __init__(self) -> None:
+        """Initialize the state with no monitor running."""
+        self.n_monitors = 0
+        self.work: Dict[_WorkKey, float] = {}
+
+
+_state = _MonitorState()
+
+
+@contextmanager
+def operation(name: str) -> Iterator[None]:
+    """
+    Label the work done in a block, so stalls caused by it can be identified.
+
+    :param name: Name of the operation.
+    """
+    token = current_operation.set(name)
+    try:
+        yield
+    finally:
+        current_operation.reset(token)
+
+
+def is_monitoring() -> bool:
+    """Determine if a stall monitor is running on this thread's event loop."""
+    return _state.n_monitors > 0
+
+
+def record_work(call: str, model: str, seconds: float) -> None:
+    """
+    Record time spent on CPU bound work on the event loop.
+
+    Callers should check `is_monitoring` first, to avoid timing work nobody is monitoring.
+
+    :param call: API call the work was done for.
+    :param model: Type of model built, or the kind of work done.
+    :param seconds: Time spent.
+    """
+    key = (call, model, current_operation.get())
+    work = _state.work
+    work[key] = work.get(key, 0.0) + seconds
+
+
+class StallCulprit(NamedTuple):
+    """
+    Work that ran during a stall.
+
+    call: API call the work was done for.
+    model: Type of model built, or the kind of work done.
+    operation: Operation the work was done in, as labelled by `operation`.
+    seconds: Time spent on the work during the stall.
+    """
+
+    call: str
+    model: str
+    operation: Optional[str]
+    seconds: float
+
+
+@dataclass
+class Stall:
+    """
+    A period in which the event loop did not run other tasks.
+
+    seconds: How late the monitor woke up.
+    at: Time the stall was detected, in seconds since the epoch.
+    culprits: Recorded work that ran during the stall, most time consuming first. Time not
+        accounted for by any culprit was spent on unrecorded work.
+    """
+
+    seconds: float
+    at: float
+    culprits: List[StallCulprit] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        """Describe the stall."""
+        if not self.culprits:
+            return f"Event loop stalled for {self.seconds * 1000:.0f}ms"
+        culprit = self.culprits[0]
+        operation_name = f" in {culprit.operation}" if culprit.operation else ""
+        return (
+            f"Event loop stalled for {self.seconds * 1000:.0f}ms, "
+            f"{culprit.seconds * 1000:.0f}ms of it on {culprit.model} for "
+            f"{culprit.call}{operation_name}"
+        )
+
+
+class StallMonitor:
+    """
+    Detect when the event loop is blocked for longer than a threshold.
+
+    The monitor wakes up regularly on the loop and reports a `Stall` whenever it wakes up late.
+    While it runs, API clients record the time spent decoding responses and building models,
+    and work labelled with `operation` is recorded too, so each stall names the work that ran
+    during it. Only one monitor should run on each event loop.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD_SEC,
+        interval: float = DEFAULT_INTERVAL_SEC,
+        on_stall: Optional[Callable[[Stall], Any]] = None,
+        max_stalls: int = DEFAULT_MAX_STALLS,
+    ) -> None:
+        """
+        Initialize the monitor.
+
+        :param threshold: Report the loop as stalled once it is this many seconds late.
+        :param interval: Seconds between checks of the loop.
+        :param on_stall: Function to call with each stall detected.
+        :param max_stalls: Number of recent stalls to keep in `stalls`.
+        """
+        self.threshold = threshold
+        self.interval = interval
+        self.on_stall = on_stall
+        self.stalls: Deque[Stall] = deque(maxlen=max_stalls)
+        self.n_stalls = 0
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    def start(self) -> None:
+        """Start monitoring the running event loop."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop monitoring."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def __aenter__(self) -> "StallMonitor":
+        """Start monitoring for the duration of a block."""
+        self.start()
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        """Stop monitoring."""
+        await self.stop()
+
+    def _take_work(self) -> Dict[_WorkKey, float]:
+        """Get the work recorded since the last check and start recording afresh."""
+        work = _state.work
+        _state.work = {}
+        return work
+
+    async def _run(self) -> None:
+        """Check the loop every interval until cancelled."""
+        loop = asyncio.get_running_loop()
+        _state.n_monitors += 1
+        try:
+            self._take_work()
+            while True:
+                expected = loop.time() + self.interval
+                await asyncio.sleep(self.interval)
+                lag = loop.time() - expected
+                work = self._take_work()
+                if lag >= self.threshold:
+                    self._report(lag, work)
+        finally:
+            _state.n_monitors -= 1
+
+    def _report(self, lag: float, work: Dict[_WorkKey, float]) -> None:
+        """
+        Record a stall.
+
+        :param lag: How late the monitor woke up.
+        :param work: Work recorded during the stall.
+        """
+        culprits = [
+            StallCulprit(call, model, operation_name, seconds)
+            for (call, model, operation_name), seconds in work.items()
+        ]
+        culprits.sort(key=lambda culprit: -culprit.seconds)
+        stall = Stall(lag, time.time(), culprits)
+        self.stalls.append(stall)
+        self.n_stalls += 1
+        if self.on_stall is not None:
+            self.on_stall(stall)
@@ -0,0 +1,179 @@
+"""In-process caching of API results."""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+from evg.models.evg_task import EvgTask
+from evg.response_cache import CacheStats
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_ACTIVE_TASK_TTL_SEC = 30.0
+DEFAULT_FINISHED_TASK_TTL_SEC = 60.0 * 60.0
+
+
+class AsyncLruCache(Generic[K, V]):
+    """
+    A bounded, in-memory LRU cache of the results of async loaders.
+
+    Concurrent lookups of a key that is not cached share a single call to the loader. The
+    loader runs in its own task, so cancelling one of the waiting callers does not cancel
+    the load for the others.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_fn: Optional[Callable[[V], Optional[float]]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Initialize the cache.
+
+        :param max_entries: Maximum number of entries to keep.
+        :param ttl_fn: Function to determine how many seconds a value should be cached for,
+            None means until evicted. If not given, values are cached until evicted.
+        :param clock: Function returning the current time in seconds.
+        """
+        self.max_entries = max_entries
+        self.ttl_fn = ttl_fn
+        self.clock = clock
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[K, Tuple[V, Optional[float]]]" = OrderedDict()
+        self._in_flight: Dict[K, "asyncio.Future[V]"] = {}
+
+    def __len__(self) -> int:
+        """Get the number of cached entries."""
+        return len(self._entries)
+
+    @property
+    def n_in_flight(self) -> int:
+        """Get the number of loads currently in progress."""
+        return len(self._in_flight)
+
+    def get(self, key: K) -> Optional[V]:
+        """
+        Get a cached value without loading it.
+
+        :param key: Key to look up.
+        :return: Cached value if a fresh one exists.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= self.clock():
+            del self._entries[key]
+            self.stats.evictions += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: K, value: V) -> None:
+        """
+        Add a value to the cache.
+
+        :param key: Key to store value under.
+        :param value: Value to store.
+        """
+        ttl = self.ttl_fn(value) if self.ttl_fn is not None else None
+        if ttl is not None and ttl <= 0:
+            return
+        expires_at = self.clock() + ttl if ttl is not None else None
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        self.stats.stores += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def invalidate(self, key: K) -> None:
+        """
+        Remove a key from the cache.
+
+        :param key: Key to remove.
+        """
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        self._entries.clear()
+
+    async def _load(self, key: K, loader: Callable[[], Awaitable[V]]) -> V:
+        """
+        Load a value and add it to the cache.
+
+        :param key: Key to store value under.
+        :param loader: Function to load the value.
+        :return: Loaded value.
+        """
+        try:
+            value = await loader()
+            self.put(key, value)
+            return value
+        finally:
+            del self._in_flight[key]
+
+    async def get_or_load(self, key: K, loader: Callable[[], Awaitable[V]]) -> V:
+        """
+        Get a cached value, loading it if it is not cached.
+
+        :param key: Key to look up.
+        :param loader: Function to load the value if it is not cached.
+        :return: Cached or loaded value.
+        """
+        value = self.get(key)
+        if value is not None:
+            self.stats.hits += 1
+            return value
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.stats.coalesced += 1
+        else:
+            self.stats.misses += 1
+            in_flight = asyncio.create_task(self._load(key, loader))
+            self._in_flight[key] = in_flight
+        return await asyncio.shield(in_flight)
+
+
+class TaskCache(AsyncLruCache[str, EvgTask]):
+    """
+    A cache of tasks by task id.
+
+    Tasks that may still change are cached for a short time, finished tasks are cached for
+    longer. Cached tasks are shared between callers and should not be modified.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        active_ttl: float = DEFAULT_ACTIVE_TASK_TTL_SEC,
+        finished_ttl: Optional[float] = DEFAULT_FINISHED_TASK_TTL_SEC,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Initialize the cache.
+
+        :param max_entries: Maximum number of tasks to keep.
+        :param active_ttl: Seconds to cache tasks that are active or have not finished.
+        :param finished_ttl: Seconds to cache finished tasks, None means until evicted.
+        :param clock: Function returning the current time in seconds.
+        """
+        super().__init__(max_entries, self._task_ttl, clock)
+        self.active_ttl = active_ttl
+        self.finished_ttl = finished_ttl
+
+    def _task_ttl(self, task: EvgTask) -> Optional[float]:
+        """
+        Determine how long to cache the given task.
+
+        :param task: Task to cache.
+        :return: Number of seconds to cache the task.
+        """
+        if task.is_active() or task.finish_time is None:
+            return self.active_ttl
+        return self.finished_ttl
@@ -0,0 +1,621 @@
+"""Local mirror of versions, tasks and patches with an offline query API."""
+import asyncio
+import json
+import sqlite3
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+
+from pydantic import BaseModel
+from pydantic.json import pydantic_encoder
+
+from evg.models.evg_patch import COMPLETED_STATES as PATCH_COMPLETED_STATES
+from evg.models.evg_patch import EvgPatch
+from evg.models.evg_task import EvgTask
+from evg.models.evg_version import COMPLETED_STATES, EvgVersion, Requester
+from evg.models.parsing import M, ModelParser
+from evg.version_sync import VersionCheckpoint, VersionSync
+
+if TYPE_CHECKING:
+    from evg.api import AioEvergreenApi  # noqa: F401
+
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_BATCH_SIZE = 10
+DEFAULT_SYNC_INTERVAL_SEC = 300.0
+
+# A filter value is either a single value to match or a collection of values to match any of.
+FilterValue = Union[None, str, int, Iterable[Union[str, int]]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS versions (
+    version_id TEXT PRIMARY KEY,
+    project TEXT,
+    requester TEXT,
+    "order" INTEGER,
+    revision TEXT,
+    status TEXT,
+    create_time TEXT,
+    tasks_synced INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS versions_project_order ON versions (project, requester, "order");
+CREATE INDEX IF NOT EXISTS versions_revision ON versions (revision);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    execution INTEGER,
+    project_id TEXT,
+    version_id TEXT,
+    build_id TEXT,
+    build_variant TEXT,
+    display_name TEXT,
+    status TEXT,
+    revision TEXT,
+    "order" INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_project_order ON tasks (project_id, "order");
+CREATE INDEX IF NOT EXISTS tasks_version ON tasks (version_id);
+CREATE INDEX IF NOT EXISTS tasks_variant_status ON tasks (build_variant, status);
+CREATE INDEX IF NOT EXISTS tasks_display_name ON tasks (display_name, build_variant);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status);
+CREATE INDEX IF NOT EXISTS tasks_revision ON tasks (revision);
+
+CREATE TABLE IF NOT EXISTS patches (
+    patch_id TEXT PRIMARY KEY,
+    project_id TEXT,
+    author TEXT,
+    status TEXT,
+    patch_number INTEGER,
+    create_time TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS patches_project_number ON patches (project_id, patch_number);
+CREATE INDEX IF NOT EXISTS patches_author ON patches (author);
+CREATE INDEX IF NOT EXISTS patches_status ON patches (status);
+"""
+
+_VERSION_COLUMNS = (
+    "version_id",
+    "project",
+    "requester",
+    "order",
+    "revision",
+    "status",
+    "create_time",
+)
+_TASK_COLUMNS = (
+    "task_id",
+    "execution",
+    "project_id",
+    "version_id",
+    "build_id",
+    "build_variant",
+    "display_name",
+    "status",
+    "revision",
+    "order",
+)
+_PATCH_COLUMNS = ("patch_id", "project_id", "author", "status", "patch_number", "create_time")
+
+
+def _column_values(model: BaseModel, columns: Sequence[str]) -> List[Any]:
+    """
+    Get the values of a model to store in indexed columns.
+
+    Models built with only some fields are allowed, missing fields are stored as NULL.
+
+    :param model: Model to get values of.
+    :param columns: Names of the fields to get.
+    :return: Value of each field, in the given order.
+    """
+    values = []
+    for column in columns:
+        value = model.__dict__.get(column)
+        if isinstance(value, Enum):
+            value = value.value
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        elif value is not None and not isinstance(value, (str, int, float)):
+            value = str(value)
+        values.append(value)
+    return values
+
+
+def _to_json(model: BaseModel) -> str:
+    """
+    Encode a model as JSON.
+
+    Encodes the field values directly rather than using `model.json()`, which copies every
+    nested model to a dictionary first and takes two to three times as long.
+
+    :param model: Model to encode.
+    :return: JSON of the model's fields.
+    """
+    return json.dumps(model.__dict__, default=pydantic_encoder)
+
+
+def _add_filter(clauses: List[str], args: List[Any], column: str, value: FilterValue) -> None:
+    """
+    Add a condition on a column to a query, if a value to filter on was given.
+
+    :param clauses: Conditions of the query to add to.
+    :param args: Arguments of the query to add to.
+    :param column: Column to filter on.
+    :param value: Value to match, a collection of values to match any of, or None to not filter.
+    """
+    if value is None:
+        return
+    if isinstance(value, (str, int)):
+        clauses.append(f'"{column}" = ?')
+        args.append(value)
+        return
+    values = list(value)
+    clauses.append(f'"{column}" IN ({", ".join("?" * len(values))})')
+    args.extend(values)
+
+
+def _where(clauses: List[str]) -> str:
+    """
+    Combine the conditions of a query.
+
+    :param clauses: Conditions of the query.
+    :return: WHERE clause matching all conditions, empty if there are none.
+    """
+    return f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+
+class EvgMirror:
+    """
+    A local copy of versions, tasks and patches stored in a SQLite database.
+
+    Each record is stored as JSON alongside indexed columns used for filtering, and queries
+    return the same model classes as the API. Database access is synchronous, the mirror is
+    meant to live on local disk.
+    """
+
+    def __init__(self, path: Union[str, Path], validate_models: bool = True) -> None:
+        """
+        Initialize the mirror, creating the database if needed.
+
+        :param path: Path to the mirror database, ":memory:" for an in-memory mirror.
+        :param validate_models: Validate stored records when building models. Skipping
+            validation is faster but leaves dates as strings and nested models as
+            dictionaries.
+        """
+        self.path = path
+        self.validate_models = validate_models
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the mirror database."""
+        self._db.close()
+
+    # Ingestion
+
+    def add_versions(self, versions: Iterable[EvgVersion]) -> int:
+        """
+        Add or update versions.
+
+        :param versions: Versions to store.
+        :return: Number of versions stored.
+        """
+        rows = [
+            _column_values(version, _VERSION_COLUMNS) + [_to_json(version)] for version in versions
+        ]
+        with self._db:
+            self._db.executemany(
+                """
+                INSERT INTO versions
+                    (version_id, project, requester, "order", revision, status, create_time, data)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (version_id) DO UPDATE SET
+                    project = excluded.project,
+                    requester = excluded.requester,
+                    "order" = excluded."order",
+                    revision = excluded.revision,
+                    status = excluded.status,
+                    create_time = excluded.create_time,
+                    data = excluded.data
+                """,
+                rows,
+            )
+        return len(rows)
+
+    def add_tasks(self, tasks: Iterable[EvgTask]) -> int:
+        """
+        Add or update tasks.
+
+        :param tasks: Tasks to store.
+        :return: Number of tasks stored.
+        """
+        rows = [_column_values(task, _TASK_COLUMNS) + [_to_json(task)] for task in tasks]
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+        return len(rows)
+
+    def add_patches(self, patches: Iterable[EvgPatch]) -> int:
+        """
+        Add or update patches.
+
+        :param patches: Patches to store.
+        :return: Number of patches stored.
+        """
+        rows = [_column_values(patch, _PATCH_COLUMNS) + [_to_json(patch)] for patch in patches]
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO patches VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+        return len(rows)
+
+    def mark_tasks_synced(self, version_ids: Iterable[str]) -> None:
+        """
+        Record that all tasks of the given versions have been stored.
+
+        :param version_ids: IDs of the versions.
+        """
+        with self._db:
+            self._db.executemany(
+                "UPDATE versions SET tasks_synced = 1 WHERE version_id = ?",
+                [(version_id,) for version_id in version_ids],
+            )
+
+    # Queries
+
+    def _query(self, model: Type[M], sql: str, args: Sequence[Any]) -> List[M]:
+        """
+        Build models from the stored records selected by a query.
+
+        :param model: Type of model to build.
+        :param sql: Query selecting the data column of records.
+        :param args: Arguments of the query.
+        :return: Models built from the selected records.
+        """
+        parser = ModelParser(model, self.validate_models)
+        return [parser(json.loads(data)) for (data,) in self._db.execute(sql, args)]
+
+    def version(self, version_id: str) -> Optional[EvgVersion]:
+        """
+        Get a version by its ID.
+
+        :param version_id: ID of the version.
+        :return: The version, None if it is not in the mirror.
+        """
+        versions = self._query(
+            EvgVersion, "SELECT data FROM versions WHERE version_id = ?", [version_id]
+        )
+        return versions[0] if versions else None
+
+    def task(self, task_id: str) -> Optional[EvgTask]:
+        """
+        Get a task by its ID.
+
+        :param task_id: ID of the task.
+        :return: The task, None if it is not in the mirror.
+        """
+        tasks = self._query(EvgTask, "SELECT data FROM tasks WHERE task_id = ?", [task_id])
+        return tasks[0] if tasks else None
+
+    def versions(
+        self,
+        project_id: Optional[str] = None,
+        requester: Optional[Requester] = Requester.GITTER_REQUEST,
+        status: FilterValue = None,
+        revision: FilterValue = None,
+        min_order: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> List[EvgVersion]:
+        """
+        Get stored versions, newest first.
+
+        :param project_id: Only get versions of this project.
+        :param requester: Only get versions created by this requester, None for all.
+        :param status: Only get versions with this status, or any of these statuses.
+        :param revision: Only get versions of this revision, or any of these revisions.
+        :param min_order: Only get versions with at least this order.
+        :param limit: Maximum number of versions to get.
+        :return: Matching versions.
+        """
+        clauses: List[str] = []
+        args: List[Any] = []
+        _add_filter(clauses, args, "project", project_id)
+        _add_filter(clauses, args, "requester", requester.value if requester else None)
+        _add_filter(clauses, args, "status", status)
+        _add_filter(clauses, args, "revision", revision)
+        if min_order is not None:
+            clauses.append('"order" >= ?')
+            args.append(min_order)
+        sql = f'SELECT data FROM versions{_where(clauses)} ORDER BY "order" DESC'
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(limit)
+        return self._query(EvgVersion, sql, args)
+
+    def tasks(
+        self,
+        project_id: Optional[str] = None,
+        version_id: FilterValue = None,
+        build_variant: FilterValue = None,
+        display_name: FilterValue = None,
+        status: FilterValue = None,
+        revision: FilterValue = None,
+        min_order: Optional[int] = None,
+        last_versions: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> List[EvgTask]:
+        """
+        Get stored tasks, newest first.
+
+        :param project_id: Only get tasks of this project.
+        :param version_id: Only get tasks of this version, or any of these versions.
+        :param build_variant: Only get tasks of this build variant, or any of these variants.
+        :param display_name: Only get tasks with this name, or any of these names.
+        :param status: Only get tasks with this status, or any of these statuses.
+        :param revision: Only get tasks of this revision, or any of these revisions.
+        :param min_order: Only get tasks with at least this order.
+        :param last_versions: Only get tasks of this many of the newest mainline versions of
+            the project. Requires `project_id`.
+        :param limit: Maximum number of tasks to get.
+        :return: Matching tasks.
+        """
+        clauses: List[str] = []
+        args: List[Any] = []
+        _add_filter(clauses, args, "project_id", project_id)
+        _add_filter(clauses, args, "version_id", version_id)
+        _add_filter(clauses, args, "build_variant", build_variant)
+        _add_filter(clauses, args, "display_name", display_name)
+        _add_filter(clauses, args, "status", status)
+        _add_filter(clauses, args, "revision", revision)
+        if min_order is not None:
+            clauses.append('"order" >= ?')
+            args.append(min_order)
+        if last_versions is not None:
+            if project_id is None:
+                raise ValueError("last_versions requires a project_id")
+            clauses.append(
+                """version_id IN (
+                    SELECT version_id FROM versions WHERE project = ? AND requester = ?
+                    ORDER BY "order" DESC LIMIT ?
+                )"""
+            )
+            args.extend([project_id, Requester.GITTER_REQUEST.value, last_versions])
+        sql = f'SELECT data FROM tasks{_where(clauses)} ORDER BY "order" DESC, task_id'
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(limit)
+        return self._query(EvgTask, sql, args)
+
+    def patches(
+        self,
+        project_id: Optional[str] = None,
+        author: FilterValue = None,
+        status: FilterValue = None,
+        limit: Optional[int] = None,
+    ) -> List[EvgPatch]:
+        """
+        Get stored patches, newest first.
+
+        :param project_id: Only get patches of this project.
+        :param author: Only get patches by this author, or any of these authors.
+        :param status: Only get patches with this status, or any of these statuses.
+        :param limit: Maximum number of patches to get.
+        :return: Matching patches.
+        """
+        clauses: List[str] = []
+        args: List[Any] = []
+        _add_filter(clauses, args, "project_id", project_id)
+        _add_filter(clauses, args, "author", author)
+        _add_filter(clauses, args, "status", status)
+        sql = f"SELECT data FROM patches{_where(clauses)} ORDER BY create_time DESC, patch_id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(limit)
+        return self._query(EvgPatch, sql, args)
+
+    def versions_missing_tasks(self, project_id: str) -> List[EvgVersion]:
+        """
+        Get the completed versions of a project whose tasks have not been stored yet.
+
+        :param project_id: ID of the project.
+        :return: Versions whose tasks need to be fetched, newest first.
+        """
+        return self._query(
+            EvgVersion,
+            """
+            SELECT data FROM versions
+            WHERE project = ? AND tasks_synced = 0 AND status IN (?, ?)
+            ORDER BY "order" DESC
+            """,
+            [project_id, *sorted(COMPLETED_STATES)],
+        )
+
+    def patch_status(self, patch_id: str) -> Optional[str]:
+        """
+        Get the stored status of a patch.
+
+        :param patch_id: ID of the patch.
+        :return: Status of the patch, None if it is not in the mirror.
+        """
+        row = self._db.execute(
+            "SELECT status FROM patches WHERE patch_id = ?", (patch_id,)
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def oldest_unfinished_patch(self, project_id: str) -> Optional[int]:
+        """
+        Get the number of the oldest stored patch of a project that had not finished.
+
+        :param project_id: ID of the project.
+        :return: Patch number, None if every stored patch has finished.
+        """
+        placeholders = ", ".join("?" * len(PATCH_COMPLETED_STATES))
+        row = self._db.execute(
+            f"""
+            SELECT MIN(patch_number) FROM patches
+            WHERE project_id = ? AND (status IS NULL OR status NOT IN ({placeholders}))
+            """,
+            [project_id, *sorted(PATCH_COMPLETED_STATES)],
+        ).fetchone()
+        return row[0]
+
+    def counts(self) -> Dict[str, int]:
+        """Get the number of stored versions, tasks and patches."""
+        return {
+            table: self._db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("versions", "tasks", "patches")
+        }
+
+
+class SyncSummary(NamedTuple):
+    """
+    What a sync added to a mirror.
+
+    n_versions: Number of new or changed versions stored.
+    n_tasks: Number of tasks stored.
+    """
+
+    n_versions: int
+    n_tasks: int
+
+
+class MirrorSync:
+    """
+    Keep a mirror up to date with the API.
+
+    Each sync only fetches the versions created or changed since the last one, using a
+    `VersionSync`, and the tasks of each version once it has completed.
+    """
+
+    def __init__(
+        self,
+        api: "AioEvergreenApi",
+        mirror: EvgMirror,
+        checkpoint: Optional[VersionCheckpoint] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        initial_limit: Optional[int] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> None:
+        """
+        Initialize the sync.
+
+        :param api: API client to query with.
+        :param mirror: Mirror to store records in.
+        :param checkpoint: Where to store version sync progress. Defaults to a file next to the
+            mirror database, or an in-memory checkpoint for an in-memory mirror.
+        :param max_concurrency: Maximum number of requests to make at once.
+        :param initial_limit: Maximum number of versions to fetch the first time a project is
+            synced, None to fetch its whole history.
+        :param batch_size: Number of versions to fetch tasks for before storing them.
+        """
+        if checkpoint is None:
+            path = str(mirror.path)
+            checkpoint = VersionCheckpoint(None if path == ":memory:" else f"{path}.sync.json")
+        self.api = api
+        self.mirror = mirror
+        self.version_sync = VersionSync(api, checkpoint, max_concurrency, initial_limit)
+        self.max_concurrency = max_concurrency
+        self.batch_size = batch_size
+
+    async def sync_project(
+        self, project_id: str, requester: Requester = Requester.GITTER_REQUEST
+    ) -> SyncSummary:
+        """
+        Store the new and changed versions of a project and the tasks of completed versions.
+
+        Versions whose tasks have been stored are marked in the mirror, so tasks missed by an
+        interrupted sync are fetched by the next one.
+
+        :param project_id: ID of the project.
+        :param requester: Requester of the versions to sync.
+        :return: What was added to the mirror.
+        """
+        n_versions = 0
+        async for update in self.version_sync.poll(project_id, requester):
+            n_versions += self.mirror.add_versions([update.version])
+
+        n_tasks = 0
+        versions = self.mirror.versions_missing_tasks(project_id)
+        for start in range(0, len(versions), self.batch_size):
+            batch = versions[start : start + self.batch_size]
+            tasks = [
+                task
+                async for task in await self.api.tasks_for_versions(batch, self.max_concurrency)
+            ]
+            n_tasks += self.mirror.add_tasks(tasks)
+            self.mirror.mark_tasks_synced(version.version_id for version in batch)
+        return SyncSummary(n_versions, n_tasks)
+
+    async def sync_patches(self, project_id: str, limit: Optional[int] = None) -> int:
+        """
+        Store the patches of a project, newest first, until reaching one already stored.
+
+        Paging continues past stored patches until the oldest stored patch that had not
+        finished has been fetched again, so its status is brought up to date.
+
+        :param project_id: ID of the project.
+        :param limit: Maximum number of patches to fetch, None for no limit.
+        :return: Number of patches stored.
+        """
+        patches: List[EvgPatch] = []
+        oldest_unfinished = self.mirror.oldest_unfinished_patch(project_id)
+        iterable = await self.api.patches_by_project(project_id)
+        try:
+            async for patch in iterable:
+                if limit is not None and len(patches) >= limit:
+                    break
+                if self._is_stored_and_final(patch):
+                    if oldest_unfinished is None or patch.patch_number < oldest_unfinished:
+                        break
+                    continue
+                patches.append(patch)
+        finally:
+            aclose = getattr(iterable, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        return self.mirror.add_patches(patches)
+
+    def _is_stored_and_final(self, patch: EvgPatch) -> bool:
+        """
+        Determine if a patch is already stored in a state that will not change.
+
+        :param patch: Patch to check.
+        :return: True if the patch is stored and has finished.
+        """
+        return patch.is_completed() and self.mirror.patch_status(patch.patch_id) == patch.status
+
+    async def run(
+        self,
+        project_ids: Iterable[str],
+        interval: float = DEFAULT_SYNC_INTERVAL_SEC,
+        patches: bool = False,
+    ) -> None:
+        """
+        Sync projects continuously until cancelled.
+
+        :param project_ids: IDs of the projects to sync.
+        :param interval: Seconds to wait between syncs.
+        :param patches: Whether to sync patches as well as versions and tasks.
+        """
+        projects: Tuple[str, ...] = tuple(project_ids)
+        while True:
+            for project_id in projects:
+                await self.sync_project(project_id)
+                if patches:
+                    await self.sync_patches(project_id)
+            await asyncio.sleep(interval)
@@ -5,6 +5,19 @@ from typing import Any, Dict, List, Optional, Set
 from pydantic import PrivateAttr
 from pydantic.main import BaseModel
 
+EVG_PATCH_STATUS_CREATED = "created"
+EVG_PATCH_STATUS_STARTED = "started"
+EVG_PATCH_STATUS_SUCCESS = "success"
+EVG_PATCH_STATUS_SUCCEEDED = "succeeded"
+EVG_PATCH_STATUS_FAILED = "failed"
+
+# Older patches report "succeeded" rather than "success".
+COMPLETED_STATES = {
+    EVG_PATCH_STATUS_SUCCESS,
+    EVG_PATCH_STATUS_SUCCEEDED,
+    EVG_PATCH_STATUS_FAILED,
+}
+
 
 class GithubPatchData(BaseModel):
     """Representation of github patch data in a patch object."""
@@ -56,8 +69,28 @@ class EvgPatch(BaseModel):
         :param json: json representing patch.
         """
         super().__init__(**json)
+        self._index_variants_tasks()
 
-        self._variant_task_dict = {vt.name: vt.tasks for vt in self.variants_tasks}
+    @classmethod
+    def construct(cls, _fields_set: Optional[Set[str]] = None, **values: Any) -> "EvgPatch":
+        """
+        Create an instance of an evergreen patch without validation.
+
+        :param _fields_set: Names of fields that were explicitly set.
+        :param values: Values of the patch's fields.
+        :return: Patch with the given values.
+        """
+        patch = super().construct(_fields_set, **values)
+        patch._index_variants_tasks()
+        return patch
+
+    def _index_variants_tasks(self) -> None:
+        """Build the map of variants to the tasks they run."""
+        self._variant_task_dict = {}
+        for vt in getattr(self, "variants_tasks", None) or []:
+            if isinstance(vt, dict):
+                vt = VariantsTasks.construct(name=vt["name"], tasks=set(vt["tasks"]))
+            self._variant_task_dict[vt.name] = vt.tasks
 
     def task_list_for_variant(self, variant: str) -> Set[str]:
         """
@@ -68,6 +101,14 @@ class EvgPatch(BaseModel):
         """
         return self._variant_task_dict[variant]
 
+    def is_completed(self) -> bool:
+        """
+        Determine if this patch has finished running.
+
+        :return: True if patch has completed.
+        """
+        return self.status in COMPLETED_STATES
+
     def __str__(self) -> str:
         """Get a human readable string version of the patch."""
         return f"{self.patch_id}: {self.description}"
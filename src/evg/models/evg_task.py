@@ -3,11 +3,34 @@ from datetime import datetime, timedelta
 from enum import IntEnum
 from typing import Dict, List, Optional, Union
 
-from pydantic import BaseModel, Extra
+from pydantic import BaseModel, Extra, PrivateAttr
 
 EVG_SUCCESS_STATUS = "success"
+EVG_FAILED_STATUS = "failed"
+EVG_SETUP_FAILED_STATUS = "setup-failed"
 EVG_SYSTEM_FAILURE_STATUS = "system"
+EVG_SYSTEM_FAILED_STATUS = "system-failed"
+EVG_SYSTEM_TIMED_OUT_STATUS = "system-timed-out"
+EVG_SYSTEM_UNRESPONSIVE_STATUS = "system-unresponsive"
+EVG_TASK_TIMED_OUT_STATUS = "task-timed-out"
 EVG_UNDISPATCHED_STATUS = "undispatched"
+EVG_INACTIVE_STATUS = "inactive"
+
+COMPLETED_STATES = {
+    EVG_SUCCESS_STATUS,
+    EVG_FAILED_STATUS,
+    EVG_SETUP_FAILED_STATUS,
+    EVG_SYSTEM_FAILURE_STATUS,
+    EVG_SYSTEM_FAILED_STATUS,
+    EVG_SYSTEM_TIMED_OUT_STATUS,
+    EVG_SYSTEM_UNRESPONSIVE_STATUS,
+    EVG_TASK_TIMED_OUT_STATUS,
+}
+# Tasks in these states will not run unless they are activated.
+NOT_SCHEDULED_STATES = {
+    EVG_UNDISPATCHED_STATUS,
+    EVG_INACTIVE_STATUS,
+}
 
 _EVG_DATE_FIELDS_IN_TASK = frozenset(
     ["create_time", "dispatch_time", "finish_time", "ingest_time", "scheduled_time", "start_time"]
@@ -107,6 +130,8 @@ class EvgTask(BaseModel):
     time_taken_ms: int
     version_id: str
 
+    _previous_executions: Optional[Dict[int, "EvgTask"]] = PrivateAttr(default=None)
+
     def get_status_score(self) -> StatusScore:
         """
         Retrieve the status score enum for the given task.
@@ -115,6 +140,24 @@ class EvgTask(BaseModel):
         """
         return StatusScore.get_task_status_score(self)
 
+    def _get_previous_executions(self) -> Dict[int, "EvgTask"]:
+        """
+        Get the previous executions of this task, keyed by execution.
+
+        The previous executions are only returned by the server when requested, and are parsed
+        on first use.
+
+        :return: Previous executions of this task.
+        """
+        if self._previous_executions is None:
+            previous_executions = {}
+            for task in self.__dict__.get("previous_executions") or []:
+                if not isinstance(task, EvgTask):
+                    task = EvgTask(**task)
+                previous_executions[task.execution] = task
+            self._previous_executions = previous_executions
+        return self._previous_executions
+
     def get_execution(self, execution: int) -> Optional["EvgTask"]:
         """
         Get the task info for the specified execution.
@@ -124,13 +167,18 @@ class EvgTask(BaseModel):
         """
         if self.execution == execution:
             return self
+        return self._get_previous_executions().get(execution)
 
-        raw_task = self.dict()
-        for task in raw_task.get("previous_executions", []):
-            if task.get("execution") == execution:
-                return EvgTask(**task)
+    def get_executions(self) -> List["EvgTask"]:
+        """
+        Get all known executions of this task.
 
-        return None
+        :return: Task info for each execution, oldest first.
+        """
+        previous_executions = self._get_previous_executions()
+        executions = [previous_executions[execution] for execution in sorted(previous_executions)]
+        executions.append(self)
+        return executions
 
     def get_execution_or_self(self, execution: int) -> "EvgTask":
         """
@@ -204,6 +252,18 @@ class EvgTask(BaseModel):
             return self.status_details.timed_out
         return False
 
+    def is_completed(self) -> bool:
+        """
+        Determine if this task has finished running.
+
+        Tasks that were deactivated before they ran are treated as finished.
+
+        :return: True if task has completed.
+        """
+        if self.status in COMPLETED_STATES:
+            return True
+        return self.status in NOT_SCHEDULED_STATES and not getattr(self, "activated", True)
+
     def is_active(self) -> bool:
         """
         Determine if the given task is active.
@@ -1,7 +1,7 @@
 """Version representation of evergreen."""
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Set
 
 from pydantic import BaseModel, PrivateAttr
 
@@ -89,13 +89,44 @@ class EvgVersion(BaseModel):
         :param json: json representing version
         """
         super().__init__(**json)
+        self._index_build_variants()
 
+    @classmethod
+    def construct(cls, _fields_set: Optional[Set[str]] = None, **values: Any) -> "EvgVersion":
+        """
+        Create an instance of an evergreen version without validation.
+
+        :param _fields_set: Names of fields that were explicitly set.
+        :param values: Values of the version's fields.
+        :return: Version with the given values.
+        """
+        version = super().construct(_fields_set, **values)
+        version._index_build_variants()
+        return version
+
+    def _index_build_variants(self) -> None:
+        """Build the map of build variants to build ids."""
         self._build_variants_map = {}
 
-        if self.build_variants_status:
-            self._build_variants_map = {
-                bvs.build_variant: bvs.build_id for bvs in self.build_variants_status
-            }
+        build_variants_status = getattr(self, "build_variants_status", None)
+        if build_variants_status:
+            for bvs in build_variants_status:
+                if isinstance(bvs, dict):
+                    bvs = BuildVariantStatus.construct(**bvs)
+                self._build_variants_map[bvs.build_variant] = bvs.build_id
+
+    def get_build_ids(self, build_variants: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Get the IDs of the builds in this version.
+
+        :param build_variants: Only get builds of these build variants, None to get all builds.
+        :return: IDs of the builds.
+        """
+        if build_variants is None:
+            return list(self._build_variants_map.values())
+        return [
+            self._build_variants_map[bv] for bv in build_variants if bv in self._build_variants_map
+        ]
 
     def is_patch(self) -> bool:
         """
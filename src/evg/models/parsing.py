@@ -0,0 +1,102 @@
+"""Build models from API responses with control over how much validation is done."""
+from typing import Any, Dict, FrozenSet, Generic, Iterable, Optional, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+M = TypeVar("M", bound=BaseModel)
+
+
+class ModelParser(Generic[M]):
+    """
+    Build models of a given type from decoded JSON.
+
+    By default models are built with full validation. Validation can be limited to a subset of
+    fields, in which case the model only has the requested fields (and any fields with default
+    values) set. Validation can also be skipped entirely, in which case values are stored
+    exactly as they were decoded: dates stay as strings and nested models stay as
+    dictionaries. Parsers hold no state besides their settings, so they can be pickled.
+    """
+
+    def __init__(
+        self, model: Type[M], validate: bool = True, fields: Optional[Iterable[str]] = None
+    ) -> None:
+        """
+        Initialize the parser.
+
+        :param model: Type of model to build.
+        :param validate: Whether to validate the values used to build models.
+        :param fields: Only build models with these fields, None to include all fields.
+        """
+        self.model = model
+        self.validate = validate
+        self.fields: Optional[FrozenSet[str]] = frozenset(fields) if fields is not None else None
+        if self.fields is not None:
+            unknown = self.fields - set(model.__fields__)
+            if unknown:
+                raise ValueError(f"Unknown fields for {model.__name__}: {sorted(unknown)}")
+
+    def __repr__(self) -> str:
+        """Get a string representation of the parser for debugging purposes."""
+        return f"ModelParser({self.model.__name__}, validate={self.validate}, fields={self.fields})"
+
+    def _project(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Get the values of the requested fields from the given data.
+
+        :param data: Decoded JSON data.
+        :return: Values of the requested fields keyed by field name.
+        """
+        assert self.fields is not None
+        values = {}
+        for name in self.fields:
+            field = self.model.__fields__[name]
+            if field.alias in data:
+                values[name] = data[field.alias]
+        return values
+
+    def _validate_fields(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Validate the requested fields of the given data.
+
+        :param data: Decoded JSON data.
+        :return: Validated values of the requested fields keyed by field name.
+        """
+        assert self.fields is not None
+        values: Dict[str, Any] = {}
+        errors = []
+        for name in self.fields:
+            field = self.model.__fields__[name]
+            if field.alias not in data:
+                if field.required:
+                    data = {**data, field.alias: None}
+                else:
+                    values[name] = field.get_default()
+                    continue
+            value, error = field.validate(
+                data[field.alias], values, loc=field.alias, cls=self.model
+            )
+            if error:
+                errors.append(error)
+            else:
+                values[name] = value
+        if errors:
+            raise ValidationError(errors, self.model)
+        return values
+
+    def __call__(self, data: Dict[str, Any]) -> M:
+        """
+        Build a model from the given data.
+
+        :param data: Decoded JSON data.
+        :return: Model built from the data.
+        """
+        if self.fields is None:
+            if self.validate:
+                return self.model(**data)
+            return self.model.construct(**data)
+
+        if self.validate:
+            values = self._validate_fields(data)
+        else:
+            values = self._project(data)
+        return self.model.construct(set(values), **values)
@@ -0,0 +1,316 @@
+"""Read-ahead buffering for paginated API responses."""
+import asyncio
+import json
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Generic,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+from urllib.parse import urlsplit
+
+from evg.loop_monitor import is_monitoring, record_work
+
+P = TypeVar("P")
+T = TypeVar("T")
+
+PageFetcher = Callable[[str], AsyncIterator[Tuple[Sequence[Any], Optional[str]]]]
+
+
+@dataclass
+class PrefetchConfig:
+    """
+    Configuration for reading ahead while iterating over paginated responses.
+
+    max_pages: Maximum number of pages to fetch ahead of the consumer.
+    max_items: Stop fetching ahead once this many items are buffered.
+    max_bytes: Stop fetching ahead once this many response bytes are buffered.
+    """
+
+    max_pages: int = 1
+    max_items: Optional[int] = None
+    max_bytes: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        """Validate the prefetch configuration."""
+        if self.max_pages < 1:
+            raise ValueError("max_pages must be at least 1")
+
+
+@dataclass
+class CooperativeConfig:
+    """
+    Configuration for giving other tasks a chance to run while iterating over a response.
+
+    Without it, a consumer that does not await anything between items handles a whole page in
+    one step of the event loop. With it, the iterator yields to the event loop once either
+    limit is reached.
+
+    max_items: Yield to the event loop after this many items, None for no item limit.
+    max_seconds: Yield to the event loop once this much time has passed since it last did,
+        None for no time limit.
+    """
+
+    max_items: Optional[int] = 100
+    max_seconds: Optional[float] = 0.005
+
+    def __post_init__(self) -> None:
+        """Validate the configuration."""
+        if self.max_items is None and self.max_seconds is None:
+            raise ValueError("At least one of max_items and max_seconds must be set")
+
+
+class PageBuffer(Generic[P]):
+    """
+    A bounded buffer of pages shared between a page fetcher and a consumer.
+
+    The fetcher waits for room in the buffer before fetching another page, so a slow consumer
+    applies backpressure to the fetcher. A single page is always allowed into an empty buffer,
+    even if it is larger than the item or byte limits, so iteration can always make progress.
+    """
+
+    def __init__(self, config: PrefetchConfig) -> None:
+        """
+        Initialize the buffer.
+
+        :param config: Limits on how much data to buffer.
+        """
+        self.config = config
+        self._pages: Deque[Tuple[P, int, int]] = deque()
+        self._n_items = 0
+        self._n_bytes = 0
+        self._done = False
+        self._error: Optional[BaseException] = None
+        self._condition = asyncio.Condition()
+
+    @property
+    def n_pages(self) -> int:
+        """Get the number of pages currently buffered."""
+        return len(self._pages)
+
+    @property
+    def n_items(self) -> int:
+        """Get the number of items currently buffered."""
+        return self._n_items
+
+    @property
+    def n_bytes(self) -> int:
+        """Get the number of bytes currently buffered."""
+        return self._n_bytes
+
+    def _has_room(self) -> bool:
+        """Determine if there is room to fetch another page."""
+        if not self._pages:
+            return True
+        if len(self._pages) >= self.config.max_pages:
+            return False
+        if self.config.max_items is not None and self._n_items >= self.config.max_items:
+            return False
+        if self.config.max_bytes is not None and self._n_bytes >= self.config.max_bytes:
+            return False
+        return True
+
+    async def wait_for_room(self) -> None:
+        """Wait until there is room in the buffer for another page."""
+        async with self._condition:
+            await self._condition.wait_for(self._has_room)
+
+    async def put(self, page: P, n_items: int, n_bytes: int) -> None:
+        """
+        Add a page to the buffer.
+
+        This does not wait for room, callers should call `wait_for_room` before fetching a page.
+
+        :param page: Page to add.
+        :param n_items: Number of items in the page.
+        :param n_bytes: Size of the page in bytes.
+        """
+        async with self._condition:
+            self._pages.append((page, n_items, n_bytes))
+            self._n_items += n_items
+            self._n_bytes += n_bytes
+            self._condition.notify_all()
+
+    async def close(self, error: Optional[BaseException] = None) -> None:
+        """
+        Mark that no more pages will be added to the buffer.
+
+        :param error: Error to raise to the consumer once the buffered pages are consumed.
+        """
+        async with self._condition:
+            self._done = True
+            self._error = error
+            self._condition.notify_all()
+
+    async def get(self) -> Optional[P]:
+        """
+        Get the next page from the buffer, waiting for it to be fetched if needed.
+
+        :return: Next page or None if all pages have been consumed.
+        """
+        async with self._condition:
+            await self._condition.wait_for(lambda: bool(self._pages) or self._done)
+            if self._pages:
+                page, n_items, n_bytes = self._pages.popleft()
+                self._n_items -= n_items
+                self._n_bytes -= n_bytes
+                self._condition.notify_all()
+                return page
+
+            if self._error is not None:
+                raise self._error
+            return None
+
+
+class PageCursor(NamedTuple):
+    """
+    Position in a paginated response.
+
+    url: URL of the page containing the next item.
+    offset: Index of the next item in that page.
+    """
+
+    url: str
+    offset: int = 0
+
+    def to_token(self) -> str:
+        """Convert the cursor to a string that can be saved and restored with `from_token`."""
+        return json.dumps({"url": self.url, "offset": self.offset})
+
+    @classmethod
+    def from_token(cls, token: str) -> "PageCursor":
+        """
+        Restore a cursor saved with `to_token`.
+
+        :param token: Saved cursor.
+        :return: The restored cursor.
+        """
+        data = json.loads(token)
+        return cls(data["url"], data["offset"])
+
+
+class PaginatedIterator(Generic[T]):
+    """
+    An async iterator over the items of a paginated response that tracks its position.
+
+    `cursor` is the position of the next item to be returned, so a job that saves it can later
+    continue where it stopped by calling `resume_from` on a new iterator over the same request.
+
+        tasks = await api.tasks_by_build(build_id)
+        tasks.resume_from(PageCursor.from_token(saved))
+        async for task in tasks:
+            ...
+            saved = tasks.cursor.to_token()
+    """
+
+    def __init__(
+        self,
+        url: str,
+        fetch_pages: PageFetcher,
+        transform_fn: Callable[[Any], T],
+        cooperative: Optional[CooperativeConfig] = None,
+        name: Optional[str] = None,
+        model: str = "item",
+    ) -> None:
+        """
+        Initialize the iterator, no pages are fetched until iteration starts.
+
+        :param url: URL of the first page.
+        :param fetch_pages: Function iterating over the items and next link of each page,
+            starting from the page at the given URL.
+        :param transform_fn: Function to convert each item before it is returned.
+        :param cooperative: When to yield to the event loop, None to only do so when waiting
+            for a page.
+        :param name: Name of the request, used to report the time spent converting items to
+            a stall monitor. Defaults to the URL.
+        :param model: What the items are converted to, used to report the time spent
+            converting items to a stall monitor.
+        """
+        self.url = url
+        self.cooperative = cooperative
+        self.name = name if name is not None else url
+        self.model = model
+        self._fetch_pages = fetch_pages
+        self._transform_fn = transform_fn
+        self._page_url: Optional[str] = url
+        self._offset = 0
+        self._items: Optional[AsyncGenerator[T, None]] = None
+
+    @property
+    def cursor(self) -> Optional[PageCursor]:
+        """Get the position of the next item, None once all items have been returned."""
+        if self._page_url is None:
+            return None
+        return PageCursor(self._page_url, self._offset)
+
+    def resume_from(self, cursor: PageCursor) -> None:
+        """
+        Start iterating from a saved position instead of the first item.
+
+        :param cursor: Position to start from, saved from an iterator over the same request.
+        """
+        if self._items is not None:
+            raise RuntimeError("Cannot resume an iterator that has already started")
+        if urlsplit(cursor.url).path != urlsplit(self.url).path:
+            raise ValueError(f"Cursor for {cursor.url} does not belong to {self.url}")
+        self._page_url, self._offset = cursor
+
+    def __aiter__(self) -> "PaginatedIterator[T]":
+        """Get the iterator."""
+        return self
+
+    async def __anext__(self) -> T:
+        """Get the next item."""
+        if self._items is None:
+            self._items = self._iterate()
+        return await self._items.__anext__()
+
+    async def aclose(self) -> None:
+        """Stop iterating, cancelling any page requests in progress."""
+        if self._items is not None:
+            await self._items.aclose()
+
+    async def _iterate(self) -> AsyncGenerator[T, None]:
+        """Iterate over the items from the current position, keeping the position updated."""
+        if self._page_url is None:
+            return
+        cooperative = self.cooperative
+        n_since_yield = 0
+        last_yield = time.perf_counter()
+        skip = self._offset
+        async for items, next_link in self._fetch_pages(self._page_url):
+            for index in range(skip, len(items)):
+                if is_monitoring():
+                    start = time.perf_counter()
+                    item = self._transform_fn(items[index])
+                    record_work(self.name, self.model, time.perf_counter() - start)
+                else:
+                    item = self._transform_fn(items[index])
+                self._offset = index + 1
+                yield item
+                if cooperative is not None:
+                    n_since_yield += 1
+                    if (
+                        cooperative.max_items is not None and n_since_yield >= cooperative.max_items
+                    ) or (
+                        cooperative.max_seconds is not None
+                        and time.perf_counter() - last_yield >= cooperative.max_seconds
+                    ):
+                        await asyncio.sleep(0)
+                        n_since_yield = 0
+                        last_yield = time.perf_counter()
+            skip = 0
+            self._page_url, self._offset = next_link, 0
+            if next_link is None:
+                break
+        self._page_url = None
@@ -0,0 +1,138 @@
+"""Decoding and building models from response pages in worker processes."""
+import asyncio
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, AsyncIterator, Callable, Deque, List, Optional, Tuple, TypeVar
+
+from evg.json_decoder import JsonDecoder, get_default_json_decoder
+
+T = TypeVar("T")
+
+DEFAULT_MIN_OFFLOAD_BYTES = 64 * 1024
+
+_worker_decoder: Optional[JsonDecoder] = None
+
+
+def parse_page(
+    body: bytes, parse_fn: Callable[[Any], T], decoder: Optional[JsonDecoder] = None
+) -> List[T]:
+    """
+    Decode a page of JSON and convert each item on it.
+
+    This runs in worker processes, so `parse_fn`, `decoder` and the results must be
+    picklable, as a `ModelParser`, the models it builds and module level functions are.
+
+    :param body: JSON encoded list of items.
+    :param parse_fn: Function to convert each decoded item.
+    :param decoder: Function to decode the page, None for the default decoder.
+    :return: Converted items.
+    """
+    global _worker_decoder
+    if decoder is None:
+        if _worker_decoder is None:
+            _worker_decoder = get_default_json_decoder()
+        decoder = _worker_decoder
+    return [parse_fn(item) for item in decoder(body)]
+
+
+class ParsePool:
+    """
+    A pool of worker processes to decode pages and build models in.
+
+    Pages are parsed in parallel with each other and with the network requests, and results
+    are returned in page order. Pages smaller than `min_offload_bytes` are parsed on the event
+    loop, since sending their results between processes costs more than the parsing saved.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        min_offload_bytes: int = DEFAULT_MIN_OFFLOAD_BYTES,
+        max_pending: Optional[int] = None,
+        executor: Optional[Executor] = None,
+    ) -> None:
+        """
+        Initialize the pool, worker processes are started when first needed.
+
+        :param max_workers: Number of worker processes, defaults to the number of CPUs.
+        :param min_offload_bytes: Pages smaller than this are parsed on the event loop.
+        :param max_pending: Maximum number of pages of one iteration being parsed at once,
+            defaults to the number of workers.
+        :param executor: Executor to use instead of creating a process pool. It is not shut
+            down by `close`.
+        """
+        self.max_workers = max_workers if max_workers is not None else os.cpu_count() or 1
+        self.min_offload_bytes = min_offload_bytes
+        self.max_pending = max_pending if max_pending is not None else self.max_workers
+        self._executor = executor
+        self._owns_executor = executor is None
+
+    def _get_executor(self) -> Executor:
+        """Get the executor to parse pages in, starting the process pool if needed."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.max_workers)
+        return self._executor
+
+    def close(self) -> None:
+        """Shut down the worker processes, if this pool started them."""
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> "ParsePool":
+        """Use the pool as a context manager, closing it on exit."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Close the pool."""
+        self.close()
+
+    def _submit(
+        self, body: bytes, parse_fn: Callable[[Any], T], decoder: JsonDecoder
+    ) -> "asyncio.Future[List[T]]":
+        """
+        Start parsing a page.
+
+        :param body: Body of the page.
+        :param parse_fn: Function to convert each decoded item.
+        :param decoder: Function to decode the page.
+        :return: Future resolving to the converted items.
+        """
+        loop = asyncio.get_running_loop()
+        if len(body) >= self.min_offload_bytes:
+            return loop.run_in_executor(self._get_executor(), parse_page, body, parse_fn, decoder)
+        future: "asyncio.Future[List[T]]" = loop.create_future()
+        try:
+            future.set_result([parse_fn(item) for item in decoder(body)])
+        except Exception as err:
+            future.set_exception(err)
+        return future
+
+    async def parse_pages(
+        self,
+        pages: AsyncIterator[Tuple[bytes, Optional[str]]],
+        parse_fn: Callable[[Any], T],
+        decoder: JsonDecoder,
+    ) -> AsyncIterator[Tuple[List[T], Optional[str]]]:
+        """
+        Parse pages in the pool, keeping up to `max_pending` pages in progress.
+
+        :param pages: Iterator over the body and link to the next page of each page.
+        :param parse_fn: Function to convert each decoded item, it must be picklable.
+        :param decoder: Function to decode each page, it must be picklable.
+        :return: Iterator over the converted items and next link of each page, in page order.
+        """
+        pending: Deque[Tuple["asyncio.Future[List[T]]", Optional[str]]] = deque()
+        try:
+            async for body, next_link in pages:
+                pending.append((self._submit(body, parse_fn, decoder), next_link))
+                while pending and (len(pending) >= self.max_pending or pending[0][0].done()):
+                    future, link = pending.popleft()
+                    yield await future, link
+            while pending:
+                future, link = pending.popleft()
+                yield await future, link
+        finally:
+            for future, _ in pending:
+                future.cancel()
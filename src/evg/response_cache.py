@@ -0,0 +1,281 @@
+"""Persistent cache of API responses for resources that do not change."""
+import json
+import re
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, NamedTuple, Optional, Union
+
+from evg.api_requests import EVG_DATE_FORMAT
+
+DEFAULT_MAX_SIZE_BYTES = 512 * 1024 * 1024
+DEFAULT_SHORT_TTL_SEC = 60.0
+COMPLETED_STATUSES = frozenset(["success", "failed"])
+
+# Listings that are sorted newest first, their first pages change as new items are created.
+_GROWING_LISTING_RE = re.compile(r"/rest/v2/(projects|(projects|users)/[^/]+/(versions|patches))$")
+_MANIFEST_RE = re.compile(r"/rest/v2/tasks/[^/]+/manifest$")
+_STATS_RE = re.compile(r"/rest/v2/projects/[^/]+/(test|task)_stats$")
+
+TtlPolicy = Callable[[str, Optional[Dict[str, Any]], Any], Optional[float]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    next_link TEXT,
+    expires_at REAL,
+    last_access REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+"""
+
+
+@dataclass
+class CacheStats:
+    """
+    Counters describing how a cache has been used.
+
+    hits: Number of lookups that found a cached entry.
+    misses: Number of lookups that did not find a usable entry.
+    stores: Number of entries added to the cache.
+    evictions: Number of entries removed because they expired or to stay under the size limit.
+    coalesced: Number of lookups that waited on a load already in progress for the same key.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    coalesced: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Get the fraction of lookups that did not need a new request."""
+        lookups = self.hits + self.misses + self.coalesced
+        if lookups == 0:
+            return 0.0
+        return (self.hits + self.coalesced) / lookups
+
+
+class CachedResponse(NamedTuple):
+    """
+    A response read from the cache.
+
+    body: Body of the response.
+    next_link: Link to next batch of data.
+    """
+
+    body: bytes
+    next_link: Optional[str]
+
+
+def _is_completed_record(record: Any) -> bool:
+    """
+    Determine if the given record describes something that has finished running.
+
+    :param record: Decoded JSON record.
+    :return: True if the record has a finish time or a completed status.
+    """
+    if not isinstance(record, dict):
+        return False
+    return bool(record.get("finish_time")) or record.get("status") in COMPLETED_STATUSES
+
+
+def _stats_are_final(params: Optional[Dict[str, Any]]) -> bool:
+    """
+    Determine if a stats query only covers days in the past.
+
+    :param params: Params sent with the stats query.
+    :return: True if the query has an end date before today.
+    """
+    if not params or "before_date" not in params:
+        return False
+    before_date = datetime.strptime(params["before_date"], EVG_DATE_FORMAT).date()
+    return before_date < datetime.utcnow().date()
+
+
+def default_ttl_policy(
+    url: str, params: Optional[Dict[str, Any]], json_data: Any, short_ttl: float
+) -> Optional[float]:
+    """
+    Determine how long a response should be cached for.
+
+    * Manifests never change.
+    * Stats never change once the queried date range is in the past.
+    * Tasks, builds and versions never change once they have completed. A page of results
+      is treated the same way once everything on it has completed.
+    * Listings sorted newest first (projects, project versions and patches) and anything
+      still running are cached for `short_ttl` seconds.
+
+    :param url: URL the response was fetched from.
+    :param params: Params sent with the request.
+    :param json_data: Decoded body of the response.
+    :param short_ttl: Number of seconds to cache responses that may change.
+    :return: Number of seconds to cache the response or None to cache it indefinitely.
+    """
+    path = url.split("?", 1)[0]
+    if _MANIFEST_RE.search(path):
+        return None
+    if _STATS_RE.search(path):
+        return None if _stats_are_final(params) else short_ttl
+    if _GROWING_LISTING_RE.search(path):
+        return short_ttl
+
+    records = json_data if isinstance(json_data, list) else [json_data]
+    if records and all(_is_completed_record(record) for record in records):
+        return None
+    return short_ttl
+
+
+class ResponseCache:
+    """
+    A persistent cache of API responses stored in a local SQLite database.
+
+    Entries are keyed by URL and request params. Each entry is given a time-to-live based on
+    the resource it came from, and the least recently used entries are evicted once the
+    cache grows beyond its size limit. Database access is synchronous, the cache is meant to
+    live on local disk where lookups take far less time than a network request.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        max_size_bytes: int = DEFAULT_MAX_SIZE_BYTES,
+        short_ttl: float = DEFAULT_SHORT_TTL_SEC,
+        ttl_policy: Optional[TtlPolicy] = None,
+    ) -> None:
+        """
+        Initialize the cache, creating the database if needed.
+
+        :param path: Path to the cache database.
+        :param max_size_bytes: Maximum total size of cached response bodies.
+        :param short_ttl: Number of seconds to cache responses that may change.
+        :param ttl_policy: Function to determine how long to cache a response for, given the
+            url, params and decoded body. It should return the number of seconds to cache
+            the response, None to cache it indefinitely or 0 to not cache it.
+        """
+        self.path = path
+        self.max_size_bytes = max_size_bytes
+        self.short_ttl = short_ttl
+        self.ttl_policy = ttl_policy
+        self.stats = CacheStats()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._total_size = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+
+    @staticmethod
+    def cache_key(url: str, params: Optional[Dict[str, Any]]) -> str:
+        """
+        Get the key to cache a request under.
+
+        :param url: URL of the request.
+        :param params: Params sent with the request.
+        :return: Key for the request.
+        """
+        if not params:
+            return url
+        return f"{url} {json.dumps(params, sort_keys=True, default=str)}"
+
+    @property
+    def total_size(self) -> int:
+        """Get the total size of the cached response bodies."""
+        return self._total_size
+
+    def get(self, url: str, params: Optional[Dict[str, Any]]) -> Optional[CachedResponse]:
+        """
+        Look up a cached response.
+
+        :param url: URL of the request.
+        :param params: Params sent with the request.
+        :return: Cached response if a fresh one exists.
+        """
+        key = self.cache_key(url, params)
+        now = time.time()
+        row = self._db.execute(
+            "SELECT body, next_link, expires_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or (row[2] is not None and row[2] <= now):
+            self.stats.misses += 1
+            return None
+
+        with self._db:
+            self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        self.stats.hits += 1
+        return CachedResponse(row[0], row[1])
+
+    def put(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]],
+        body: bytes,
+        next_link: Optional[str],
+        json_data: Any,
+    ) -> None:
+        """
+        Add a response to the cache.
+
+        :param url: URL of the request.
+        :param params: Params sent with the request.
+        :param body: Body of the response.
+        :param next_link: Link to next batch of data.
+        :param json_data: Decoded body of the response, used to choose how long to cache it.
+        """
+        if self.ttl_policy is not None:
+            ttl = self.ttl_policy(url, params, json_data)
+        else:
+            ttl = default_ttl_policy(url, params, json_data, self.short_ttl)
+        if ttl is not None and ttl <= 0:
+            return
+        if len(body) > self.max_size_bytes:
+            return
+
+        key = self.cache_key(url, params)
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        with self._db:
+            old = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, body, next_link, expires_at, now, len(body)),
+            )
+        self._total_size += len(body) - (old[0] if old else 0)
+        self.stats.stores += 1
+        self._evict()
+
+    def _evict(self) -> None:
+        """Remove expired entries and then least recently used entries until under the limit."""
+        if self._total_size <= self.max_size_bytes:
+            return
+
+        with self._db:
+            expired = self._db.execute(
+                "DELETE FROM responses WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+            self._total_size = self._db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()[0]
+            cursor = self._db.execute("SELECT key, size FROM responses ORDER BY last_access")
+            to_delete = []
+            for key, size in cursor:
+                if self._total_size <= self.max_size_bytes:
+                    break
+                to_delete.append((key,))
+                self._total_size -= size
+            self._db.executemany("DELETE FROM responses WHERE key = ?", to_delete)
+        self.stats.evictions += expired + len(to_delete)
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        with self._db:
+            self._db.execute("DELETE FROM responses")
+        self._total_size = 0
+
+    def close(self) -> None:
+        """Close the cache database."""
+        self._db.close()
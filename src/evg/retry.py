@@ -0,0 +1,59 @@
+"""Retrying requests that fail with transient errors."""
+import asyncio
+from dataclasses import dataclass
+from typing import FrozenSet
+
+from aiohttp import ClientConnectionError, ClientPayloadError, ClientResponseError
+
+from evg.throttle import jittered_backoff, parse_retry_after
+
+DEFAULT_RETRY_STATUSES = frozenset([500, 502, 503, 504])
+TRANSIENT_ERRORS = (asyncio.TimeoutError, ClientConnectionError, ClientPayloadError)
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Configuration of retries for requests that fail with a transient error.
+
+    Timeouts, dropped connections, truncated bodies and the given HTTP statuses are treated as
+    transient. Other errors, such as a 404, are raised immediately.
+
+    max_retries: Number of times to retry a failed request, 0 to never retry.
+    base_backoff: Seconds to back off after the first failed attempt.
+    max_backoff: Maximum seconds to back off between attempts.
+    retry_statuses: HTTP statuses to retry requests on.
+    """
+
+    max_retries: int = 3
+    base_backoff: float = 0.5
+    max_backoff: float = 30.0
+    retry_statuses: FrozenSet[int] = DEFAULT_RETRY_STATUSES
+
+    def is_transient(self, error: BaseException) -> bool:
+        """
+        Determine if a request that failed with the given error should be retried.
+
+        :param error: Error the request failed with.
+        :return: True if the error is transient.
+        """
+        if isinstance(error, ClientResponseError):
+            return error.status in self.retry_statuses
+        return isinstance(error, TRANSIENT_ERRORS)
+
+    def backoff(self, attempt: int, error: BaseException) -> float:
+        """
+        Get the delay before retrying a failed request.
+
+        A Retry-After header on the failed response is respected, up to `max_backoff`.
+        Otherwise the delay is a randomized exponential backoff.
+
+        :param attempt: Number of attempts already made at the request, starting at 0.
+        :param error: Error the request failed with.
+        :return: Seconds to wait before the next attempt.
+        """
+        if isinstance(error, ClientResponseError) and error.headers:
+            retry_after = parse_retry_after(error.headers.get("Retry-After"))
+            if retry_after is not None:
+                return min(retry_after, self.max_backoff)
+        return jittered_backoff(attempt, self.base_backoff, self.max_backoff)
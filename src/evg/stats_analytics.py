@@ -0,0 +1,339 @@
+"""Vectorized failure rate and duration analytics over test and task stats."""
+import math
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from evg.api_requests import StatsSpecification
+from evg.stats_columns import (
+    DEFAULT_CHUNK_SIZE,
+    STRING_COLUMNS,
+    StatsChunk,
+    iter_stats_chunks,
+    require_numpy,
+)
+
+if TYPE_CHECKING:
+    import numpy as np  # noqa: F401
+
+    from evg.api import AioEvergreenApi  # noqa: F401
+
+DEFAULT_TEST_GROUP_BY = ("test_file", "task_name", "variant")
+DEFAULT_TASK_GROUP_BY = ("task_name", "variant")
+DEFAULT_PERCENTILES = (50.0, 90.0, 99.0)
+
+# Group codes are packed into one int64 per row while every combination fits.
+_MAX_PACKED_GROUPS = 2**63
+
+
+@dataclass
+class StatsSummary:
+    """
+    Summary of stats for each group of rows.
+
+    All arrays have one entry per group, except `duration_percentiles` which has one row per
+    group and one column per requested percentile.
+
+    group_by: Names of the columns rows were grouped by.
+    keys: Values of the group by columns for each group.
+    n_buckets: Number of stats rows (date buckets) in each group.
+    num_pass: Total number of passing executions.
+    num_fail: Total number of failing executions.
+    failure_rate: Fraction of executions that failed.
+    avg_duration_pass: Average duration of passing executions, weighted by number of passes.
+    percentiles: Percentiles that were computed.
+    duration_percentiles: Percentiles of the per-bucket average durations, over buckets with
+        passing executions.
+    failure_rate_trend: Change in failure rate per day, from a least squares fit over buckets
+        with executions.
+    duration_trend: Change in average duration per day, from a least squares fit over buckets
+        with passing executions.
+    """
+
+    group_by: Sequence[str]
+    keys: Dict[str, "np.ndarray"]
+    n_buckets: "np.ndarray"
+    num_pass: "np.ndarray"
+    num_fail: "np.ndarray"
+    failure_rate: "np.ndarray"
+    avg_duration_pass: "np.ndarray"
+    percentiles: Sequence[float]
+    duration_percentiles: "np.ndarray"
+    failure_rate_trend: "np.ndarray"
+    duration_trend: "np.ndarray"
+
+    def __len__(self) -> int:
+        """Get the number of groups."""
+        return len(self.n_buckets)
+
+    def to_dicts(self, indices: Optional[Iterable[int]] = None) -> List[Dict[str, Any]]:
+        """
+        Convert groups of the summary to dictionaries.
+
+        :param indices: Indices of groups to convert, None to convert all groups.
+        :return: A dictionary for each group.
+        """
+        indices = range(len(self)) if indices is None else indices
+        records = []
+        for i in indices:
+            record: Dict[str, Any] = {name: self.keys[name][i] for name in self.group_by}
+            record.update(
+                n_buckets=int(self.n_buckets[i]),
+                num_pass=int(self.num_pass[i]),
+                num_fail=int(self.num_fail[i]),
+                failure_rate=float(self.failure_rate[i]),
+                avg_duration_pass=float(self.avg_duration_pass[i]),
+                failure_rate_trend=float(self.failure_rate_trend[i]),
+                duration_trend=float(self.duration_trend[i]),
+            )
+            for j, percentile in enumerate(self.percentiles):
+                record[f"duration_p{percentile:g}"] = float(self.duration_percentiles[i, j])
+            records.append(record)
+        return records
+
+    def most_failing(self, n: int, min_runs: int = 1) -> List[Dict[str, Any]]:
+        """
+        Get the groups with the highest failure rate.
+
+        :param n: Number of groups to return.
+        :param min_runs: Ignore groups with fewer executions than this.
+        :return: Dictionaries of the groups, highest failure rate first.
+        """
+        np = require_numpy()
+        eligible = np.flatnonzero(self.num_pass + self.num_fail >= min_runs)
+        order = eligible[np.argsort(-self.failure_rate[eligible], kind="stable")]
+        return self.to_dicts(order[:n])
+
+    def slowest(self, n: int) -> List[Dict[str, Any]]:
+        """
+        Get the groups with the highest average passing duration.
+
+        :param n: Number of groups to return.
+        :return: Dictionaries of the groups, slowest first.
+        """
+        np = require_numpy()
+        order = np.argsort(-self.avg_duration_pass, kind="stable")
+        return self.to_dicts(order[:n])
+
+
+def _safe_divide(numerator: "np.ndarray", denominator: "np.ndarray") -> "np.ndarray":
+    """Divide arrays, giving 0 where the denominator is 0."""
+    np = require_numpy()
+    result = np.zeros(len(numerator), dtype=np.float64)
+    np.divide(numerator, denominator, out=result, where=denominator != 0)
+    return result
+
+
+def _trend(group: "np.ndarray", x: "np.ndarray", y: "np.ndarray", n_groups: int) -> "np.ndarray":
+    """
+    Get the least squares slope of y against x for each group.
+
+    :param group: Group index of each row.
+    :param x: Independent variable of each row.
+    :param y: Dependent variable of each row.
+    :param n_groups: Number of groups.
+    :return: Slope for each group, 0 for groups with fewer than two distinct x values.
+    """
+    np = require_numpy()
+    n = np.bincount(group, minlength=n_groups).astype(np.float64)
+    sum_x = np.bincount(group, weights=x, minlength=n_groups)
+    sum_y = np.bincount(group, weights=y, minlength=n_groups)
+    sum_xx = np.bincount(group, weights=x * x, minlength=n_groups)
+    sum_xy = np.bincount(group, weights=x * y, minlength=n_groups)
+    return _safe_divide(n * sum_xy - sum_x * sum_y, n * sum_xx - sum_x * sum_x)
+
+
+def _group_percentiles(
+    group: "np.ndarray", values: "np.ndarray", n_groups: int, percentiles: Sequence[float]
+) -> "np.ndarray":
+    """
+    Get percentiles of values for each group, using linear interpolation.
+
+    :param group: Group index of each row.
+    :param values: Value of each row.
+    :param n_groups: Number of groups.
+    :param percentiles: Percentiles to compute, between 0 and 100.
+    :return: Array with a row for each group and a column for each percentile.
+    """
+    np = require_numpy()
+    order = np.lexsort((values, group))
+    sorted_values = values[order]
+    counts = np.bincount(group, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    result = np.zeros((n_groups, len(percentiles)), dtype=np.float64)
+    has_rows = counts > 0
+    for j, percentile in enumerate(percentiles):
+        position = (counts[has_rows] - 1) * (percentile / 100.0)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.ceil(position).astype(np.int64)
+        fraction = position - lower
+        base = starts[has_rows]
+        low_values = sorted_values[base + lower]
+        high_values = sorted_values[base + upper]
+        result[has_rows, j] = low_values + (high_values - low_values) * fraction
+    return result
+
+
+def _group_rows(
+    codes: Sequence["np.ndarray"], radixes: Sequence[int]
+) -> Tuple[List["np.ndarray"], "np.ndarray"]:
+    """
+    Find the distinct combinations of codes and the combination of each row.
+
+    The codes of each row are combined into one integer when every combination fits in an
+    int64, so grouping is a single 1-d unique instead of a much slower unique over rows of a
+    2-d array.
+
+    :param codes: Codes of each group by column, one entry per row.
+    :param radixes: Number of distinct codes of each column.
+    :return: Codes of each column for each group, and the group index of each row.
+    """
+    np = require_numpy()
+    n_rows = len(codes[0]) if codes else 0
+    if math.prod(radixes) > _MAX_PACKED_GROUPS:
+        unique_rows, group = np.unique(np.stack(codes, axis=1), axis=0, return_inverse=True)
+        return [unique_rows[:, i] for i in range(len(codes))], group.reshape(-1)
+
+    combined = np.zeros(n_rows, dtype=np.int64)
+    for column_codes, radix in zip(codes, radixes):
+        combined = combined * radix + column_codes.astype(np.int64)
+    unique_combined, group = np.unique(combined, return_inverse=True)
+
+    unique_codes = []
+    remaining = unique_combined
+    for radix in reversed(radixes):
+        remaining, column_codes = np.divmod(remaining, radix)
+        unique_codes.append(column_codes)
+    return unique_codes[::-1], group.reshape(-1)
+
+
+def summarize_stats(
+    chunks: Iterable[StatsChunk],
+    group_by: Sequence[str] = DEFAULT_TEST_GROUP_BY,
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+) -> StatsSummary:
+    """
+    Summarize stats for each group of rows.
+
+    Groups are summarized with NumPy reductions, without running Python code for each row.
+
+    :param chunks: Chunks of stats, all created by the same builder.
+    :param group_by: String columns to group rows by.
+    :param percentiles: Percentiles of the average passing duration to compute.
+    :return: Summary of each group.
+    """
+    np = require_numpy()
+    unknown = set(group_by) - set(STRING_COLUMNS)
+    if unknown:
+        raise ValueError(f"Can only group by {STRING_COLUMNS}, not {sorted(unknown)}")
+
+    chunks = list(chunks)
+    dictionaries: Dict[str, List[str]] = chunks[-1].dictionaries if chunks else {}
+
+    def column(name: str, dtype: Any) -> Any:
+        if not chunks:
+            return np.zeros(0, dtype=dtype)
+        return np.concatenate([getattr(chunk, name) for chunk in chunks])
+
+    num_pass = column("num_pass", np.int64)
+    num_fail = column("num_fail", np.int64)
+    avg_duration = column("avg_duration_pass", np.float64)
+    days = column("execution_date", "datetime64[D]").astype(np.int64).astype(np.float64)
+
+    radixes = [max(len(dictionaries.get(name, [])), 1) for name in group_by]
+    unique_codes, group = _group_rows([column(name, np.int32) for name in group_by], radixes)
+    n_groups = int(group.max()) + 1 if len(group) else 0
+
+    keys = {
+        name: np.array(dictionaries.get(name, []), dtype=object)[codes]
+        for name, codes in zip(group_by, unique_codes)
+    }
+    total_pass = np.bincount(group, weights=num_pass, minlength=n_groups)
+    total_fail = np.bincount(group, weights=num_fail, minlength=n_groups)
+    total_duration = np.bincount(group, weights=avg_duration * num_pass, minlength=n_groups)
+    bucket_failure_rate = _safe_divide(num_fail.astype(np.float64), num_pass + num_fail)
+    # Buckets without passes report an average duration of 0, and buckets without runs a
+    # failure rate of 0, so they are left out of the percentiles and trends they would skew.
+    ran = num_pass + num_fail > 0
+    passed = num_pass > 0
+
+    return StatsSummary(
+        group_by=group_by,
+        keys=keys,
+        n_buckets=np.bincount(group, minlength=n_groups),
+        num_pass=total_pass.astype(np.int64),
+        num_fail=total_fail.astype(np.int64),
+        failure_rate=_safe_divide(total_fail, total_pass + total_fail),
+        avg_duration_pass=_safe_divide(total_duration, total_pass),
+        percentiles=percentiles,
+        duration_percentiles=_group_percentiles(
+            group[passed], avg_duration[passed], n_groups, percentiles
+        ),
+        failure_rate_trend=_trend(group[ran], days[ran], bucket_failure_rate[ran], n_groups),
+        duration_trend=_trend(group[passed], days[passed], avg_duration[passed], n_groups),
+    )
+
+
+async def _summarize_endpoint(
+    api: "AioEvergreenApi",
+    endpoint: str,
+    stats_spec: StatsSpecification,
+    group_by: Sequence[str],
+    percentiles: Sequence[float],
+    chunk_size: int,
+) -> StatsSummary:
+    """
+    Fetch stats from an endpoint without building models and summarize them.
+
+    :param api: API client to query with.
+    :param endpoint: Stats endpoint to query.
+    :param stats_spec: Specification of which stats to query.
+    :param group_by: String columns to group rows by.
+    :param percentiles: Percentiles of the average passing duration to compute.
+    :param chunk_size: Number of rows to collect into each chunk.
+    :return: Summary of each group.
+    """
+    rows = await api.raw_iterator(endpoint, stats_spec.get_params())
+    chunks = [chunk async for chunk in iter_stats_chunks(rows, chunk_size)]
+    return summarize_stats(chunks, group_by, percentiles)
+
+
+async def analyze_test_stats(
+    api: "AioEvergreenApi",
+    stats_spec: StatsSpecification,
+    group_by: Sequence[str] = DEFAULT_TEST_GROUP_BY,
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> StatsSummary:
+    """
+    Compute failure rates, durations and trends of the test stats for a specification.
+
+    :param api: API client to query with.
+    :param stats_spec: Specification of which tests to query.
+    :param group_by: String columns to group rows by.
+    :param percentiles: Percentiles of the average passing duration to compute.
+    :param chunk_size: Number of rows to collect into each chunk.
+    :return: Summary of each group of tests.
+    """
+    endpoint = f"projects/{stats_spec.project_id}/test_stats"
+    return await _summarize_endpoint(api, endpoint, stats_spec, group_by, percentiles, chunk_size)
+
+
+async def analyze_task_stats(
+    api: "AioEvergreenApi",
+    stats_spec: StatsSpecification,
+    group_by: Sequence[str] = DEFAULT_TASK_GROUP_BY,
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> StatsSummary:
+    """
+    Compute failure rates, durations and trends of the task stats for a specification.
+
+    :param api: API client to query with.
+    :param stats_spec: Specification of which tasks to query.
+    :param group_by: String columns to group rows by.
+    :param percentiles: Percentiles of the average passing duration to compute.
+    :param chunk_size: Number of rows to collect into each chunk.
+    :return: Summary of each group of tasks.
+    """
+    endpoint = f"projects/{stats_spec.project_id}/task_stats"
+    return await _summarize_endpoint(api, endpoint, stats_spec, group_by, percentiles, chunk_size)
@@ -0,0 +1,286 @@
+"""Columnar accumulation and export of test and task stats."""
+from array import array
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, AsyncIterable, AsyncIterator, Dict, List, Union
+
+from evg.models.evg_stats import EvgTaskStats, EvgTestStats
+
+if TYPE_CHECKING:
+    import numpy as np  # noqa: F401
+    import pyarrow as pa  # noqa: F401
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+STRING_COLUMNS = ("test_file", "task_name", "variant", "distro")
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+StatsRow = Union[EvgTestStats, EvgTaskStats, Dict[str, Any]]
+
+
+def require_numpy() -> Any:
+    """Import numpy, with an explanation if it is not installed."""
+    try:
+        import numpy
+    except ImportError as err:
+        raise ImportError("numpy is required for columnar stats, `pip install numpy`") from err
+    return numpy
+
+
+def require_pyarrow() -> Any:
+    """Import pyarrow, with an explanation if it is not installed."""
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as err:
+        raise ImportError("pyarrow is required to export stats, `pip install pyarrow`") from err
+    return pyarrow
+
+
+class _DictionaryEncoder:
+    """Map strings to stable integer codes."""
+
+    def __init__(self) -> None:
+        """Initialize an empty encoder."""
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def encode(self, value: str) -> int:
+        """
+        Get the code for a value, assigning a new code if it has not been seen before.
+
+        :param value: Value to encode.
+        :return: Code of the value.
+        """
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+
+@dataclass
+class StatsChunk:
+    """
+    A chunk of stats stored as NumPy arrays.
+
+    String columns hold int32 codes into the matching entry of `dictionaries`. Dictionaries
+    are shared by all chunks from the same builder, so codes are comparable across chunks.
+
+    test_file: Codes of the test file of each row.
+    task_name: Codes of the task name of each row.
+    variant: Codes of the build variant of each row.
+    distro: Codes of the distro of each row.
+    execution_date: Date of each row as datetime64[D].
+    num_pass: Number of passing executions in each row.
+    num_fail: Number of failing executions in each row.
+    avg_duration_pass: Average duration of passing executions in each row.
+    dictionaries: Values of the string columns, indexed by code.
+    """
+
+    test_file: "np.ndarray"
+    task_name: "np.ndarray"
+    variant: "np.ndarray"
+    distro: "np.ndarray"
+    execution_date: "np.ndarray"
+    num_pass: "np.ndarray"
+    num_fail: "np.ndarray"
+    avg_duration_pass: "np.ndarray"
+    dictionaries: Dict[str, List[str]]
+
+    def __len__(self) -> int:
+        """Get the number of rows in the chunk."""
+        return len(self.num_pass)
+
+    def decode(self, column: str) -> "np.ndarray":
+        """
+        Get the values of a string column.
+
+        :param column: Name of the string column.
+        :return: Array of the column's values.
+        """
+        np = require_numpy()
+        dictionary = np.array(self.dictionaries[column], dtype=object)
+        return dictionary[getattr(self, column)]
+
+    def to_arrow(self) -> "pa.RecordBatch":
+        """Convert the chunk to an Arrow record batch with dictionary encoded strings."""
+        pa = require_pyarrow()
+        columns = [
+            pa.DictionaryArray.from_arrays(
+                getattr(self, name), pa.array(self.dictionaries[name], pa.string())
+            )
+            for name in STRING_COLUMNS
+        ]
+        columns += [
+            pa.array(self.execution_date, pa.date32()),
+            pa.array(self.num_pass),
+            pa.array(self.num_fail),
+            pa.array(self.avg_duration_pass),
+        ]
+        names = list(STRING_COLUMNS) + [
+            "execution_date",
+            "num_pass",
+            "num_fail",
+            "avg_duration_pass",
+        ]
+        return pa.RecordBatch.from_arrays(columns, names=names)
+
+
+class StatsColumnBuilder:
+    """
+    Accumulate stats rows into typed column buffers.
+
+    String columns are dictionary encoded and dates are stored as days since the epoch. Rows
+    are handed out in chunks with `flush`, so memory use is bounded by the chunk size.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty builder."""
+        self._encoders = {name: _DictionaryEncoder() for name in STRING_COLUMNS}
+        self._date_cache: Dict[Any, int] = {}
+        self._reset()
+
+    def _reset(self) -> None:
+        """Start new, empty column buffers."""
+        self._codes = {name: array("i") for name in STRING_COLUMNS}
+        self._dates = array("q")
+        self._num_pass = array("q")
+        self._num_fail = array("q")
+        self._avg_duration_pass = array("d")
+
+    def __len__(self) -> int:
+        """Get the number of rows currently buffered."""
+        return len(self._num_pass)
+
+    def _day_number(self, value: Union[date, str]) -> int:
+        """
+        Get the number of days since the epoch of a date.
+
+        :param value: Date or ISO formatted date string.
+        :return: Days since the epoch.
+        """
+        day = self._date_cache.get(value)
+        if day is None:
+            as_date = value if isinstance(value, date) else date.fromisoformat(value[:10])
+            day = as_date.toordinal() - _EPOCH_ORDINAL
+            self._date_cache[value] = day
+        return day
+
+    def append(self, row: StatsRow) -> None:
+        """
+        Add a row of stats.
+
+        :param row: Stats model or the decoded JSON of a stats object.
+        """
+        if isinstance(row, dict):
+            values = row
+            execution_date = row["date"]
+        else:
+            values = row.__dict__
+            execution_date = row.execution_date
+
+        for name in STRING_COLUMNS:
+            self._codes[name].append(self._encoders[name].encode(values[name]))
+        self._dates.append(self._day_number(execution_date))
+        self._num_pass.append(values["num_pass"])
+        self._num_fail.append(values["num_fail"])
+        self._avg_duration_pass.append(values["avg_duration_pass"])
+
+    def flush(self) -> StatsChunk:
+        """
+        Hand out the buffered rows as a chunk and start new buffers.
+
+        :return: Chunk of the buffered rows.
+        """
+        np = require_numpy()
+        chunk = StatsChunk(
+            **{name: np.frombuffer(self._codes[name], dtype=np.int32) for name in STRING_COLUMNS},
+            execution_date=np.frombuffer(self._dates, dtype=np.int64).view("datetime64[D]"),
+            num_pass=np.frombuffer(self._num_pass, dtype=np.int64),
+            num_fail=np.frombuffer(self._num_fail, dtype=np.int64),
+            avg_duration_pass=np.frombuffer(self._avg_duration_pass, dtype=np.float64),
+            dictionaries={name: self._encoders[name].values for name in STRING_COLUMNS},
+        )
+        self._reset()
+        return chunk
+
+
+async def iter_stats_chunks(
+    stats: AsyncIterable[StatsRow], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> AsyncIterator[StatsChunk]:
+    """
+    Group stats into columnar chunks.
+
+    :param stats: Iterable of stats models or decoded stats objects, such as the result of
+        `test_stats`, `task_stats` or `raw_iterator`.
+    :param chunk_size: Number of rows in each chunk, the last chunk may be smaller.
+    :return: Iterator over chunks of stats.
+    """
+    builder = StatsColumnBuilder()
+    async for row in stats:
+        builder.append(row)
+        if len(builder) >= chunk_size:
+            yield builder.flush()
+    if len(builder):
+        yield builder.flush()
+
+
+async def write_stats_parquet(
+    stats: AsyncIterable[StatsRow], path: Union[str, Path], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> int:
+    """
+    Write stats to a Parquet file, one row group per chunk.
+
+    No file is written if there are no stats.
+
+    :param stats: Iterable of stats models or decoded stats objects.
+    :param path: Path of the file to write.
+    :param chunk_size: Number of rows to buffer before writing them.
+    :return: Number of rows written.
+    """
+    pa = require_pyarrow()
+    n_rows = 0
+    writer = None
+    try:
+        async for chunk in iter_stats_chunks(stats, chunk_size):
+            batch = chunk.to_arrow()
+            if writer is None:
+                writer = pa.parquet.ParquetWriter(str(path), batch.schema)
+            writer.write_table(pa.Table.from_batches([batch]))
+            n_rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return n_rows
+
+
+async def write_stats_arrow_stream(
+    stats: AsyncIterable[StatsRow], path: Union[str, Path], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> int:
+    """
+    Write stats to a file in the Arrow IPC streaming format, one record batch per chunk.
+
+    The streaming format is used because dictionaries grow between batches, which the IPC
+    file format does not allow. No file is written if there are no stats.
+
+    :param stats: Iterable of stats models or decoded stats objects.
+    :param path: Path of the file to write.
+    :param chunk_size: Number of rows to buffer before writing them.
+    :return: Number of rows written.
+    """
+    pa = require_pyarrow()
+    n_rows = 0
+    writer = None
+    try:
+        async for chunk in iter_stats_chunks(stats, chunk_size):
+            batch = chunk.to_arrow()
+            if writer is None:
+                writer = pa.ipc.new_stream(str(path), batch.schema)
+            writer.write_batch(batch)
+            n_rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return n_rows
@@ -0,0 +1,285 @@
+"""Client side throttling of requests to the evergreen API."""
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Callable, Mapping, Optional
+
+THROTTLED_STATUSES = frozenset([429, 503])
+
+
+def parse_retry_after(value: Optional[str], now: Optional[datetime] = None) -> Optional[float]:
+    """
+    Parse the value of a Retry-After header.
+
+    :param value: Header value, either a number of seconds or an HTTP date.
+    :param now: Current time, used to convert an HTTP date to a delay.
+    :return: Number of seconds to wait or None if the header is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if retry_at is None:
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    now = now if now is not None else datetime.now(timezone.utc)
+    return max(0.0, (retry_at - now).total_seconds())
+
+
+def jittered_backoff(attempt: int, base_backoff: float, max_backoff: float) -> float:
+    """
+    Get a randomized exponential backoff delay.
+
+    The delay is drawn uniformly between 0 and the exponential backoff for the attempt,
+    capped at `max_backoff`.
+
+    :param attempt: Number of attempts already made at the request, starting at 0.
+    :param base_backoff: Seconds to back off after the first failed attempt.
+    :param max_backoff: Maximum seconds to back off between attempts.
+    :return: Seconds to wait before the next attempt.
+    """
+    ceiling = min(max_backoff, base_backoff * 2**attempt)
+    return random.uniform(0, ceiling)
+
+
+class TokenBucket:
+    """A token bucket limiting the rate at which requests are started."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Initialize the bucket, starting full.
+
+        :param rate: Number of tokens added per second.
+        :param burst: Maximum number of tokens the bucket can hold, defaults to `rate`.
+        :param clock: Function returning the current time in seconds.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = max(1.0, burst if burst is not None else rate)
+        self.clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        """Add the tokens accumulated since the last refill."""
+        now = self.clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """
+        Try to take a token from the bucket.
+
+        :return: 0 if a token was taken, otherwise the number of seconds until one is available.
+        """
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    async def acquire(self) -> None:
+        """Wait for and take a token from the bucket."""
+        while True:
+            delay = self.try_acquire()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limit the number of concurrent requests, adapting the limit to the server's responses.
+
+    The limit is adjusted with additive-increase/multiplicative-decrease: every successful
+    request grows the limit by `increase / limit`, so the limit grows by about `increase` each
+    time a full window of requests succeeds, and every throttled request multiplies the limit
+    by `decrease_factor`.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        increase: float = 1.0,
+        decrease_factor: float = 0.5,
+    ) -> None:
+        """
+        Initialize the limiter.
+
+        :param initial_limit: Number of concurrent requests to start with.
+        :param min_limit: Lowest the limit can be reduced to.
+        :param max_limit: Highest the limit can grow to.
+        :param increase: Amount to grow the limit by for each window of successful requests.
+        :param decrease_factor: Factor to multiply the limit by when a request is throttled.
+        """
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Limits must satisfy 1 <= min_limit <= initial_limit <= max_limit")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._waiting = 0
+        self._condition: Optional[asyncio.Condition] = None
+
+    @property
+    def current_limit(self) -> int:
+        """Get the current number of requests allowed to run at once."""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        """Get the number of requests currently running."""
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """Get the number of requests waiting to start."""
+        return self._waiting
+
+    def _get_condition(self) -> asyncio.Condition:
+        """Get the condition used to wait for a free slot, created in the running loop."""
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def acquire(self) -> None:
+        """Wait until another request is allowed to start."""
+        condition = self._get_condition()
+        async with condition:
+            self._waiting += 1
+            try:
+                await condition.wait_for(lambda: self._in_flight < self.current_limit)
+            finally:
+                self._waiting -= 1
+            self._in_flight += 1
+
+    async def release(self) -> None:
+        """Record that a request has finished."""
+        condition = self._get_condition()
+        async with condition:
+            self._in_flight -= 1
+            condition.notify_all()
+
+    def on_success(self) -> None:
+        """Grow the limit after a successful request."""
+        self._limit = min(float(self.max_limit), self._limit + self.increase / self._limit)
+
+    def on_throttled(self) -> None:
+        """Shrink the limit after the server throttled a request."""
+        self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+
+
+@dataclass
+class ThrottleConfig:
+    """
+    Configuration of client side throttling.
+
+    requests_per_second: Maximum rate to start requests at, None for no limit.
+    burst: Number of requests that can be started at once after a quiet period.
+    initial_concurrency: Number of concurrent requests to start with.
+    min_concurrency: Lowest the concurrency limit can be reduced to.
+    max_concurrency: Highest the concurrency limit can grow to.
+    max_retries: Number of times to retry a throttled request.
+    base_backoff: Seconds to back off after the first throttled attempt.
+    max_backoff: Maximum seconds to back off between attempts.
+    """
+
+    requests_per_second: Optional[float] = None
+    burst: Optional[float] = None
+    initial_concurrency: int = 8
+    min_concurrency: int = 1
+    max_concurrency: int = 64
+    max_retries: int = 5
+    base_backoff: float = 0.5
+    max_backoff: float = 60.0
+
+
+class RequestThrottle:
+    """Combine rate limiting, adaptive concurrency and backoff for API requests."""
+
+    def __init__(self, config: Optional[ThrottleConfig] = None) -> None:
+        """
+        Initialize the throttle.
+
+        :param config: Throttling configuration.
+        """
+        self.config = config if config is not None else ThrottleConfig()
+        self.rate_limiter: Optional[TokenBucket] = None
+        if self.config.requests_per_second:
+            self.rate_limiter = TokenBucket(self.config.requests_per_second, self.config.burst)
+        self.limiter = AdaptiveConcurrencyLimiter(
+            self.config.initial_concurrency,
+            self.config.min_concurrency,
+            self.config.max_concurrency,
+        )
+        self.n_throttled = 0
+
+    @property
+    def current_limit(self) -> int:
+        """Get the current number of requests allowed to run at once."""
+        return self.limiter.current_limit
+
+    @property
+    def queue_depth(self) -> int:
+        """Get the number of requests waiting to start."""
+        return self.limiter.queue_depth
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Wait for permission to make a request and hold it while the request runs."""
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
+        await self.limiter.acquire()
+        try:
+            yield
+        finally:
+            await self.limiter.release()
+
+    def on_success(self) -> None:
+        """Record that a request succeeded."""
+        self.limiter.on_success()
+
+    def on_throttled(self, attempt: int, headers: Optional[Mapping[str, str]]) -> float:
+        """
+        Record that a request was throttled by the server.
+
+        :param attempt: Number of attempts already made at the request, starting at 0.
+        :param headers: Headers of the throttled response.
+        :return: Seconds to wait before retrying the request.
+        """
+        self.n_throttled += 1
+        self.limiter.on_throttled()
+        retry_after = parse_retry_after(headers.get("Retry-After") if headers else None)
+        if retry_after is not None:
+            return retry_after
+        return self.backoff(attempt)
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Get a randomized exponential backoff delay.
+
+        :param attempt: Number of attempts already made at the request, starting at 0.
+        :return: Seconds to wait before the next attempt.
+        """
+        return jittered_backoff(attempt, self.config.base_backoff, self.config.max_backoff)
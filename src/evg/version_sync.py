@@ -0,0 +1,223 @@
+"""Incremental sync of the versions of a project."""
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Dict,
+    NamedTuple,
+    Optional,
+    Set,
+    Union,
+)
+
+from evg.concurrency import bulk_fetch
+from evg.models.evg_version import EvgVersion, Requester
+
+if TYPE_CHECKING:
+    from evg.api import AioEvergreenApi  # noqa: F401
+
+DEFAULT_MAX_CONCURRENCY = 4
+
+
+@dataclass
+class SyncState:
+    """
+    Progress of syncing the versions of a project for one requester.
+
+    watermark: Highest order of all versions seen, None if nothing has been synced.
+    pending: Last seen status of versions that had not completed, keyed by version ID.
+    """
+
+    watermark: Optional[int] = None
+    pending: Dict[str, str] = field(default_factory=dict)
+
+
+class VersionCheckpoint:
+    """
+    Store of sync progress, optionally persisted to a JSON file.
+
+    The file is replaced atomically on each save, so an interrupted save leaves the previous
+    checkpoint in place.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None) -> None:
+        """
+        Initialize the checkpoint, loading the previous state from disk if it exists.
+
+        :param path: Path of the file to persist the checkpoint to, None to keep it in memory.
+        """
+        self.path = Path(path) if path is not None else None
+        self._states: Dict[str, SyncState] = {}
+        if self.path is not None and self.path.exists():
+            with open(self.path) as checkpoint_file:
+                raw_states = json.load(checkpoint_file)
+            self._states = {key: SyncState(**value) for key, value in raw_states.items()}
+
+    @staticmethod
+    def _key(project_id: str, requester: Requester) -> str:
+        """
+        Get the key a project and requester's state is stored under.
+
+        :param project_id: ID of the project.
+        :param requester: Requester of the versions.
+        :return: Key of the state.
+        """
+        return f"{project_id}:{requester.evg_value()}"
+
+    def get(self, project_id: str, requester: Requester) -> SyncState:
+        """
+        Get a copy of the sync progress of a project.
+
+        :param project_id: ID of the project.
+        :param requester: Requester of the versions.
+        :return: Sync progress, empty if the project has not been synced.
+        """
+        state = self._states.get(self._key(project_id, requester), SyncState())
+        return SyncState(state.watermark, dict(state.pending))
+
+    def set(self, project_id: str, requester: Requester, state: SyncState) -> None:
+        """
+        Record the sync progress of a project and save the checkpoint.
+
+        :param project_id: ID of the project.
+        :param requester: Requester of the versions.
+        :param state: New sync progress.
+        """
+        self._states[self._key(project_id, requester)] = state
+        self.save()
+
+    def save(self) -> None:
+        """Write the checkpoint to disk, if it has a path."""
+        if self.path is None:
+            return
+        raw_states: Dict[str, Any] = {
+            key: {"watermark": state.watermark, "pending": state.pending}
+            for key, state in self._states.items()
+        }
+        temp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(temp_path, "w") as checkpoint_file:
+            json.dump(raw_states, checkpoint_file)
+        os.replace(temp_path, self.path)
+
+
+class VersionUpdate(NamedTuple):
+    """
+    A version found by a sync.
+
+    version: The version.
+    is_new: True if the version was created since the last sync, False if it was seen before
+        and its status has changed.
+    """
+
+    version: EvgVersion
+    is_new: bool
+
+
+async def _aclose(iterable: AsyncIterable[Any]) -> None:
+    """
+    Close an async iterable early, if it supports closing.
+
+    :param iterable: Iterable to close.
+    """
+    aclose = getattr(iterable, "aclose", None)
+    if aclose is not None:
+        await aclose()
+
+
+class VersionSync:
+    """
+    Poll the versions of projects, only fetching what changed since the last poll.
+
+    Versions are listed newest first, so each poll only pages back until it reaches a version
+    at or below the highest order seen before (the watermark). The watermark and the versions
+    that had not completed are stored in a checkpoint for each project and requester, and the
+    versions that had not completed are re-checked by each poll.
+    """
+
+    def __init__(
+        self,
+        api: "AioEvergreenApi",
+        checkpoint: Optional[VersionCheckpoint] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        initial_limit: Optional[int] = None,
+    ) -> None:
+        """
+        Initialize the sync.
+
+        :param api: API client to query with.
+        :param checkpoint: Where to store sync progress, defaults to an in-memory checkpoint.
+        :param max_concurrency: Maximum number of versions to re-check at once.
+        :param initial_limit: Maximum number of versions to fetch the first time a project is
+            synced, None to fetch its whole history.
+        """
+        self.api = api
+        self.checkpoint = checkpoint if checkpoint is not None else VersionCheckpoint()
+        self.max_concurrency = max_concurrency
+        self.initial_limit = initial_limit
+        self.recheck_errors: Dict[str, BaseException] = {}
+
+    async def poll(
+        self, project_id: str, requester: Requester = Requester.GITTER_REQUEST
+    ) -> AsyncIterator[VersionUpdate]:
+        """
+        Get the versions that were created or changed status since the last poll.
+
+        New versions are yielded first, newest first, followed by previously seen versions
+        whose status changed. The checkpoint is only updated once the poll has been iterated
+        to the end, so a poll that is abandoned part way through is repeated in full.
+
+        A failed re-check does not abort the poll. Versions that failed with a transient error
+        stay pending and are re-checked by the next poll, while versions that failed with any
+        other error, such as a 404, are dropped. The errors of the last poll are kept in
+        `recheck_errors`, keyed by version ID.
+
+        :param project_id: ID of project to poll.
+        :param requester: Requester of the versions to poll.
+        :return: Iterator over new and changed versions.
+        """
+        state = self.checkpoint.get(project_id, requester)
+        new_state = SyncState(state.watermark, dict(state.pending))
+        seen: Set[str] = set()
+        errors: Dict[str, BaseException] = {}
+
+        versions = await self.api.versions_by_project(project_id, requester)
+        try:
+            async for version in versions:
+                if state.watermark is not None and version.order <= state.watermark:
+                    break
+                if state.watermark is None and self.initial_limit is not None:
+                    if len(seen) >= self.initial_limit:
+                        break
+                if version.version_id in seen:
+                    # New versions can shift the listing between pages.
+                    continue
+                seen.add(version.version_id)
+                if new_state.watermark is None or version.order > new_state.watermark:
+                    new_state.watermark = version.order
+                if not version.is_completed():
+                    new_state.pending[version.version_id] = version.status
+                yield VersionUpdate(version, True)
+        finally:
+            await _aclose(versions)
+
+        async for result in bulk_fetch(state.pending, self.api.version_by_id, self.max_concurrency):
+            if result.error is not None:
+                errors[result.key] = result.error
+                if not self.api.retry.is_transient(result.error):
+                    del new_state.pending[result.key]
+                continue
+            version = result.value
+            if version.status != state.pending[result.key]:
+                yield VersionUpdate(version, False)
+            if version.is_completed():
+                del new_state.pending[result.key]
+            else:
+                new_state.pending[result.key] = version.status
+
+        self.recheck_errors = errors
+        self.checkpoint.set(project_id, requester, new_state)
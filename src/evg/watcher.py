@@ -0,0 +1,335 @@
+"""Wait for tasks, builds and versions to complete."""
+import asyncio
+import heapq
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from enum import Enum
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from evg.concurrency import bulk_fetch
+
+if TYPE_CHECKING:
+    from evg.api import AioEvergreenApi  # noqa: F401
+
+
+class WatchKind(Enum):
+    """Kind of item being watched."""
+
+    TASK = "task"
+    BUILD = "build"
+    VERSION = "version"
+
+
+WatchKey = Tuple[WatchKind, str]
+
+
+class CompletionEvent(NamedTuple):
+    """
+    Notification that a watched item has completed.
+
+    kind: Kind of item that completed.
+    id: ID of the item.
+    item: Task, build or version as of its final poll, None if polling it failed.
+    error: Last error raised polling the item if it was given up on, otherwise None.
+    """
+
+    kind: WatchKind
+    id: str
+    item: Any
+    error: Optional[Exception] = None
+
+
+@dataclass
+class WatchConfig:
+    """
+    Configuration of how watched items are polled.
+
+    min_interval: Minimum seconds between polls of an item.
+    max_interval: Maximum seconds between polls of an item.
+    backoff_factor: Factor to grow the interval by when there is no better estimate.
+    batch_window: Items due within this many seconds of each other are polled together.
+    max_concurrency: Maximum number of requests to run at once.
+    max_errors: Give up on an item after this many consecutive failed polls.
+    """
+
+    min_interval: float = 10.0
+    max_interval: float = 600.0
+    backoff_factor: float = 2.0
+    batch_window: float = 1.0
+    max_concurrency: int = 8
+    max_errors: int = 5
+
+
+class _Watch:
+    """Polling state of a watched item."""
+
+    def __init__(self, due: float, interval: float) -> None:
+        """
+        Initialize the state.
+
+        :param due: Time the item is next due to be polled.
+        :param interval: Current backoff interval.
+        """
+        self.due = due
+        self.interval = interval
+        self.n_errors = 0
+
+
+def _elapsed_seconds(start: Any) -> Optional[float]:
+    """
+    Get the number of seconds since the given time.
+
+    :param start: Start time, naive times are assumed to be in UTC.
+    :return: Seconds since the start time, None if there is no start time.
+    """
+    if not isinstance(start, datetime):
+        return None
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - start).total_seconds()
+
+
+def estimate_remaining_seconds(kind: WatchKind, item: Any) -> Optional[float]:
+    """
+    Estimate how long an item will take to complete.
+
+    :param kind: Kind of item.
+    :param item: Task, build or version.
+    :return: Estimated seconds until the item completes, None if there is no estimate.
+    """
+    if kind == WatchKind.TASK:
+        expected = getattr(item, "expected_duration_ms", 0) or 0
+        elapsed = _elapsed_seconds(getattr(item, "start_time", None))
+        if elapsed is None:
+            wait = getattr(item, "est_wait_to_start_ms", 0) or 0
+            return (wait + expected) / 1000.0 if wait + expected > 0 else None
+        return expected / 1000.0 - elapsed if expected > 0 else None
+    if kind == WatchKind.BUILD:
+        makespan = getattr(item, "predicted_makespan_ms", 0) or 0
+        elapsed = _elapsed_seconds(getattr(item, "start_time", None))
+        if elapsed is None or makespan <= 0:
+            return None
+        return makespan / 1000.0 - elapsed
+    return None
+
+
+class CompletionWatcher:
+    """
+    Watch many tasks, builds and versions until they complete.
+
+    Register items with `watch`, then iterate over `events` to get a completion event for
+    each item. Items can be registered while events are being iterated. Iteration ends once
+    nothing is left to watch.
+
+    Items due to be polled at about the same time are polled together in one concurrent
+    batch. The interval between polls of an item adapts to its expected remaining time: the
+    expected duration of tasks and the predicted makespan of builds. Items without an
+    estimate, or running past it, back off exponentially.
+
+    If the API client has a task cache, watched tasks are removed from it before each poll so
+    that polls always see the current state of the task.
+    """
+
+    def __init__(self, api: "AioEvergreenApi", config: Optional[WatchConfig] = None) -> None:
+        """
+        Initialize the watcher.
+
+        :param api: API client to poll with.
+        :param config: Polling configuration.
+        """
+        self.api = api
+        self.config = config if config is not None else WatchConfig()
+        self.n_polls = 0
+        self._watches: Dict[WatchKey, _Watch] = {}
+        self._schedule: List[Tuple[float, int, WatchKey]] = []
+        self._sequence = 0
+        self._wake: Optional[asyncio.Event] = None
+        self._fetchers: Dict[WatchKind, Callable[[str], Awaitable[Any]]] = {
+            WatchKind.TASK: self._fetch_task,
+            WatchKind.BUILD: api.build_by_id,
+            WatchKind.VERSION: api.version_by_id,
+        }
+
+    @property
+    def n_watching(self) -> int:
+        """Get the number of items still being watched."""
+        return len(self._watches)
+
+    def watch(self, kind: WatchKind, ids: Iterable[str]) -> None:
+        """
+        Start watching items, they are polled for the first time straight away.
+
+        :param kind: Kind of the items.
+        :param ids: IDs of the items.
+        """
+        now = time.monotonic()
+        for item_id in ids:
+            key = (kind, item_id)
+            if key not in self._watches:
+                self._watches[key] = _Watch(now, self.config.min_interval)
+                self._push(key, now)
+        if self._wake is not None:
+            self._wake.set()
+
+    def watch_tasks(self, task_ids: Iterable[str]) -> None:
+        """
+        Start watching tasks.
+
+        :param task_ids: IDs of the tasks.
+        """
+        self.watch(WatchKind.TASK, task_ids)
+
+    def watch_builds(self, build_ids: Iterable[str]) -> None:
+        """
+        Start watching builds.
+
+        :param build_ids: IDs of the builds.
+        """
+        self.watch(WatchKind.BUILD, build_ids)
+
+    def watch_versions(self, version_ids: Iterable[str]) -> None:
+        """
+        Start watching versions.
+
+        :param version_ids: IDs of the versions.
+        """
+        self.watch(WatchKind.VERSION, version_ids)
+
+    def unwatch(self, kind: WatchKind, item_id: str) -> None:
+        """
+        Stop watching an item.
+
+        :param kind: Kind of the item.
+        :param item_id: ID of the item.
+        """
+        self._watches.pop((kind, item_id), None)
+
+    def _push(self, key: WatchKey, due: float) -> None:
+        """
+        Schedule an item to be polled.
+
+        :param key: Kind and ID of the item.
+        :param due: Time to poll the item.
+        """
+        self._sequence += 1
+        heapq.heappush(self._schedule, (due, self._sequence, key))
+
+    def _pop_due(self, until: float) -> List[WatchKey]:
+        """
+        Take the items that are due to be polled from the schedule.
+
+        :param until: Take items due before this time.
+        :return: Kind and ID of each item to poll.
+        """
+        batch = []
+        while self._schedule and self._schedule[0][0] <= until:
+            due, _, key = heapq.heappop(self._schedule)
+            watch = self._watches.get(key)
+            # Skip entries of items that are no longer watched or were rescheduled.
+            if watch is not None and watch.due == due:
+                batch.append(key)
+        return batch
+
+    async def _fetch_task(self, task_id: str) -> Any:
+        """
+        Fetch the current state of a task, bypassing the task cache.
+
+        :param task_id: ID of the task.
+        :return: The task.
+        """
+        if self.api.task_cache is not None:
+            self.api.task_cache.invalidate(task_id)
+        return await self.api.task_by_id(task_id)
+
+    async def _poll(self, key: WatchKey) -> Any:
+        """
+        Poll an item.
+
+        :param key: Kind and ID of the item.
+        :return: Current state of the item.
+        """
+        self.n_polls += 1
+        kind, item_id = key
+        return await self._fetchers[kind](item_id)
+
+    def _reschedule(self, key: WatchKey, watch: _Watch, estimate: Optional[float]) -> None:
+        """
+        Schedule the next poll of an item.
+
+        :param key: Kind and ID of the item.
+        :param watch: Polling state of the item.
+        :param estimate: Estimated seconds until the item completes, if known.
+        """
+        config = self.config
+        if estimate is not None and estimate > 0:
+            interval = min(config.max_interval, max(config.min_interval, estimate))
+        else:
+            interval = watch.interval
+            watch.interval = min(config.max_interval, watch.interval * config.backoff_factor)
+        watch.due = time.monotonic() + interval
+        self._push(key, watch.due)
+
+    async def _wait_until(self, due: float) -> None:
+        """
+        Wait until the given time or until new items are watched.
+
+        :param due: Time to wait until.
+        """
+        if self._wake is None:
+            self._wake = asyncio.Event()
+        self._wake.clear()
+        try:
+            await asyncio.wait_for(self._wake.wait(), max(0.0, due - time.monotonic()))
+        except asyncio.TimeoutError:
+            pass
+
+    async def events(self) -> AsyncIterator[CompletionEvent]:
+        """
+        Poll watched items until they have all completed.
+
+        :return: Iterator over an event for each item as it completes.
+        """
+        while self._watches:
+            if not self._schedule:
+                break
+            due = self._schedule[0][0]
+            if due > time.monotonic():
+                await self._wait_until(due)
+                continue
+
+            batch = self._pop_due(time.monotonic() + self.config.batch_window)
+            async for result in bulk_fetch(batch, self._poll, self.config.max_concurrency):
+                key = result.key
+                watch = self._watches.get(key)
+                if watch is None:
+                    continue
+                kind, item_id = key
+                if not result.ok:
+                    watch.n_errors += 1
+                    if watch.n_errors >= self.config.max_errors:
+                        del self._watches[key]
+                        yield CompletionEvent(kind, item_id, None, result.error)
+                    else:
+                        self._reschedule(key, watch, None)
+                    continue
+
+                watch.n_errors = 0
+                item = result.value
+                if item.is_completed():
+                    del self._watches[key]
+                    yield CompletionEvent(kind, item_id, item)
+                else:
+                    self._reschedule(key, watch, estimate_remaining_seconds(kind, item))
@@ -0,0 +1,209 @@
+"""Unit tests for cli.py"""
+import asyncio
+import io
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+import pytest
+
+import evg.cli.cli as under_test
+from evg.concurrency import BulkResult
+from evg.models.evg_task import EvgTask
+from evg.models.evg_version import EvgVersion
+
+
+def _task(index, status="success", build_id="b1"):
+    return EvgTask.construct(
+        task_id=f"task_{index}",
+        build_id=build_id,
+        status=status,
+        start_time=datetime(2020, 9, 1, 12, tzinfo=timezone.utc),
+        logs={"task_log": f"http://logs/{index}"},
+    )
+
+
+class FakeIterator:
+    def __init__(self, items):
+        self.items = list(items)
+        self.n_yielded = 0
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.n_yielded >= len(self.items):
+            raise StopAsyncIteration
+        self.n_yielded += 1
+        return self.items[self.n_yielded - 1]
+
+    async def aclose(self):
+        self.closed = True
+
+
+class FakeApi:
+    def __init__(self, tasks=()):
+        self.tasks = list(tasks)
+        self.iterators = []
+        self.raw_endpoints = []
+
+    def _iterate(self, items):
+        iterator = FakeIterator(items)
+        self.iterators.append(iterator)
+        return iterator
+
+    async def versions_by_project(self, project_id, requester, fields):
+        return self._iterate([EvgVersion.construct(version_id=f"v{i}", order=i) for i in range(5)])
+
+    async def version_by_id(self, version_id):
+        return EvgVersion.construct(
+            version_id=version_id,
+            build_variants_status=[
+                {"build_variant": "linux", "build_id": "b1"},
+                {"build_variant": "windows", "build_id": "b2"},
+            ],
+        )
+
+    async def tasks_by_build(self, build_id, fields):
+        return self._iterate([task for task in self.tasks if task.build_id == build_id])
+
+    async def raw_iterator(self, endpoint, params=None):
+        self.raw_endpoints.append(endpoint)
+        return self._iterate([{"endpoint": endpoint, "params": params}])
+
+    async def tasks_by_ids(self, task_ids, max_concurrency, ordered):
+        tasks = {task.task_id: task for task in self.tasks}
+        return self._iterate(
+            [
+                BulkResult(task_id, tasks.get(task_id), None if task_id in tasks else KeyError())
+                for task_id in task_ids
+            ]
+        )
+
+    async def stream_log_chunks(self, log_url):
+        yield f"{log_url} line 1\n".encode()
+        yield f"{log_url} line 2\n".encode()
+
+
+def _run(api, argv, stream=None):
+    args = under_test.create_parser().parse_args(argv)
+    stream = stream if stream is not None else io.StringIO()
+    exit_code = asyncio.run(under_test.run_command(api, args, stream))
+    return exit_code, stream
+
+
+class TestHelp:
+    def test_help_does_not_import_the_client(self):
+        code = (
+            "import sys\n"
+            "import evg.cli.cli as cli\n"
+            "try:\n"
+            "    cli.main(['--help'])\n"
+            "except SystemExit:\n"
+            "    pass\n"
+            "print(sorted({'aiohttp', 'pydantic', 'evg.api'} & set(sys.modules)))\n"
+        )
+
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+
+        output = subprocess.run(
+            [sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True
+        ).stdout
+
+        assert output.splitlines()[-1] == "[]"
+
+
+class TestArguments:
+    def test_patches_requires_project_or_user(self):
+        with pytest.raises(SystemExit):
+            under_test.main(["patches"])
+
+    def test_concurrency_must_be_positive(self):
+        with pytest.raises(SystemExit):
+            under_test.create_parser().parse_args(["projects", "--concurrency", "0"])
+
+
+class TestOutput:
+    def test_ndjson_stops_at_limit(self):
+        api = FakeApi()
+
+        exit_code, stream = _run(api, ["versions", "project", "--limit", "2", "--fields", "order"])
+
+        assert exit_code == 0
+        assert [json.loads(line) for line in stream.getvalue().splitlines()] == [
+            {"order": 0},
+            {"order": 1},
+        ]
+        assert api.iterators[0].n_yielded == 2
+        assert api.iterators[0].closed
+
+    def test_csv_encodes_values(self):
+        api = FakeApi([_task(1), _task(2, "failed")])
+
+        _, stream = _run(
+            api,
+            ["tasks", "--build", "b1", "--format", "csv", "--fields", "task_id,start_time,logs"],
+        )
+
+        lines = stream.getvalue().splitlines()
+        assert lines[0] == "task_id,start_time,logs"
+        assert lines[1] == 'task_1,2020-09-01T12:00:00+00:00,"{""task_log"":""http://logs/1""}"'
+        assert len(lines) == 3
+
+
+class TestTasks:
+    def test_tasks_of_versions_are_filtered(self):
+        api = FakeApi([_task(1, build_id="b1"), _task(2, "failed", "b1"), _task(3, "failed", "b2")])
+
+        _, stream = _run(
+            api,
+            ["tasks", "--version", "v1", "--status", "failed", "--fields", "task_id"],
+        )
+
+        task_ids = {json.loads(line)["task_id"] for line in stream.getvalue().splitlines()}
+        assert task_ids == {"task_2", "task_3"}
+
+    def test_raw_tasks_of_variant(self):
+        api = FakeApi()
+
+        _run(api, ["tasks", "--version", "v1", "--variant", "windows", "--raw"])
+
+        assert api.raw_endpoints == ["builds/b2/tasks"]
+
+
+class TestStats:
+    def test_date_range_is_sharded(self):
+        api = FakeApi()
+        argv = ["stats", "test", "project", "--after", "2020-09-01", "--before", "2020-09-05"]
+
+        _, stream = _run(api, argv + ["--shard-days", "2", "--raw"])
+
+        params = [json.loads(line)["params"] for line in stream.getvalue().splitlines()]
+        assert sorted(p["after_date"] for p in params) == ["2020-09-01", "2020-09-03"]
+        assert api.raw_endpoints == ["projects/project/test_stats"] * 2
+
+
+class TestLogs:
+    def test_missing_logs_are_reported(self, capsys):
+        api = FakeApi([_task(1), _task(2)])
+
+        exit_code, _ = _run(
+            api, ["logs", "task_2", "missing", "task_1"], io.TextIOWrapper(io.BytesIO())
+        )
+
+        assert exit_code == 1
+        assert "missing" in capsys.readouterr().err
+
+    def test_logs_are_streamed_in_order(self):
+        api = FakeApi([_task(1), _task(2)])
+        stream = io.TextIOWrapper(io.BytesIO())
+
+        _run(api, ["logs", "task_2", "task_1"], stream)
+
+        assert stream.buffer.getvalue() == (
+            b"http://logs/2 line 1\nhttp://logs/2 line 2\n"
+            b"http://logs/1 line 1\nhttp://logs/1 line 2\n"
+        )
@@ -0,0 +1,115 @@
+"""Unit tests for evg_task.py"""
+import evg.models.evg_task as under_test
+
+
+def _task_data(execution, status="success"):
+    return {
+        "activated": True,
+        "activated_by": "mci",
+        "artifacts": [],
+        "build_id": "b1",
+        "build_variant": "linux",
+        "create_time": "2020-09-01T12:00:00Z",
+        "depends_on": [],
+        "dispatch_time": None,
+        "display_name": "jsCore",
+        "display_only": False,
+        "distro_id": "ubuntu1804",
+        "est_wait_to_start_ms": 0,
+        "estimated_cost": 0.0,
+        "execution": execution,
+        "execution_tasks": None,
+        "expected_duration_ms": 1000,
+        "finish_time": None,
+        "generate_task": False,
+        "generated_by": "",
+        "host_id": "host",
+        "ingest_time": None,
+        "logs": {"task_log": f"http://logs/{execution}"},
+        "mainline": True,
+        "order": 1,
+        "project_id": "mongodb-mongo-master",
+        "priority": 0,
+        "restarts": execution,
+        "revision": "abc",
+        "scheduled_time": None,
+        "start_time": None,
+        "status": status,
+        "status_details": {"status": status, "type": "test", "desc": "", "timed_out": False},
+        "task_group": None,
+        "task_group_max_hosts": None,
+        "task_id": "task_1",
+        "time_taken_ms": 1000,
+        "version_id": "v1",
+    }
+
+
+def _task_with_executions():
+    data = _task_data(2)
+    data["previous_executions"] = [_task_data(1, "failed"), _task_data(0, "failed")]
+    return under_test.EvgTask(**data)
+
+
+class TestGetExecution:
+    def test_current_execution(self):
+        task = _task_with_executions()
+
+        assert task.get_execution(2) is task
+
+    def test_previous_execution(self):
+        task = _task_with_executions()
+
+        execution = task.get_execution(1)
+
+        assert execution.execution == 1
+        assert execution.status == "failed"
+        assert execution.create_time.year == 2020
+        assert task.get_execution(1) is execution
+
+    def test_unknown_execution(self):
+        task = _task_with_executions()
+
+        assert task.get_execution(5) is None
+        assert task.get_execution_or_self(5) is task
+
+    def test_task_without_previous_executions(self):
+        task = under_test.EvgTask(**_task_data(0))
+
+        assert task.get_execution(1) is None
+        assert task.get_executions() == [task]
+
+
+class TestGetExecutions:
+    def test_executions_are_oldest_first(self):
+        task = _task_with_executions()
+
+        executions = task.get_executions()
+
+        assert [execution.execution for execution in executions] == [0, 1, 2]
+        assert executions[-1] is task
+
+    def test_index_is_not_serialized(self):
+        task = _task_with_executions()
+        task.get_executions()
+
+        assert "_previous_executions" not in task.dict()
+        assert len(task.dict()["previous_executions"]) == 2
+
+
+class TestIsCompleted:
+    def test_failed_setup_is_completed(self):
+        task = under_test.EvgTask(**_task_data(0, "setup-failed"))
+
+        assert task.is_completed()
+
+    def test_running_task_is_not_completed(self):
+        task = under_test.EvgTask(**_task_data(0, "started"))
+
+        assert not task.is_completed()
+
+    def test_deactivated_task_is_completed(self):
+        data = _task_data(0, "undispatched")
+
+        assert not under_test.EvgTask(**data).is_completed()
+        data["activated"] = False
+        assert under_test.EvgTask(**data).is_completed()
@@ -0,0 +1,20 @@
+"""Unit tests for evg_version.py"""
+import evg.models.evg_version as under_test
+
+
+def _version():
+    return under_test.EvgVersion.construct(
+        version_id="v1",
+        build_variants_status=[
+            {"build_variant": "linux", "build_id": "b_linux"},
+            {"build_variant": "windows", "build_id": "b_windows"},
+        ],
+    )
+
+
+class TestGetBuildIds:
+    def test_all_builds(self):
+        assert _version().get_build_ids() == ["b_linux", "b_windows"]
+
+    def test_filtered_by_build_variant(self):
+        assert _version().get_build_ids(["windows", "macos"]) == ["b_windows"]
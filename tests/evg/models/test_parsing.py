@@ -0,0 +1,93 @@
+"""Unit tests for parsing.py"""
+from datetime import datetime
+
+import pytest
+from pydantic import ValidationError
+
+import evg.models.parsing as under_test
+from evg.models.evg_patch import EvgPatch
+from evg.models.evg_stats import EvgTestStats
+from evg.models.evg_version import EvgVersion
+
+STATS = {
+    "test_file": "jstests/core/test.js",
+    "task_name": "jsCore",
+    "variant": "linux",
+    "distro": "ubuntu",
+    "date": "2020-09-01",
+    "num_pass": "3",
+    "num_fail": 1,
+    "avg_duration_pass": 1.5,
+}
+
+VERSION = {
+    "version_id": "project_abc",
+    "create_time": "2020-09-01T00:00:00Z",
+    "revision": "abc",
+    "order": 42,
+    "project": "project",
+    "author": "author",
+    "author_email": "author@example.com",
+    "message": "commit message",
+    "status": "success",
+    "repo": "repo",
+    "branch": "master",
+    "errors": [],
+    "build_variants_status": [{"build_variant": "linux", "build_id": "build_1"}],
+}
+
+PATCH = {
+    "patch_id": "patch_1",
+    "variants_tasks": [{"name": "linux", "tasks": ["jsCore", "noPassthrough"]}],
+}
+
+
+class TestModelParser:
+    def test_full_validation(self):
+        parser = under_test.ModelParser(EvgTestStats)
+
+        stats = parser(STATS)
+
+        assert stats == EvgTestStats(**STATS)
+        assert stats.num_pass == 3
+
+    def test_projected_fields_are_validated(self):
+        parser = under_test.ModelParser(EvgTestStats, fields=["num_pass", "execution_date"])
+
+        stats = parser(STATS)
+
+        assert stats.num_pass == 3
+        assert stats.execution_date == datetime(2020, 9, 1).date()
+        assert stats.__fields_set__ == {"num_pass", "execution_date"}
+        assert not hasattr(stats, "test_file")
+
+    def test_projected_fields_report_errors(self):
+        parser = under_test.ModelParser(EvgTestStats, fields=["num_pass", "num_fail"])
+
+        with pytest.raises(ValidationError):
+            parser({**STATS, "num_pass": "not a number"})
+        with pytest.raises(ValidationError):
+            parser({"num_pass": 1})
+
+    def test_unvalidated_models_keep_decoded_values(self):
+        parser = under_test.ModelParser(EvgTestStats, validate=False)
+
+        stats = parser(STATS)
+
+        assert stats.num_pass == "3"
+        assert stats.execution_date == "2020-09-01"
+
+    def test_unknown_fields_are_rejected(self):
+        with pytest.raises(ValueError):
+            under_test.ModelParser(EvgTestStats, fields=["not_a_field"])
+
+    def test_unvalidated_versions_index_build_variants(self):
+        version = under_test.ModelParser(EvgVersion, validate=False)(VERSION)
+
+        assert version._build_variants_map == {"linux": "build_1"}
+        assert version.is_completed()
+
+    def test_unvalidated_patches_index_variant_tasks(self):
+        patch = under_test.ModelParser(EvgPatch, validate=False)(PATCH)
+
+        assert patch.task_list_for_variant("linux") == {"jsCore", "noPassthrough"}
@@ -0,0 +1,368 @@
+"""Unit tests for api.py"""
+import asyncio
+
+import pytest
+from aiohttp import ClientResponseError, ClientSession, web
+
+import evg.api as under_test
+from evg.memory_cache import TaskCache
+from evg.models.evg_version import EvgVersion
+from evg.response_cache import ResponseCache
+from evg.throttle import RequestThrottle
+
+
+def _build(build_id, status="success"):
+    return {
+        "_id": build_id,
+        "project_id": "mongodb-mongo-master",
+        "create_time": "2020-09-01T12:00:00Z",
+        "start_time": None,
+        "finish_time": None,
+        "version": "v1",
+        "branch": "master",
+        "git_hash": "abc",
+        "build_variant": "linux",
+        "status": status,
+        "activated": True,
+        "activated_by": "mci",
+        "activated_time": None,
+        "order": 1,
+        "tasks": ["task_1"],
+        "time_taken_ms": 1000,
+        "display_name": "Linux",
+        "predicted_makespan_ms": 0,
+        "actual_makespan_ms": 0,
+        "origin": "mongodb-mongo-master",
+        "status_counts": {
+            "succeeded": 1,
+            "failed": 0,
+            "started": 0,
+            "undispatched": 0,
+            "inactivate": 0,
+            "dispatched": 0,
+            "timed_out": 0,
+        },
+    }
+
+
+def _serve(routes, query, **kwargs):
+    # Sessions created by EvgApiFactory raise for error statuses, so do the same here.
+
+    async def run():
+        app = web.Application()
+        for path, handler in routes.items():
+            app.router.add_get(path, handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            async with ClientSession(raise_for_status=True) as session:
+                api = under_test.AioEvergreenApi(session, f"http://127.0.0.1:{port}", **kwargs)
+                return await query(api)
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(run())
+
+
+class TestBuildsByVersion:
+    def test_builds_are_parsed(self):
+        requests = []
+
+        async def handler(request):
+            requests.append(request.path)
+            return web.json_response([_build("b1"), _build("b2", "started")])
+
+        async def query(api):
+            return [build async for build in await api.builds_by_version("v1")]
+
+        builds = _serve({"/rest/v2/versions/{version_id}/builds": handler}, query)
+
+        assert requests == ["/rest/v2/versions/v1/builds"]
+        assert [build.id for build in builds] == ["b1", "b2"]
+        assert [build.is_completed() for build in builds] == [True, False]
+        assert builds[0].status_counts.succeeded == 1
+
+    def test_fields_are_projected(self):
+        async def handler(request):
+            return web.json_response([_build("b1", "failed")])
+
+        async def query(api):
+            return [build async for build in await api.builds_by_version("v1", ["id", "status"])]
+
+        builds = _serve({"/rest/v2/versions/{version_id}/builds": handler}, query)
+
+        assert builds[0].id == "b1"
+        assert builds[0].is_completed()
+        assert builds[0].__fields_set__ == {"id", "status"}
+        assert not hasattr(builds[0], "git_hash")
+
+
+def _version(version_id, variants=("linux", "windows")):
+    return EvgVersion.construct(
+        version_id=version_id,
+        build_variants_status=[
+            {"build_variant": variant, "build_id": f"{version_id}_{variant}"}
+            for variant in variants
+        ],
+    )
+
+
+def _task(task_id, build_id, status):
+    return {"task_id": task_id, "build_id": build_id, "status": status, "display_name": "jsCore"}
+
+
+def _tasks_handler(requests, delay=0.0, running=None):
+    async def handler(request):
+        build_id = request.match_info["build_id"]
+        requests.append(build_id)
+        if running is not None:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        await asyncio.sleep(delay)
+        if running is not None:
+            running["now"] -= 1
+        return web.json_response(
+            [
+                _task(f"{build_id}_passed", build_id, "success"),
+                _task(f"{build_id}_failed", build_id, "failed"),
+            ]
+        )
+
+    return {"/rest/v2/builds/{build_id}/tasks": handler}
+
+
+class TestTasksForVersions:
+    def test_status_filter_with_projected_fields(self):
+        async def query(api):
+            tasks = await api.tasks_for_versions(
+                [_version("v1")], statuses=["failed"], fields=["task_id"]
+            )
+            return [task async for task in tasks]
+
+        tasks = _serve(_tasks_handler([]), query, validate_models=False)
+
+        assert sorted(task.task_id for task in tasks) == ["v1_linux_failed", "v1_windows_failed"]
+        assert all(task.status == "failed" for task in tasks)
+        assert not hasattr(tasks[0], "display_name")
+
+    def test_build_variants_are_filtered(self):
+        requests = []
+
+        async def query(api):
+            tasks = await api.tasks_for_versions(
+                [_version("v1"), _version("v2")], build_variants=["windows"]
+            )
+            return [task async for task in tasks]
+
+        tasks = _serve(_tasks_handler(requests), query, validate_models=False)
+
+        assert sorted(requests) == ["v1_windows", "v2_windows"]
+        assert len(tasks) == 4
+
+    def test_concurrency_is_bounded(self):
+        running = {"now": 0, "max": 0}
+        requests = []
+        versions = [_version(f"v{i}") for i in range(4)]
+
+        async def query(api):
+            tasks = await api.tasks_for_versions(versions, max_concurrency=3)
+            return [task async for task in tasks]
+
+        tasks = _serve(_tasks_handler(requests, 0.02, running), query, validate_models=False)
+
+        assert len(requests) == 8
+        assert len(tasks) == 16
+        assert running["max"] == 3
+
+    @pytest.mark.parametrize("ordered", [True, False])
+    def test_versions_can_be_async_iterable(self, ordered):
+        async def versions():
+            for i in range(3):
+                yield _version(f"v{i}", ["linux"])
+
+        async def query(api):
+            tasks = await api.tasks_for_versions(versions(), ordered=ordered)
+            return [task.task_id async for task in tasks]
+
+        task_ids = _serve(_tasks_handler([]), query, validate_models=False)
+
+        assert sorted(task_ids) == sorted(
+            f"v{i}_linux_{status}" for i in range(3) for status in ["passed", "failed"]
+        )
+        if ordered:
+            assert task_ids[:2] == ["v0_linux_passed", "v0_linux_failed"]
+
+
+class TestThrottle:
+    def test_throttled_request_is_retried_after_delay(self):
+        requests = []
+
+        async def handler(request):
+            requests.append(request.match_info["task_id"])
+            if len(requests) == 1:
+                return web.Response(status=429, headers={"Retry-After": "0"})
+            return web.json_response(_task("t1", "b1", "success"))
+
+        async def query(api):
+            return await api.task_by_id("t1")
+
+        throttle = RequestThrottle()
+        task = _serve(
+            {"/rest/v2/tasks/{task_id}": handler}, query, validate_models=False, throttle=throttle
+        )
+
+        assert task.task_id == "t1"
+        assert requests == ["t1", "t1"]
+        assert throttle.n_throttled == 1
+
+
+class TestTaskCache:
+    def test_concurrent_calls_share_one_request(self):
+        requests = []
+
+        async def handler(request):
+            requests.append(request.match_info["task_id"])
+            await asyncio.sleep(0.02)
+            return web.json_response(_task("t1", "b1", "success"))
+
+        async def query(api):
+            return await asyncio.gather(*[api.task_by_id("t1") for _ in range(10)])
+
+        tasks = _serve(
+            {"/rest/v2/tasks/{task_id}": handler},
+            query,
+            validate_models=False,
+            task_cache=TaskCache(),
+        )
+
+        assert requests == ["t1"]
+        assert len(tasks) == 10
+        assert all(task is tasks[0] for task in tasks)
+
+
+def _manifest(task_id):
+    return {
+        "id": f"{task_id}_manifest",
+        "revision": "abc",
+        "project": "mongodb-mongo-master",
+        "branch": "master",
+        "modules": {},
+    }
+
+
+class TestResponseCache:
+    def test_repeated_request_is_served_from_cache(self, tmp_path):
+        requests = []
+
+        async def handler(request):
+            requests.append(request.match_info["task_id"])
+            return web.json_response(_manifest(request.match_info["task_id"]))
+
+        async def query(api):
+            return [await api.manifest_for_task("t1") for _ in range(2)]
+
+        cache = ResponseCache(tmp_path / "cache.db")
+        try:
+            manifests = _serve(
+                {"/rest/v2/tasks/{task_id}/manifest": handler}, query, response_cache=cache
+            )
+        finally:
+            cache.close()
+
+        assert requests == ["t1"]
+        assert [manifest.id for manifest in manifests] == ["t1_manifest", "t1_manifest"]
+        assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+class TestRawPages:
+    def test_pages_follow_next_link(self):
+        requests = []
+        pages = [b'[{"task_id": "t1"}, {"task_id": "t2"}]', b'[{"task_id": "t3"}]']
+
+        async def handler(request):
+            page = int(request.query.get("page", "0"))
+            requests.append(page)
+            headers = {}
+            if page + 1 < len(pages):
+                headers["Link"] = f'<{request.url.with_query(page=page + 1)}>; rel="next"'
+            return web.Response(body=pages[page], headers=headers, content_type="application/json")
+
+        async def query(api):
+            return [page async for page in await api.raw_pages("tasks")]
+
+        bodies = _serve({"/rest/v2/tasks": handler}, query)
+
+        assert requests == [0, 1]
+        assert bodies == pages
+
+
+def _missing_handler(make_body, key):
+    async def handler(request):
+        object_id = request.match_info[key]
+        if object_id.startswith("missing"):
+            raise web.HTTPNotFound()
+        return web.json_response(make_body(object_id))
+
+    return handler
+
+
+class TestBulkRetrieval:
+    def test_manifests_for_tasks(self):
+        handler = _missing_handler(_manifest, "task_id")
+
+        async def query(api):
+            results = await api.manifests_for_tasks(["t1", "missing", "t2"], ordered=True)
+            return [result async for result in results]
+
+        results = _serve({"/rest/v2/tasks/{task_id}/manifest": handler}, query)
+
+        assert [result.key for result in results] == ["t1", "missing", "t2"]
+        assert results[0].value.id == "t1_manifest"
+        assert results[2].value.id == "t2_manifest"
+        assert results[1].value is None
+        assert isinstance(results[1].error, ClientResponseError)
+        assert results[1].error.status == 404
+
+    def test_builds_by_ids(self):
+        handler = _missing_handler(_build, "build_id")
+
+        async def query(api):
+            results = await api.builds_by_ids(["b1", "missing", "b2", "b1"])
+            return {result.key: result async for result in results}
+
+        results = _serve({"/rest/v2/builds/{build_id}": handler}, query)
+
+        assert set(results) == {"b1", "missing", "b2"}
+        assert results["b1"].value.id == "b1"
+        assert results["b2"].error is None
+        assert results["missing"].error.status == 404
+
+
+class TestDownloadLogs:
+    def test_failed_downloads_are_reported_with_the_rest(self, tmp_path):
+        async def handler(request):
+            name = request.match_info["name"]
+            if name == "missing":
+                raise web.HTTPNotFound()
+            return web.Response(body=f"{name} line 1\n".encode())
+
+        async def query(api):
+            destinations = {
+                f"{api.url_creator.api_server}/logs/{name}": tmp_path / name
+                for name in ["t1", "missing", "t2"]
+            }
+            results = await api.download_logs(destinations, ordered=True)
+            return [result async for result in results]
+
+        results = _serve({"/logs/{name}": handler}, query)
+
+        assert [result.key.rsplit("/", 1)[1] for result in results] == ["t1", "missing", "t2"]
+        assert results[0].value.path == tmp_path / "t1"
+        assert results[0].value.size == len(b"t1 line 1\n")
+        assert (tmp_path / "t2").read_bytes() == b"t2 line 1\n"
+        assert results[1].value is None
+        assert results[1].error.status == 404
+        assert not (tmp_path / "missing").exists()
@@ -0,0 +1,101 @@
+"""Unit tests for api_factory.py"""
+import asyncio
+
+import evg.api_factory as under_test
+from evg.evg_config import ConnectionPoolConfig, EvgConfig
+
+
+def _config(**kwargs):
+    return EvgConfig(
+        api_server="http://localhost", api_key="key", username="user", network_timeout=60, **kwargs
+    )
+
+
+class TestCreateSession:
+    def test_pool_and_timeouts_are_configured(self):
+        pool_config = ConnectionPoolConfig(limit=10, limit_per_host=5, compression=False)
+        factory = under_test.EvgApiFactory(
+            _config(connect_timeout=3, read_timeout=20), pool_config=pool_config
+        )
+
+        async def run():
+            session = factory._create_session()
+            connector = session.connector
+            await session.close()
+            return session, connector
+
+        session, connector = asyncio.run(run())
+
+        assert connector.limit == 10
+        assert connector.limit_per_host == 5
+        assert session.timeout.total == 60
+        assert session.timeout.connect == 3
+        assert session.timeout.sock_read == 20
+        assert session.headers["Accept-Encoding"] == "identity"
+        assert session.headers["Api-User"] == "user"
+
+    def test_read_timeout_defaults_to_network_timeout(self):
+        factory = under_test.EvgApiFactory(_config())
+
+        async def run():
+            session = factory._create_session()
+            connector = session.connector
+            await session.close()
+            return session, connector
+
+        session, connector = asyncio.run(run())
+
+        assert session.timeout.sock_read == 60
+        assert connector.limit_per_host == ConnectionPoolConfig().limit_per_host
+
+
+class TestSessionSharing:
+    def test_session_is_closed_after_last_context_exits(self):
+        factory = under_test.EvgApiFactory(_config())
+
+        async def run():
+            async with factory.evergreen_api() as outer:
+                session = outer.session
+                async with factory.evergreen_api() as inner:
+                    assert inner.session is session
+                assert not session.closed
+            return session
+
+        assert asyncio.run(run()).closed
+
+    def test_manual_clients_release_the_session(self):
+        factory = under_test.EvgApiFactory(_config())
+
+        async def run():
+            api = factory.get_evergreen_api_client()
+            session = api.session
+            async with factory.evergreen_api():
+                pass
+            assert not session.closed
+            api.close()
+            api.close()
+            await asyncio.sleep(0.01)
+            return session
+
+        session = asyncio.run(run())
+
+        assert session.closed
+        assert factory._session is None
+        assert factory._session_users == 0
+
+    def test_close_closes_session_in_use(self):
+        factory = under_test.EvgApiFactory(_config())
+
+        async def run():
+            api = factory.get_evergreen_api_client()
+            session = api.session
+            await factory.close()
+            api.close()
+            new_api = factory.get_evergreen_api_client()
+            assert new_api.session is not session
+            assert factory._session_users == 1
+            new_api.close()
+            await factory.close()
+            return session
+
+        assert asyncio.run(run()).closed
@@ -0,0 +1,75 @@
+"""Unit tests for api_requests.py"""
+from datetime import datetime, timedelta
+
+import pytest
+
+import evg.api_requests as under_test
+
+START = datetime(2020, 9, 1)
+
+
+class TestShard:
+    def test_date_range_is_split_into_shards(self):
+        spec = under_test.StatsSpecification(
+            "project", after_date=START, before_date=START + timedelta(days=10)
+        )
+
+        shards = spec.shard(3)
+
+        assert [(s.after_date, s.before_date) for s in shards] == [
+            (START, START + timedelta(days=3)),
+            (START + timedelta(days=3), START + timedelta(days=6)),
+            (START + timedelta(days=6), START + timedelta(days=9)),
+            (START + timedelta(days=9), START + timedelta(days=10)),
+        ]
+
+    def test_partial_day_remainder_is_merged(self):
+        before = START + timedelta(days=4, hours=12)
+        spec = under_test.StatsSpecification("project", after_date=START, before_date=before)
+
+        shards = spec.shard(2)
+
+        assert [(s.after_date, s.before_date) for s in shards] == [
+            (START, START + timedelta(days=2)),
+            (START + timedelta(days=2), before),
+        ]
+        assert [s.get_params()["before_date"] for s in shards] == ["2020-09-03", "2020-09-05"]
+
+    def test_shards_are_aligned_to_groups(self):
+        spec = under_test.StatsSpecification(
+            "project", after_date=START, before_date=START + timedelta(days=14), group_num_days=7
+        )
+
+        shards = spec.shard(3)
+
+        assert [s.after_date for s in shards] == [START, START + timedelta(days=7)]
+        assert all(s.group_num_days == 7 for s in shards)
+
+    def test_latest_sort_reverses_date_ranges(self):
+        spec = under_test.StatsSpecification(
+            "project", after_date=START, before_date=START + timedelta(days=4), sort="latest"
+        )
+
+        shards = spec.shard(2)
+
+        assert [s.after_date for s in shards] == [START + timedelta(days=2), START]
+
+    def test_variants_and_tasks_can_be_split(self):
+        spec = under_test.StatsSpecification(
+            "project",
+            after_date=START,
+            before_date=START + timedelta(days=2),
+            variants=["v1", "v2"],
+            tasks=["t1", "t2", "t3"],
+        )
+
+        assert len(spec.shard(2)) == 1
+        assert len(spec.shard(2, split_variants=True)) == 2
+        assert len(spec.shard(1, split_variants=True, split_tasks=True)) == 12
+        assert spec.shard(2, split_tasks=True)[1].tasks == ["t2"]
+
+    def test_dates_are_required(self):
+        spec = under_test.StatsSpecification("project", after_date=START)
+
+        with pytest.raises(ValueError):
+            spec.shard(1)
@@ -0,0 +1,138 @@
+"""Unit tests for concurrency.py"""
+import asyncio
+
+import pytest
+
+import evg.concurrency as under_test
+
+
+async def _source(items, delay=0.0):
+    for item in items:
+        await asyncio.sleep(delay)
+        yield item
+
+
+async def _failing_source():
+    yield 1
+    raise ValueError("failed")
+
+
+async def _collect(iterable):
+    return [item async for item in iterable]
+
+
+class TestMergeIterables:
+    def test_ordered_merge_preserves_source_order(self):
+        sources = [_source([1, 2], delay=0.02), _source([3, 4]), _source([5])]
+
+        result = asyncio.run(_collect(under_test.merge_iterables(sources, 3, ordered=True)))
+
+        assert result == [1, 2, 3, 4, 5]
+
+    def test_unordered_merge_yields_items_as_they_arrive(self):
+        sources = [_source([1, 2], delay=0.02), _source([3, 4]), _source([5])]
+
+        result = asyncio.run(_collect(under_test.merge_iterables(sources, 3, ordered=False)))
+
+        assert sorted(result) == [1, 2, 3, 4, 5]
+        assert result[-1] == 2
+
+    def test_concurrency_is_limited(self):
+        running = 0
+        max_running = 0
+
+        async def tracked():
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            yield 1
+            running -= 1
+
+        sources = [tracked() for _ in range(6)]
+
+        result = asyncio.run(_collect(under_test.merge_iterables(sources, 2, ordered=False)))
+
+        assert len(result) == 6
+        assert max_running == 2
+
+    @pytest.mark.parametrize("ordered", [True, False])
+    def test_sources_are_taken_lazily_from_async_iterable(self, ordered):
+        taken = []
+
+        async def sources():
+            for i in range(5):
+                taken.append(i)
+                yield _source([i], delay=0.01)
+
+        async def first():
+            merged = under_test.merge_iterables(sources(), 2, ordered=ordered)
+            item = await merged.__anext__()
+            await merged.aclose()
+            return item
+
+        assert asyncio.run(first()) in {0, 1}
+        assert len(taken) <= 3
+        result = asyncio.run(_collect(under_test.merge_iterables(sources(), 2, ordered=ordered)))
+        assert sorted(result) == [0, 1, 2, 3, 4]
+
+    @pytest.mark.parametrize("ordered", [True, False])
+    def test_errors_are_raised(self, ordered):
+        sources = [_source([1]), _failing_source()]
+
+        with pytest.raises(ValueError):
+            asyncio.run(_collect(under_test.merge_iterables(sources, 2, ordered=ordered)))
+
+
+class TestBulkFetch:
+    def test_results_are_returned_for_each_unique_key(self):
+        calls = []
+
+        async def fetch(key):
+            calls.append(key)
+            await asyncio.sleep(0.01 * (3 - key))
+            return key * 10
+
+        result = asyncio.run(_collect(under_test.bulk_fetch([1, 2, 2, 1, 3], fetch, 3)))
+
+        assert sorted(calls) == [1, 2, 3]
+        assert [r.key for r in result] == [3, 2, 1]
+        assert all(r.ok for r in result)
+        assert {r.key: r.value for r in result} == {1: 10, 2: 20, 3: 30}
+
+    def test_ordered_results_follow_key_order(self):
+        async def fetch(key):
+            await asyncio.sleep(0.01 * (3 - key))
+            return key
+
+        result = asyncio.run(_collect(under_test.bulk_fetch([1, 2, 3], fetch, 3, ordered=True)))
+
+        assert [r.key for r in result] == [1, 2, 3]
+
+    def test_failures_are_reported_per_key(self):
+        async def fetch(key):
+            if key == 2:
+                raise ValueError("failed")
+            return key
+
+        result = asyncio.run(_collect(under_test.bulk_fetch([1, 2, 3], fetch, 1, ordered=True)))
+
+        assert [r.ok for r in result] == [True, False, True]
+        assert isinstance(result[1].error, ValueError)
+
+    def test_concurrency_is_limited(self):
+        running = 0
+        max_running = 0
+
+        async def fetch(key):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return key
+
+        result = asyncio.run(_collect(under_test.bulk_fetch(range(10), fetch, 3)))
+
+        assert len(result) == 10
+        assert max_running == 3
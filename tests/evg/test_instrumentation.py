@@ -0,0 +1,192 @@
+"""Unit tests for instrumentation.py"""
+import asyncio
+import json
+import math
+
+import pytest
+from aiohttp import ClientResponseError, ClientSession, web
+
+import evg.instrumentation as under_test
+from evg.api import AioEvergreenApi
+from evg.retry import RetryPolicy
+
+
+class TestEndpointName:
+    @pytest.mark.parametrize(
+        "url,expected",
+        [
+            ("https://evg.example.com/rest/v2/tasks/task_1", "tasks/{id}"),
+            ("https://evg.example.com/rest/v2/builds/b1/tasks?limit=5", "builds/{id}/tasks"),
+            ("https://evg.example.com/rest/v2/projects", "projects"),
+            ("https://evg.example.com/task_log_raw/task_1/0?type=T", "other"),
+        ],
+    )
+    def test_endpoint_name(self, url, expected):
+        assert under_test.endpoint_name(url) == expected
+
+
+class TestHistogram:
+    def test_observe(self):
+        histogram = under_test.Histogram([1, 5])
+
+        for value in [0.5, 1, 3, 10]:
+            histogram.observe(value)
+
+        assert histogram.counts == [2, 1, 1]
+        assert histogram.count == 4
+        assert histogram.sum == 14.5
+
+    def test_quantile(self):
+        histogram = under_test.Histogram([1, 5])
+        assert histogram.quantile(0.5) is None
+
+        for value in [0.5, 3, 3, 10]:
+            histogram.observe(value)
+
+        assert histogram.quantile(0.25) == 1
+        assert histogram.quantile(0.5) == 5
+        assert histogram.quantile(1) == math.inf
+
+
+class TestMetricsRegistry:
+    def test_counters_are_separated_by_labels(self):
+        registry = under_test.MetricsRegistry()
+
+        registry.inc("requests", labels={"endpoint": "a"})
+        registry.inc("requests", 2, labels={"endpoint": "a"})
+        registry.inc("requests", labels={"endpoint": "b"})
+
+        assert registry.counter("requests", {"endpoint": "a"}) == 3
+        assert registry.counter("requests", {"endpoint": "b"}) == 1
+        assert registry.counter("requests", {"endpoint": "c"}) == 0
+
+    def test_prometheus_text(self):
+        registry = under_test.MetricsRegistry()
+        registry.inc("requests_total", labels={"endpoint": 'a"b'})
+        registry.observe("seconds", 0.2, buckets=[0.1, 1])
+
+        text = registry.to_prometheus_text()
+
+        assert text.splitlines() == [
+            "# TYPE requests_total counter",
+            'requests_total{endpoint="a\\"b"} 1.0',
+            "# TYPE seconds histogram",
+            'seconds_bucket{le="0.1"} 0',
+            'seconds_bucket{le="1.0"} 1',
+            'seconds_bucket{le="+Inf"} 1',
+            "seconds_sum 0.2",
+            "seconds_count 1",
+        ]
+
+    def test_write_prometheus_text(self, tmp_path):
+        registry = under_test.MetricsRegistry()
+        registry.inc("requests_total")
+        path = tmp_path / "evg.prom"
+
+        registry.write_prometheus_text(path)
+
+        assert path.read_text() == registry.to_prometheus_text()
+        assert list(tmp_path.iterdir()) == [path]
+
+
+class TestMetricsHooks:
+    def test_api_requests_are_recorded(self):
+        pages = [[{"name": "a"}, {"name": "b"}], [{"name": "c"}]]
+
+        async def handler(request):
+            page = int(request.query.get("page", "0"))
+            headers = {}
+            if page + 1 < len(pages):
+                headers["Link"] = f'<{request.url.with_query(page=page + 1)}>; rel="next"'
+            return web.json_response(pages[page], headers=headers)
+
+        async def run():
+            app = web.Application()
+            app.router.add_get("/rest/v2/builds/{build_id}/tasks", handler)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            port = site._server.sockets[0].getsockname()[1]
+            registry = under_test.MetricsRegistry()
+            trace_config = under_test.create_trace_config(registry)
+            try:
+                async with ClientSession(trace_configs=[trace_config]) as session:
+                    api = AioEvergreenApi(
+                        session,
+                        f"http://127.0.0.1:{port}",
+                        hooks=under_test.MetricsHooks(registry),
+                    )
+                    items = [item async for item in await api.raw_iterator("builds/b1/tasks")]
+            finally:
+                await runner.cleanup()
+            return items, registry
+
+        items, registry = asyncio.run(run())
+
+        endpoint = {"endpoint": "builds/{id}/tasks"}
+        assert len(items) == 3
+        assert registry.counter("evg_requests_total", {**endpoint, "status": "200"}) == 2
+        assert registry.counter("evg_pages_total", endpoint) == 2
+        assert registry.counter("evg_items_total", endpoint) == 3
+        n_bytes = sum(len(json.dumps(page)) for page in pages)
+        assert registry.counter("evg_response_bytes_total", endpoint) == n_bytes
+        assert registry.histogram("evg_request_seconds", endpoint).count == 2
+        assert registry.histogram("evg_decode_seconds", endpoint).count == 2
+        assert registry.histogram("evg_ttfb_seconds", endpoint).count == 2
+        assert registry.counter("evg_connections_reused_total") == 1
+
+    def test_failed_requests_are_recorded(self):
+        attempts = []
+
+        async def tasks_handler(request):
+            attempts.append(request.path)
+            if len(attempts) == 1:
+                return web.Response(status=503)
+            return web.json_response([{"name": "a"}])
+
+        async def task_handler(request):
+            return web.Response(status=404)
+
+        async def run():
+            app = web.Application()
+            app.router.add_get("/rest/v2/builds/{build_id}/tasks", tasks_handler)
+            app.router.add_get("/rest/v2/tasks/{task_id}", task_handler)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            port = site._server.sockets[0].getsockname()[1]
+            registry = under_test.MetricsRegistry()
+            try:
+                async with ClientSession(raise_for_status=True) as session:
+                    api = AioEvergreenApi(
+                        session,
+                        f"http://127.0.0.1:{port}",
+                        hooks=under_test.MetricsHooks(registry),
+                        retry=RetryPolicy(base_backoff=0),
+                    )
+                    items = [item async for item in await api.raw_iterator("builds/b1/tasks")]
+                    with pytest.raises(ClientResponseError):
+                        await api.task_by_id("t1")
+            finally:
+                await runner.cleanup()
+            return items, registry
+
+        items, registry = asyncio.run(run())
+
+        tasks = {"endpoint": "builds/{id}/tasks"}
+        task = {"endpoint": "tasks/{id}"}
+        assert len(items) == 1
+        assert registry.counter("evg_requests_total", {**tasks, "status": "503"}) == 1
+        assert registry.counter("evg_requests_total", {**tasks, "status": "200"}) == 1
+        assert registry.counter("evg_requests_total", {**task, "status": "404"}) == 1
+        assert registry.histogram("evg_request_seconds", tasks).count == 2
+        assert registry.histogram("evg_request_seconds", task).count == 1
+
+    def test_parse_is_timed(self):
+        registry = under_test.MetricsRegistry()
+        parser = under_test.timed_parser(len, "EvgTask", under_test.MetricsHooks(registry))
+
+        assert parser([1, 2]) == 2
+        assert registry.histogram("evg_parse_seconds", {"model": "EvgTask"}).count == 1
@@ -0,0 +1,21 @@
+"""Unit tests for json_decoder.py"""
+import pytest
+
+import evg.json_decoder as under_test
+
+
+class TestGetDefaultJsonDecoder:
+    def test_decoder_decodes_bytes(self):
+        decoder = under_test.get_default_json_decoder()
+
+        assert decoder(b'[{"a": 1}]') == [{"a": 1}]
+
+
+class TestIsEmptyJsonList:
+    @pytest.mark.parametrize("body", [b"", b"[]", b"[ ]\n", b"null"])
+    def test_empty_bodies(self, body):
+        assert under_test.is_empty_json_list(body)
+
+    @pytest.mark.parametrize("body", [b'[{"a": 1}]', b'{"a": 1}'])
+    def test_non_empty_bodies(self, body):
+        assert not under_test.is_empty_json_list(body)
@@ -0,0 +1,140 @@
+"""Unit tests for log_download.py"""
+import asyncio
+
+import pytest
+from aiohttp import ClientPayloadError, ClientResponseError, ClientSession, web
+
+import evg.log_download as under_test
+
+DATA = b"".join(b"log line %d\n" % i for i in range(1000))
+
+
+def _make_app(requests, data=DATA, cut_first_response_at=None):
+    async def handler(request):
+        requests.append(request.headers.get("Range"))
+        start = 0
+        status = 200
+        headers = {}
+        if "Range" in request.headers:
+            start = int(request.headers["Range"][len("bytes=") : -1])
+            if start >= len(data):
+                return web.Response(status=416, headers={"Content-Range": f"bytes */{len(data)}"})
+            status = 206
+            headers["Content-Range"] = f"bytes {start}-{len(data) - 1}/{len(data)}"
+        body = data[start:]
+        response = web.StreamResponse(status=status, headers=headers)
+        response.content_length = len(body)
+        await response.prepare(request)
+        if cut_first_response_at is not None and len(requests) == 1:
+            await response.write(body[:cut_first_response_at])
+            request.transport.close()
+            return response
+        await response.write(body)
+        return response
+
+    app = web.Application()
+    app.router.add_get("/log", handler)
+    return app
+
+
+def _download(app, path, raise_for_status=False, **kwargs):
+    async def run():
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            async with ClientSession(raise_for_status=raise_for_status) as session:
+                return await under_test.download_to_file(
+                    session, f"http://127.0.0.1:{port}/log", path, **kwargs
+                )
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(run())
+
+
+class TestParseContentRange:
+    @pytest.mark.parametrize(
+        "value,expected",
+        [
+            ("bytes 100-199/200", {"start": 100, "total": 200}),
+            ("bytes */200", {"total": 200}),
+            ("bytes 0-9/*", None),
+            (None, None),
+        ],
+    )
+    def test_parse(self, value, expected):
+        assert under_test.parse_content_range(value) == expected
+
+
+class TestDownloadToFile:
+    def test_full_download(self, tmp_path):
+        requests = []
+        path = tmp_path / "task.log"
+
+        result = _download(_make_app(requests), path)
+
+        assert path.read_bytes() == DATA
+        assert result == (path, len(DATA), 0)
+        assert requests == [None]
+        assert not under_test.partial_path(path).exists()
+
+    def test_resumes_partial_download(self, tmp_path):
+        requests = []
+        path = tmp_path / "task.log"
+        under_test.partial_path(path).write_bytes(DATA[:100])
+
+        result = _download(_make_app(requests), path)
+
+        assert path.read_bytes() == DATA
+        assert result.resumed_from == 100
+        assert requests == ["bytes=100-"]
+
+    @pytest.mark.parametrize("raise_for_status", [False, True])
+    def test_complete_partial_download_is_not_downloaded_again(self, tmp_path, raise_for_status):
+        requests = []
+        path = tmp_path / "task.log"
+        under_test.partial_path(path).write_bytes(DATA)
+
+        _download(_make_app(requests), path, raise_for_status)
+
+        assert path.read_bytes() == DATA
+        assert requests == [f"bytes={len(DATA)}-"]
+
+    @pytest.mark.parametrize("raise_for_status", [False, True])
+    def test_partial_file_larger_than_log_is_replaced(self, tmp_path, raise_for_status):
+        requests = []
+        path = tmp_path / "task.log"
+        under_test.partial_path(path).write_bytes(DATA + b"extra")
+
+        _download(_make_app(requests), path, raise_for_status)
+
+        assert path.read_bytes() == DATA
+        assert requests == [f"bytes={len(DATA) + 5}-", None]
+
+    def test_interrupted_download_is_resumed(self, tmp_path):
+        requests = []
+        path = tmp_path / "task.log"
+
+        _download(_make_app(requests, cut_first_response_at=500), path)
+
+        assert path.read_bytes() == DATA
+        assert requests == [None, "bytes=500-"]
+
+    def test_missing_log_raises(self, tmp_path):
+        app = web.Application()
+
+        with pytest.raises(ClientResponseError):
+            _download(app, tmp_path / "task.log", raise_for_status=True)
+
+    def test_incomplete_download_raises_after_max_attempts(self, tmp_path):
+        requests = []
+        path = tmp_path / "task.log"
+
+        with pytest.raises(ClientPayloadError):
+            _download(_make_app(requests, cut_first_response_at=500), path, max_attempts=1)
+
+        assert not path.exists()
+        assert under_test.partial_path(path).read_bytes() == DATA[:500]
@@ -0,0 +1,143 @@
+"""Unit tests for log_search.py"""
+import asyncio
+
+import pytest
+
+import evg.log_search as under_test
+
+LOG = b"".join(b"line %d\n" % i for i in range(1, 21))
+
+
+def _scan(scanner, data, chunk_size):
+    matches = []
+    for i in range(0, len(data), chunk_size):
+        matches.extend(scanner.feed(data[i : i + chunk_size]))
+    matches.extend(scanner.finish())
+    return matches
+
+
+class FakeApi:
+    def __init__(self, logs):
+        self.logs = logs
+        self.bytes_read = {}
+
+    async def stream_log_chunks(self, log_url, chunk_size=4):
+        data = self.logs[log_url]
+        for i in range(0, len(data), chunk_size):
+            self.bytes_read[log_url] = i + chunk_size
+            await asyncio.sleep(0)
+            yield data[i : i + chunk_size]
+
+
+class TestLogScanner:
+    @pytest.mark.parametrize("chunk_size", [1, 5, 7, len(LOG)])
+    def test_matches_are_independent_of_chunking(self, chunk_size):
+        scanner = under_test.LogScanner([rb"line 1\d", "line 3$"])
+
+        matches = _scan(scanner, LOG, chunk_size)
+
+        assert [m.line_number for m in matches] == [3] + list(range(10, 20))
+        assert matches[0].line == b"line 3"
+        assert matches[0].pattern == b"line 3$"
+        assert matches[1].pattern == rb"line 1\d"
+
+    def test_line_matching_several_patterns_is_reported_once(self):
+        scanner = under_test.LogScanner(["line", "5"])
+
+        matches = _scan(scanner, LOG, 8)
+
+        assert len(matches) == 20
+        assert matches[4].pattern == b"line"
+
+    @pytest.mark.parametrize("chunk_size", [1, 6, len(LOG)])
+    def test_context(self, chunk_size):
+        scanner = under_test.LogScanner(["line 5$", "line 7$"], before_context=2, after_context=3)
+
+        matches = _scan(scanner, LOG, chunk_size)
+
+        assert [m.line_number for m in matches] == [5, 7]
+        assert matches[0].before == [b"line 3", b"line 4"]
+        assert matches[0].after == [b"line 6", b"line 7", b"line 8"]
+        assert matches[1].before == [b"line 5", b"line 6"]
+        assert matches[1].after == [b"line 8", b"line 9", b"line 10"]
+
+    def test_context_is_truncated_at_the_ends_of_the_log(self):
+        scanner = under_test.LogScanner(["line 1$", "line 20"], before_context=2, after_context=2)
+
+        matches = _scan(scanner, LOG, 16)
+
+        assert matches[0].before == []
+        assert matches[1].after == []
+
+    def test_last_line_without_line_ending(self):
+        scanner = under_test.LogScanner(["end"])
+
+        matches = _scan(scanner, b"start\nend", 3)
+
+        assert [(m.line_number, m.line) for m in matches] == [(2, b"end")]
+
+    def test_max_matches_stops_searching(self):
+        scanner = under_test.LogScanner(["line"], after_context=1, max_matches=2)
+
+        first = scanner.feed(LOG[:14])
+        assert not scanner.done
+        second = scanner.feed(LOG[14:])
+
+        assert [m.line_number for m in first + second] == [1, 2]
+        assert second[0].after == [b"line 3"]
+        assert scanner.done
+        assert scanner.finish() == []
+
+    def test_ignore_case(self):
+        scanner = under_test.LogScanner(["ERROR"], ignore_case=True)
+
+        matches = _scan(scanner, b"ok\nan error occurred\n", 64)
+
+        assert [m.text() for m in matches] == ["an error occurred"]
+
+    def test_patterns_are_required(self):
+        with pytest.raises(ValueError):
+            under_test.LogScanner([])
+
+
+class TestSearchLog:
+    def test_matches_are_tagged_with_their_log(self):
+        api = FakeApi({"url": LOG})
+        query = under_test.LogQuery(["line 2$"])
+
+        async def run():
+            return [m async for m in under_test.search_log(api, "url", query, "t1", "task_log")]
+
+        matches = asyncio.run(run())
+
+        assert [(m.line, m.log_url, m.task_id, m.log_type) for m in matches] == [
+            (b"line 2", "url", "t1", "task_log")
+        ]
+
+    def test_download_stops_after_max_matches(self):
+        api = FakeApi({"url": LOG})
+        query = under_test.LogQuery(["line"], max_matches=1)
+
+        async def run():
+            return [m async for m in under_test.search_log(api, "url", query)]
+
+        matches = asyncio.run(run())
+
+        assert len(matches) == 1
+        assert api.bytes_read["url"] < len(LOG)
+
+    def test_search_logs_searches_every_log(self):
+        api = FakeApi({"a": b"x\nerror 1\n", "b": b"error 2\ny\n", "c": b"nothing\n"})
+        query = under_test.LogQuery(["error"])
+
+        async def run():
+            return [
+                m
+                async for m in under_test.search_logs(
+                    api, ["a", "b", "c"], query, max_concurrency=2, ordered=True
+                )
+            ]
+
+        matches = asyncio.run(run())
+
+        assert [(m.log_url, m.line) for m in matches] == [("a", b"error 1"), ("b", b"error 2")]
@@ -0,0 +1,56 @@
+"""Unit tests for loop_monitor.py"""
+import asyncio
+import time
+
+import evg.loop_monitor as under_test
+
+
+def _block(seconds):
+    start = time.perf_counter()
+    time.sleep(seconds)
+    if under_test.is_monitoring():
+        under_test.record_work("builds/{id}/tasks", "EvgTask", time.perf_counter() - start)
+
+
+class TestStallMonitor:
+    def test_stalls_are_attributed_to_recorded_work(self):
+        stalls = []
+
+        async def run():
+            async with under_test.StallMonitor(
+                threshold=0.05, interval=0.01, on_stall=stalls.append
+            ):
+                await asyncio.sleep(0.02)
+                with under_test.operation("dashboard"):
+                    _block(0.1)
+                await asyncio.sleep(0.02)
+
+        asyncio.run(run())
+
+        assert len(stalls) == 1
+        assert stalls[0].seconds >= 0.05
+        culprit = stalls[0].culprits[0]
+        assert (culprit.call, culprit.model, culprit.operation) == (
+            "builds/{id}/tasks",
+            "EvgTask",
+            "dashboard",
+        )
+        assert "EvgTask for builds/{id}/tasks in dashboard" in str(stalls[0])
+
+    def test_no_stalls_when_loop_is_free(self):
+        async def run():
+            async with under_test.StallMonitor(threshold=0.05, interval=0.01) as monitor:
+                await asyncio.sleep(0.05)
+            return monitor
+
+        monitor = asyncio.run(run())
+
+        assert monitor.n_stalls == 0
+        assert not under_test.is_monitoring()
+
+    def test_operation_is_reset(self):
+        with under_test.operation("outer"):
+            with under_test.operation("inner"):
+                assert under_test.current_operation.get() == "inner"
+            assert under_test.current_operation.get() == "outer"
+        assert under_test.current_operation.get() is None
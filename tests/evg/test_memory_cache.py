@@ -0,0 +1,108 @@
+"""Unit tests for memory_cache.py"""
+import asyncio
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import evg.memory_cache as under_test
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAsyncLruCache:
+    def test_concurrent_loads_are_coalesced(self):
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "value"
+
+        async def run():
+            cache = under_test.AsyncLruCache()
+            results = await asyncio.gather(*[cache.get_or_load("k", loader) for _ in range(5)])
+            return cache, results
+
+        cache, results = asyncio.run(run())
+
+        assert results == ["value"] * 5
+        assert calls == 1
+        assert cache.stats.misses == 1
+        assert cache.stats.coalesced == 4
+        assert cache.n_in_flight == 0
+
+    def test_cached_values_are_hits(self):
+        async def loader():
+            return "value"
+
+        async def run():
+            cache = under_test.AsyncLruCache()
+            await cache.get_or_load("k", loader)
+            await cache.get_or_load("k", loader)
+            return cache
+
+        cache = asyncio.run(run())
+
+        assert cache.stats.hits == 1
+        assert cache.stats.misses == 1
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = under_test.AsyncLruCache(max_entries=2)
+
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+        assert len(cache) == 2
+
+    def test_entries_expire(self):
+        clock = FakeClock()
+        cache = under_test.AsyncLruCache(ttl_fn=lambda v: 10, clock=clock)
+
+        cache.put("a", 1)
+        clock.now = 9
+        assert cache.get("a") == 1
+        clock.now = 10
+        assert cache.get("a") is None
+
+    def test_failed_loads_are_not_cached(self):
+        async def loader():
+            raise ValueError("failed")
+
+        async def run():
+            cache = under_test.AsyncLruCache()
+            for _ in range(2):
+                try:
+                    await cache.get_or_load("k", loader)
+                except ValueError:
+                    pass
+            return cache
+
+        cache = asyncio.run(run())
+
+        assert cache.stats.misses == 2
+        assert len(cache) == 0
+
+
+class TestTaskCache:
+    def test_active_tasks_use_short_ttl(self):
+        cache = under_test.TaskCache(active_ttl=5, finished_ttl=100)
+        task = MagicMock(finish_time=None, is_active=lambda: True)
+
+        assert cache._task_ttl(task) == 5
+
+    def test_finished_tasks_use_long_ttl(self):
+        cache = under_test.TaskCache(active_ttl=5, finished_ttl=100)
+        task = MagicMock(finish_time=datetime(2020, 9, 1), is_active=lambda: False)
+
+        assert cache._task_ttl(task) == 100
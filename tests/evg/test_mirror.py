@@ -0,0 +1,237 @@
+"""Unit tests for mirror.py"""
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+import evg.mirror as under_test
+from evg.models.evg_patch import EvgPatch
+from evg.models.evg_task import EvgTask
+from evg.models.evg_version import EvgVersion, Requester
+
+PROJECT = "mongodb-mongo-master"
+
+
+def _version(order, status="success", requester="gitter_request"):
+    return EvgVersion.construct(
+        version_id=f"v{order}",
+        project=PROJECT,
+        order=order,
+        status=status,
+        requester=requester,
+        revision=f"rev{order}",
+        build_variants_status=[
+            {"build_variant": "linux", "build_id": f"b{order}_linux"},
+            {"build_variant": "windows", "build_id": f"b{order}_windows"},
+        ],
+    )
+
+
+def _task(order, variant, name, status):
+    return EvgTask.construct(
+        task_id=f"{name}_{variant}_{order}",
+        project_id=PROJECT,
+        version_id=f"v{order}",
+        build_id=f"b{order}_{variant}",
+        build_variant=variant,
+        display_name=name,
+        status=status,
+        revision=f"rev{order}",
+        order=order,
+    )
+
+
+def _patch(number, status="success"):
+    return EvgPatch.construct(
+        patch_id=f"p{number}",
+        project_id=PROJECT,
+        author="someone",
+        status=status,
+        patch_number=number,
+        create_time=f"2020-09-{number:02d}T00:00:00Z",
+    )
+
+
+def _ids(models, attribute):
+    return [getattr(model, attribute) for model in models]
+
+
+@pytest.fixture()
+def mirror():
+    mirror = under_test.EvgMirror(":memory:", validate_models=False)
+    yield mirror
+    mirror.close()
+
+
+class TestEvgMirror:
+    def test_versions_are_returned_newest_first(self, mirror):
+        mirror.add_versions([_version(1), _version(3), _version(2)])
+
+        assert _ids(mirror.versions(PROJECT), "version_id") == ["v3", "v2", "v1"]
+        assert _ids(mirror.versions(PROJECT, limit=1), "version_id") == ["v3"]
+        assert _ids(mirror.versions(PROJECT, min_order=2), "version_id") == ["v3", "v2"]
+
+    def test_versions_are_filtered_by_requester(self, mirror):
+        mirror.add_versions([_version(1), _version(2, requester="patch_request")])
+
+        assert _ids(mirror.versions(PROJECT), "version_id") == ["v1"]
+        patches = mirror.versions(PROJECT, requester=Requester.PATCH_REQUEST)
+        assert _ids(patches, "version_id") == ["v2"]
+        assert len(mirror.versions(PROJECT, requester=None)) == 2
+
+    def test_updated_records_replace_old_ones(self, mirror):
+        mirror.add_versions([_version(1, "started")])
+        mirror.add_versions([_version(1, "failed")])
+
+        assert mirror.version("v1").status == "failed"
+        assert mirror.counts()["versions"] == 1
+
+    def test_tasks_are_filtered(self, mirror):
+        mirror.add_tasks(
+            [
+                _task(1, "linux", "jsCore", "failed"),
+                _task(1, "windows", "jsCore", "failed"),
+                _task(2, "linux", "jsCore", "success"),
+                _task(2, "linux", "aggregation", "failed"),
+            ]
+        )
+
+        failed_linux = mirror.tasks(PROJECT, build_variant="linux", status="failed")
+        assert _ids(failed_linux, "task_id") == ["aggregation_linux_2", "jsCore_linux_1"]
+        js_core = mirror.tasks(display_name="jsCore", status=["success", "failed"])
+        assert len(js_core) == 3
+        assert _ids(mirror.tasks(revision="rev2", limit=1), "task_id") == ["aggregation_linux_2"]
+        assert mirror.task("jsCore_windows_1").build_variant == "windows"
+        assert mirror.task("missing") is None
+
+    def test_tasks_of_last_versions(self, mirror):
+        mirror.add_versions([_version(i) for i in range(1, 6)])
+        mirror.add_versions([_version(6, requester="patch_request")])
+        mirror.add_tasks([_task(i, "linux", "jsCore", "failed") for i in range(1, 7)])
+
+        tasks = mirror.tasks(PROJECT, status="failed", last_versions=2)
+
+        assert _ids(tasks, "version_id") == ["v5", "v4"]
+
+    def test_last_versions_requires_project(self, mirror):
+        with pytest.raises(ValueError):
+            mirror.tasks(last_versions=2)
+
+    def test_versions_missing_tasks(self, mirror):
+        mirror.add_versions([_version(1), _version(2), _version(3, "started")])
+        mirror.mark_tasks_synced(["v1"])
+
+        assert _ids(mirror.versions_missing_tasks(PROJECT), "version_id") == ["v2"]
+
+    def test_patches(self, mirror):
+        mirror.add_patches([_patch(1), _patch(2, "failed"), _patch(3, "started")])
+
+        assert _ids(mirror.patches(PROJECT), "patch_id") == ["p3", "p2", "p1"]
+        assert _ids(mirror.patches(status="failed"), "patch_id") == ["p2"]
+        assert mirror.patch_status("p3") == "started"
+        assert mirror.patch_status("p4") is None
+
+    def test_models_are_validated(self, tmp_path):
+        mirror = under_test.EvgMirror(tmp_path / "mirror.db")
+        version = EvgVersion(
+            version_id="v1",
+            create_time="2020-09-01T00:00:00Z",
+            revision="abc",
+            order=1,
+            project=PROJECT,
+            author="author",
+            author_email="author@example.com",
+            message="message",
+            status="success",
+            repo="mongo",
+            branch="master",
+            errors=[],
+            requester="gitter_request",
+            build_variants_status=[{"build_variant": "linux", "build_id": "b1"}],
+        )
+        mirror.add_versions([version])
+        mirror.close()
+
+        stored = under_test.EvgMirror(tmp_path / "mirror.db").version("v1")
+
+        assert stored == version
+        assert stored.create_time == datetime(2020, 9, 1, tzinfo=timezone.utc)
+        assert stored.get_build_ids() == ["b1"]
+
+
+class FakeApi:
+    def __init__(self, versions, tasks, patches=()):
+        self.versions = {v.version_id: v for v in versions}
+        self.tasks = tasks
+        self.patches = list(patches)
+        self.task_queries = []
+
+    async def versions_by_project(self, project_id, requester):
+        return self._iterate(sorted(self.versions.values(), key=lambda v: -v.order))
+
+    async def version_by_id(self, version_id):
+        return self.versions[version_id]
+
+    async def tasks_for_versions(self, versions, max_concurrency):
+        version_ids = [version.version_id for version in versions]
+        self.task_queries.append(version_ids)
+        return self._iterate([task for task in self.tasks if task.version_id in version_ids])
+
+    async def patches_by_project(self, project_id):
+        return self._iterate(self.patches)
+
+    async def _iterate(self, items):
+        for item in items:
+            yield item
+
+
+class TestMirrorSync:
+    def test_tasks_are_stored_once_versions_complete(self, mirror):
+        api = FakeApi(
+            [_version(1), _version(2), _version(3, "started")],
+            [_task(i, "linux", "jsCore", "success") for i in range(1, 4)],
+        )
+        sync = under_test.MirrorSync(api, mirror, batch_size=1)
+
+        summary = asyncio.run(sync.sync_project(PROJECT))
+
+        assert summary == under_test.SyncSummary(n_versions=3, n_tasks=2)
+        assert api.task_queries == [["v2"], ["v1"]]
+        assert _ids(mirror.tasks(PROJECT), "task_id") == ["jsCore_linux_2", "jsCore_linux_1"]
+
+        api.versions["v3"] = _version(3, "failed")
+        summary = asyncio.run(sync.sync_project(PROJECT))
+
+        assert summary == under_test.SyncSummary(n_versions=1, n_tasks=1)
+        assert api.task_queries[-1] == ["v3"]
+        assert mirror.version("v3").status == "failed"
+
+    def test_patches_stop_at_stored_final_patch(self, mirror):
+        api = FakeApi([], [], [_patch(3, "started"), _patch(2), _patch(1)])
+        sync = under_test.MirrorSync(api, mirror)
+
+        assert asyncio.run(sync.sync_patches(PROJECT)) == 3
+
+        api.patches = [_patch(4), _patch(3), _patch(2), _patch(1)]
+        assert asyncio.run(sync.sync_patches(PROJECT)) == 2
+        assert mirror.patch_status("p3") == "success"
+
+    def test_unfinished_patches_behind_finished_patches_are_refreshed(self, mirror):
+        api = FakeApi([], [], [_patch(1, "started")])
+        sync = under_test.MirrorSync(api, mirror)
+        asyncio.run(sync.sync_patches(PROJECT))
+        api.patches = [_patch(2), _patch(1, "started")]
+        asyncio.run(sync.sync_patches(PROJECT))
+
+        api.patches = [_patch(2), _patch(1)]
+        assert asyncio.run(sync.sync_patches(PROJECT)) == 1
+        assert mirror.patch_status("p1") == "success"
+        assert mirror.oldest_unfinished_patch(PROJECT) is None
+
+    def test_patches_stop_at_stored_patch_with_legacy_status(self, mirror):
+        api = FakeApi([], [], [_patch(2, "succeeded"), _patch(1, "succeeded")])
+        sync = under_test.MirrorSync(api, mirror)
+        asyncio.run(sync.sync_patches(PROJECT))
+
+        api.patches = [_patch(3), _patch(2, "succeeded"), _patch(1, "succeeded")]
+        assert asyncio.run(sync.sync_patches(PROJECT)) == 1
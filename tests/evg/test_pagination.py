@@ -0,0 +1,198 @@
+"""Unit tests for pagination.py"""
+import asyncio
+
+import pytest
+
+import evg.pagination as under_test
+
+
+class TestPrefetchConfig:
+    def test_max_pages_must_be_positive(self):
+        with pytest.raises(ValueError):
+            under_test.PrefetchConfig(max_pages=0)
+
+
+class TestPageBuffer:
+    def test_pages_are_returned_in_order(self):
+        async def run():
+            buffer = under_test.PageBuffer(under_test.PrefetchConfig(max_pages=3))
+            for i in range(3):
+                await buffer.put(i, 1, 1)
+            await buffer.close()
+            return [await buffer.get() for _ in range(4)]
+
+        assert asyncio.run(run()) == [0, 1, 2, None]
+
+    def test_no_room_once_max_pages_buffered(self):
+        async def run():
+            buffer = under_test.PageBuffer(under_test.PrefetchConfig(max_pages=2))
+            await buffer.put("a", 1, 1)
+            await buffer.wait_for_room()
+            await buffer.put("b", 1, 1)
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(buffer.wait_for_room(), 0.01)
+            await buffer.get()
+            await asyncio.wait_for(buffer.wait_for_room(), 0.01)
+
+        asyncio.run(run())
+
+    def test_no_room_once_max_items_buffered(self):
+        async def run():
+            config = under_test.PrefetchConfig(max_pages=10, max_items=5)
+            buffer = under_test.PageBuffer(config)
+            await buffer.put("a", 5, 1)
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(buffer.wait_for_room(), 0.01)
+            assert buffer.n_items == 5
+
+        asyncio.run(run())
+
+    def test_no_room_once_max_bytes_buffered(self):
+        async def run():
+            config = under_test.PrefetchConfig(max_pages=10, max_bytes=100)
+            buffer = under_test.PageBuffer(config)
+            await buffer.put("a", 1, 60)
+            await buffer.wait_for_room()
+            await buffer.put("b", 1, 60)
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(buffer.wait_for_room(), 0.01)
+            assert buffer.n_bytes == 120
+
+        asyncio.run(run())
+
+    def test_empty_buffer_always_has_room(self):
+        async def run():
+            config = under_test.PrefetchConfig(max_pages=1, max_items=0, max_bytes=0)
+            buffer = under_test.PageBuffer(config)
+            await asyncio.wait_for(buffer.wait_for_room(), 0.01)
+
+        asyncio.run(run())
+
+    def test_error_is_raised_after_buffered_pages(self):
+        async def run():
+            buffer = under_test.PageBuffer(under_test.PrefetchConfig(max_pages=2))
+            await buffer.put("a", 1, 1)
+            await buffer.close(ValueError("failed"))
+            assert await buffer.get() == "a"
+            with pytest.raises(ValueError):
+                await buffer.get()
+
+        asyncio.run(run())
+
+
+def _fetch_pages(pages, requested):
+    async def fetch_pages(start_url):
+        requested.append(start_url)
+        index = int(start_url.split("page=")[1])
+        for i in range(index, len(pages)):
+            next_link = f"http://evg/rest/v2/items?page={i + 1}" if i + 1 < len(pages) else None
+            yield pages[i], next_link
+
+    return fetch_pages
+
+
+def _collect(iterator, n=None):
+    async def run():
+        items = []
+        async for item in iterator:
+            items.append(item)
+            if n is not None and len(items) == n:
+                break
+        return items
+
+    return asyncio.run(run())
+
+
+class TestPageCursor:
+    def test_token_round_trip(self):
+        cursor = under_test.PageCursor("http://evg/rest/v2/items?page=2", 3)
+
+        assert under_test.PageCursor.from_token(cursor.to_token()) == cursor
+
+
+class TestPaginatedIterator:
+    PAGES = [[0, 1, 2], [3, 4, 5], [6, 7]]
+    URL = "http://evg/rest/v2/items?page=0"
+
+    def test_items_are_transformed(self):
+        iterator = under_test.PaginatedIterator(
+            self.URL, _fetch_pages(self.PAGES, []), lambda x: x * 10
+        )
+
+        assert _collect(iterator) == [0, 10, 20, 30, 40, 50, 60, 70]
+        assert iterator.cursor is None
+
+    def test_cursor_points_at_next_item(self):
+        iterator = under_test.PaginatedIterator(self.URL, _fetch_pages(self.PAGES, []), str)
+        assert iterator.cursor == under_test.PageCursor(self.URL, 0)
+
+        _collect(iterator, 5)
+
+        assert iterator.cursor == under_test.PageCursor("http://evg/rest/v2/items?page=1", 2)
+
+    def test_resume_after_last_item_of_page(self):
+        first = under_test.PaginatedIterator(self.URL, _fetch_pages(self.PAGES, []), str)
+        _collect(first, 3)
+        second = under_test.PaginatedIterator(self.URL, _fetch_pages(self.PAGES, []), str)
+
+        second.resume_from(first.cursor)
+
+        assert _collect(second) == ["3", "4", "5", "6", "7"]
+
+    def test_resume_from_cursor(self):
+        first = under_test.PaginatedIterator(self.URL, _fetch_pages(self.PAGES, []), str)
+        _collect(first, 4)
+        requested = []
+        second = under_test.PaginatedIterator(self.URL, _fetch_pages(self.PAGES, requested), str)
+
+        second.resume_from(under_test.PageCursor.from_token(first.cursor.to_token()))
+
+        assert _collect(second) == ["4", "5", "6", "7"]
+        assert requested == ["http://evg/rest/v2/items?page=1"]
+
+    def test_resume_from_cursor_of_other_request(self):
+        iterator = under_test.PaginatedIterator(self.URL, _fetch_pages(self.PAGES, []), str)
+
+        with pytest.raises(ValueError):
+            iterator.resume_from(under_test.PageCursor("http://evg/rest/v2/other?page=1"))
+
+    def test_cannot_resume_after_starting(self):
+        iterator = under_test.PaginatedIterator(self.URL, _fetch_pages(self.PAGES, []), str)
+        _collect(iterator, 1)
+
+        with pytest.raises(RuntimeError):
+            iterator.resume_from(under_test.PageCursor(self.URL))
+
+
+class TestCooperativeConfig:
+    def test_a_limit_is_required(self):
+        with pytest.raises(ValueError):
+            under_test.CooperativeConfig(max_items=None, max_seconds=None)
+
+
+class TestCooperativeIteration:
+    def test_other_tasks_run_between_items(self):
+        pages = [list(range(10))]
+
+        async def run(cooperative):
+            ticks = []
+            iterator = under_test.PaginatedIterator(
+                "http://evg/rest/v2/items?page=0", _fetch_pages(pages, []), str, cooperative
+            )
+
+            async def ticker():
+                while True:
+                    ticks.append(len(ticks))
+                    await asyncio.sleep(0)
+
+            task = asyncio.create_task(ticker())
+            await asyncio.sleep(0)
+            n_ticks = []
+            async for _ in iterator:
+                n_ticks.append(len(ticks))
+            task.cancel()
+            return n_ticks
+
+        cooperative = under_test.CooperativeConfig(max_items=3, max_seconds=None)
+        assert len(set(asyncio.run(run(None)))) == 1
+        assert len(set(asyncio.run(run(cooperative)))) == 4
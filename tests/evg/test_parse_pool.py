@@ -0,0 +1,94 @@
+"""Unit tests for parse_pool.py"""
+import asyncio
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import evg.parse_pool as under_test
+from evg.json_decoder import stdlib_json_decoder
+from evg.models.evg_version import EvgVersion
+from evg.models.parsing import ModelParser
+
+
+def _version(index):
+    return {
+        "version_id": f"v{index}",
+        "order": index,
+        "build_variants_status": [{"build_variant": "linux", "build_id": f"b{index}"}],
+    }
+
+
+def _page(start, size):
+    return json.dumps([_version(i) for i in range(start, start + size)]).encode()
+
+
+def _offset_decoder(body):
+    items = json.loads(body)
+    for item in items:
+        item["order"] += 1000
+    return items
+
+
+async def _bodies(pages):
+    for index, body in enumerate(pages):
+        yield body, f"next_{index}"
+
+
+def _parse(pool, pages, parse_fn, decoder=stdlib_json_decoder):
+    async def run():
+        return [
+            (items, next_link)
+            async for items, next_link in pool.parse_pages(_bodies(pages), parse_fn, decoder)
+        ]
+
+    return asyncio.run(run())
+
+
+class TestParsePage:
+    def test_items_are_converted(self):
+        items = under_test.parse_page(_page(0, 3), ModelParser(EvgVersion, validate=False))
+
+        assert [item.version_id for item in items] == ["v0", "v1", "v2"]
+
+
+@pytest.fixture(scope="module")
+def executor():
+    with ProcessPoolExecutor(2) as executor:
+        yield executor
+
+
+class TestParsePool:
+    def test_pages_are_returned_in_order(self, executor):
+        pages = [_page(0, 50), _page(50, 1), _page(51, 50), _page(101, 1)]
+        pool = under_test.ParsePool(min_offload_bytes=1000, executor=executor)
+
+        results = _parse(pool, pages, ModelParser(EvgVersion, validate=False))
+
+        assert [link for _, link in results] == ["next_0", "next_1", "next_2", "next_3"]
+        versions = [version for items, _ in results for version in items]
+        assert [version.order for version in versions] == list(range(102))
+        assert versions[0].get_build_ids() == ["b0"]
+
+    def test_decoder_is_used_for_all_pages(self, executor):
+        pages = [_page(0, 50), _page(50, 1)]
+        pool = under_test.ParsePool(min_offload_bytes=1000, executor=executor)
+
+        results = _parse(pool, pages, ModelParser(EvgVersion, validate=False), _offset_decoder)
+
+        versions = [version for items, _ in results for version in items]
+        assert [version.order for version in versions] == list(range(1000, 1051))
+
+    def test_errors_are_raised(self, executor):
+        pool = under_test.ParsePool(min_offload_bytes=0, executor=executor)
+
+        with pytest.raises(ValueError):
+            _parse(pool, [_page(0, 5)], ModelParser(EvgVersion, validate=True))
+
+    def test_small_pages_are_parsed_in_loop(self):
+        pool = under_test.ParsePool(min_offload_bytes=10_000)
+
+        results = _parse(pool, [_page(0, 2)], ModelParser(EvgVersion, validate=False))
+
+        assert [version.order for version in results[0][0]] == [0, 1]
+        assert pool._executor is None
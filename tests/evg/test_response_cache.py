@@ -0,0 +1,111 @@
+"""Unit tests for response_cache.py"""
+from datetime import datetime, timedelta
+
+import evg.response_cache as under_test
+
+API = "https://evergreen.example.com/rest/v2"
+SHORT_TTL = 60
+
+
+def _finished_task(task_id):
+    return {"task_id": task_id, "status": "failed", "finish_time": "2020-09-01T00:00:00Z"}
+
+
+def _running_task(task_id):
+    return {"task_id": task_id, "status": "started", "finish_time": None}
+
+
+class TestDefaultTtlPolicy:
+    def test_manifests_are_immutable(self):
+        url = f"{API}/tasks/t1/manifest"
+
+        assert under_test.default_ttl_policy(url, None, {}, SHORT_TTL) is None
+
+    def test_finished_tasks_are_immutable(self):
+        url = f"{API}/tasks/t1"
+
+        assert under_test.default_ttl_policy(url, None, _finished_task("t1"), SHORT_TTL) is None
+
+    def test_running_tasks_have_short_ttl(self):
+        url = f"{API}/tasks/t1"
+        data = _running_task("t1")
+
+        assert under_test.default_ttl_policy(url, None, data, SHORT_TTL) == SHORT_TTL
+
+    def test_pages_are_immutable_only_if_all_items_completed(self):
+        url = f"{API}/builds/b1/tasks"
+        finished = [_finished_task("t1"), _finished_task("t2")]
+        mixed = [_finished_task("t1"), _running_task("t2")]
+
+        assert under_test.default_ttl_policy(url, None, finished, SHORT_TTL) is None
+        assert under_test.default_ttl_policy(url, None, mixed, SHORT_TTL) == SHORT_TTL
+
+    def test_project_versions_have_short_ttl(self):
+        url = f"{API}/projects/p1/versions"
+        data = [{"version_id": "v1", "status": "success"}]
+
+        assert under_test.default_ttl_policy(url, None, data, SHORT_TTL) == SHORT_TTL
+
+    def test_stats_in_the_past_are_immutable(self):
+        url = f"{API}/projects/p1/test_stats"
+        past = {"before_date": "2020-09-01"}
+        future = {"before_date": (datetime.utcnow() + timedelta(days=1)).strftime("%Y-%m-%d")}
+
+        assert under_test.default_ttl_policy(url, past, [], SHORT_TTL) is None
+        assert under_test.default_ttl_policy(url, future, [], SHORT_TTL) == SHORT_TTL
+
+
+class TestResponseCache:
+    def test_cached_responses_are_returned(self, tmp_path):
+        cache = under_test.ResponseCache(tmp_path / "cache.db")
+        url = f"{API}/tasks/t1"
+
+        assert cache.get(url, None) is None
+        cache.put(url, None, b"body", "next", _finished_task("t1"))
+        cached = cache.get(url, None)
+
+        assert cached.body == b"body"
+        assert cached.next_link == "next"
+        assert cache.stats.hits == 1
+        assert cache.stats.misses == 1
+
+    def test_params_are_part_of_key(self, tmp_path):
+        cache = under_test.ResponseCache(tmp_path / "cache.db")
+        url = f"{API}/tasks/t1/manifest"
+
+        cache.put(url, {"a": 1}, b"body", None, {})
+
+        assert cache.get(url, {"a": 1}) is not None
+        assert cache.get(url, {"a": 2}) is None
+
+    def test_responses_without_ttl_are_not_cached(self, tmp_path):
+        cache = under_test.ResponseCache(tmp_path / "cache.db", ttl_policy=lambda *_: 0)
+        url = f"{API}/tasks/t1"
+
+        cache.put(url, None, b"body", None, _running_task("t1"))
+
+        assert cache.get(url, None) is None
+
+    def test_least_recently_used_entries_are_evicted(self, tmp_path):
+        cache = under_test.ResponseCache(tmp_path / "cache.db", max_size_bytes=10)
+        urls = [f"{API}/tasks/t{i}/manifest" for i in range(3)]
+
+        cache.put(urls[0], None, b"12345", None, {})
+        cache.put(urls[1], None, b"12345", None, {})
+        cache.get(urls[0], None)
+        cache.put(urls[2], None, b"12345", None, {})
+
+        assert cache.get(urls[0], None) is not None
+        assert cache.get(urls[1], None) is None
+        assert cache.get(urls[2], None) is not None
+        assert cache.total_size == 10
+        assert cache.stats.evictions == 1
+
+    def test_cache_persists_across_instances(self, tmp_path):
+        url = f"{API}/tasks/t1/manifest"
+        under_test.ResponseCache(tmp_path / "cache.db").put(url, None, b"body", None, {})
+
+        cache = under_test.ResponseCache(tmp_path / "cache.db")
+
+        assert cache.get(url, None).body == b"body"
+        assert cache.total_size == 4
@@ -0,0 +1,97 @@
+"""Unit tests for retry.py"""
+import asyncio
+
+import pytest
+from aiohttp import ClientResponseError, ClientSession, ServerDisconnectedError, web
+from multidict import CIMultiDict
+
+import evg.retry as under_test
+from evg.api import AioEvergreenApi
+
+
+def _response_error(status, headers=None):
+    return ClientResponseError(None, (), status=status, headers=CIMultiDict(headers or {}))
+
+
+class TestRetryPolicy:
+    @pytest.mark.parametrize(
+        "error,expected",
+        [
+            (_response_error(500), True),
+            (_response_error(503), True),
+            (_response_error(404), False),
+            (ServerDisconnectedError(), True),
+            (asyncio.TimeoutError(), True),
+            (ValueError(), False),
+        ],
+    )
+    def test_is_transient(self, error, expected):
+        assert under_test.RetryPolicy().is_transient(error) == expected
+
+    def test_backoff_grows_exponentially(self):
+        policy = under_test.RetryPolicy(base_backoff=1, max_backoff=5)
+
+        assert 0 <= policy.backoff(0, ServerDisconnectedError()) <= 1
+        assert all(policy.backoff(10, ServerDisconnectedError()) <= 5 for _ in range(20))
+
+    def test_backoff_respects_retry_after(self):
+        policy = under_test.RetryPolicy(max_backoff=10)
+
+        assert policy.backoff(0, _response_error(503, {"Retry-After": "3"})) == 3
+        assert policy.backoff(0, _response_error(503, {"Retry-After": "60"})) == 10
+
+
+def _make_app(requests, failures):
+    pages = [[{"id": 0}, {"id": 1}], [{"id": 2}, {"id": 3}], [{"id": 4}]]
+
+    async def handler(request):
+        page = int(request.query.get("page", "0"))
+        requests.append(page)
+        if failures.get(page):
+            failures[page] -= 1
+            return web.Response(status=502)
+        headers = {}
+        if page + 1 < len(pages):
+            headers["Link"] = f'<{request.url.with_query(page=page + 1)}>; rel="next"'
+        return web.json_response(pages[page], headers=headers)
+
+    app = web.Application()
+    app.router.add_get("/rest/v2/items", handler)
+    return app
+
+
+def _iterate(app, retry):
+    async def run():
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            async with ClientSession() as session:
+                api = AioEvergreenApi(session, f"http://127.0.0.1:{port}", retry=retry)
+                return [item["id"] async for item in await api.raw_iterator("items")]
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(run())
+
+
+class TestApiRetries:
+    def test_failed_page_is_retried_without_restarting(self):
+        requests = []
+
+        items = _iterate(_make_app(requests, {1: 2}), under_test.RetryPolicy(base_backoff=0))
+
+        assert items == [0, 1, 2, 3, 4]
+        assert requests == [0, 1, 1, 1, 2]
+
+    def test_error_is_raised_once_retries_are_exhausted(self):
+        requests = []
+        policy = under_test.RetryPolicy(max_retries=1, base_backoff=0)
+
+        with pytest.raises(ClientResponseError) as exc_info:
+            _iterate(_make_app(requests, {1: 2}), policy)
+
+        assert exc_info.value.status == 502
+        assert requests == [0, 1, 1]
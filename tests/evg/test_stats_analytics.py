@@ -0,0 +1,144 @@
+"""Unit tests for stats_analytics.py"""
+import asyncio
+
+import pytest
+
+import evg.stats_analytics as under_test
+from evg.stats_columns import StatsColumnBuilder
+
+np = pytest.importorskip("numpy")
+
+
+def _stats(test_file, day, num_pass, num_fail, duration, variant="linux"):
+    return {
+        "test_file": test_file,
+        "task_name": "jsCore",
+        "variant": variant,
+        "distro": "ubuntu",
+        "date": f"2020-09-{day:02d}",
+        "num_pass": num_pass,
+        "num_fail": num_fail,
+        "avg_duration_pass": duration,
+    }
+
+
+def _chunks(rows, chunk_size=2):
+    builder = StatsColumnBuilder()
+    chunks = []
+    for row in rows:
+        builder.append(row)
+        if len(builder) == chunk_size:
+            chunks.append(builder.flush())
+    if len(builder):
+        chunks.append(builder.flush())
+    return chunks
+
+
+ROWS = [
+    _stats("a.js", 1, 9, 1, 10.0),
+    _stats("b.js", 1, 10, 0, 100.0),
+    _stats("a.js", 2, 8, 2, 20.0),
+    _stats("a.js", 3, 7, 3, 30.0),
+    _stats("b.js", 2, 10, 0, 100.0, variant="windows"),
+]
+
+
+class TestSummarizeStats:
+    def test_totals_and_rates(self):
+        summary = under_test.summarize_stats(_chunks(ROWS), group_by=["test_file"])
+
+        records = {r["test_file"]: r for r in summary.to_dicts()}
+        assert records["a.js"]["num_pass"] == 24
+        assert records["a.js"]["num_fail"] == 6
+        assert records["a.js"]["failure_rate"] == pytest.approx(0.2)
+        assert records["a.js"]["n_buckets"] == 3
+        assert records["b.js"]["failure_rate"] == 0
+
+    def test_duration_is_weighted_by_passes(self):
+        summary = under_test.summarize_stats(_chunks(ROWS), group_by=["test_file"])
+
+        records = {r["test_file"]: r for r in summary.to_dicts()}
+        expected = (9 * 10.0 + 8 * 20.0 + 7 * 30.0) / 24
+        assert records["a.js"]["avg_duration_pass"] == pytest.approx(expected)
+
+    def test_percentiles_and_trends(self):
+        summary = under_test.summarize_stats(
+            _chunks(ROWS), group_by=["test_file"], percentiles=[50, 100]
+        )
+
+        records = {r["test_file"]: r for r in summary.to_dicts()}
+        assert records["a.js"]["duration_p50"] == 20.0
+        assert records["a.js"]["duration_p100"] == 30.0
+        assert records["a.js"]["failure_rate_trend"] == pytest.approx(0.1)
+        assert records["a.js"]["duration_trend"] == pytest.approx(10.0)
+        assert records["b.js"]["duration_trend"] == 0
+
+    def test_buckets_without_passes_are_ignored_for_durations(self):
+        rows = ROWS + [_stats("a.js", 4, 0, 10, 0.0), _stats("a.js", 5, 0, 0, 0.0)]
+
+        summary = under_test.summarize_stats(
+            _chunks(rows), group_by=["test_file"], percentiles=[0, 50]
+        )
+
+        records = {r["test_file"]: r for r in summary.to_dicts()}
+        assert records["a.js"]["n_buckets"] == 5
+        assert records["a.js"]["duration_p0"] == 10.0
+        assert records["a.js"]["duration_p50"] == 20.0
+        assert records["a.js"]["duration_trend"] == pytest.approx(10.0)
+        assert records["a.js"]["failure_rate_trend"] == pytest.approx(0.28)
+
+    def test_group_by_multiple_columns(self):
+        summary = under_test.summarize_stats(_chunks(ROWS), group_by=["test_file", "variant"])
+
+        assert len(summary) == 3
+        assert summary.most_failing(1)[0]["test_file"] == "a.js"
+        assert summary.slowest(1)[0]["test_file"] == "b.js"
+
+    def test_group_by_without_packing(self, monkeypatch):
+        packed = under_test.summarize_stats(_chunks(ROWS), group_by=["test_file", "variant"])
+        monkeypatch.setattr(under_test, "_MAX_PACKED_GROUPS", 1)
+
+        summary = under_test.summarize_stats(_chunks(ROWS), group_by=["test_file", "variant"])
+
+        assert summary.to_dicts() == packed.to_dicts()
+
+    def test_empty_stats(self):
+        summary = under_test.summarize_stats([])
+
+        assert len(summary) == 0
+        assert summary.to_dicts() == []
+
+    def test_invalid_group_by(self):
+        with pytest.raises(ValueError):
+            under_test.summarize_stats(_chunks(ROWS), group_by=["num_pass"])
+
+
+class TestGroupRows:
+    def test_codes_too_large_to_pack_are_not_merged(self):
+        zeros = np.zeros(2, dtype=np.int32)
+
+        codes, group = under_test._group_rows([np.array([1, 0]), zeros, zeros], [2**32] * 3)
+
+        assert list(group) == [1, 0]
+        assert [list(column) for column in codes] == [[0, 1], [0, 0], [0, 0]]
+
+
+class TestAnalyzeTestStats:
+    def test_stats_are_fetched_without_models(self):
+        class FakeApi:
+            async def raw_iterator(self, endpoint, params):
+                self.endpoint = endpoint
+
+                async def rows():
+                    for row in ROWS:
+                        yield row
+
+                return rows()
+
+        api = FakeApi()
+        spec = under_test.StatsSpecification("project")
+
+        summary = asyncio.run(under_test.analyze_test_stats(api, spec, group_by=["test_file"]))
+
+        assert api.endpoint == "projects/project/test_stats"
+        assert len(summary) == 2
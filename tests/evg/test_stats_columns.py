@@ -0,0 +1,114 @@
+"""Unit tests for stats_columns.py"""
+import asyncio
+from datetime import date
+
+import pytest
+
+import evg.stats_columns as under_test
+from evg.models.evg_stats import EvgTestStats
+
+np = pytest.importorskip("numpy")
+
+
+def _raw_stats(i):
+    return {
+        "test_file": f"test_{i % 3}.js",
+        "task_name": "jsCore",
+        "variant": f"variant_{i % 2}",
+        "distro": "ubuntu",
+        "date": f"2020-09-{i % 5 + 1:02d}",
+        "num_pass": i,
+        "num_fail": i % 2,
+        "avg_duration_pass": i * 1.5,
+    }
+
+
+async def _iterate(items):
+    for item in items:
+        yield item
+
+
+async def _collect(iterable):
+    return [item async for item in iterable]
+
+
+class TestStatsColumnBuilder:
+    def test_models_and_dicts_produce_same_columns(self):
+        from_dicts = under_test.StatsColumnBuilder()
+        from_models = under_test.StatsColumnBuilder()
+        for i in range(10):
+            from_dicts.append(_raw_stats(i))
+            from_models.append(EvgTestStats(**_raw_stats(i)))
+
+        dict_chunk = from_dicts.flush()
+        model_chunk = from_models.flush()
+
+        for column in ["test_file", "execution_date", "num_pass", "avg_duration_pass"]:
+            assert np.array_equal(getattr(dict_chunk, column), getattr(model_chunk, column))
+
+    def test_strings_are_dictionary_encoded(self):
+        builder = under_test.StatsColumnBuilder()
+        for i in range(6):
+            builder.append(_raw_stats(i))
+
+        chunk = builder.flush()
+
+        assert chunk.dictionaries["test_file"] == ["test_0.js", "test_1.js", "test_2.js"]
+        assert chunk.test_file.tolist() == [0, 1, 2, 0, 1, 2]
+        assert chunk.decode("variant").tolist() == ["variant_0", "variant_1"] * 3
+
+    def test_typed_columns(self):
+        builder = under_test.StatsColumnBuilder()
+        builder.append(_raw_stats(3))
+
+        chunk = builder.flush()
+
+        assert chunk.execution_date[0] == np.datetime64(date(2020, 9, 4))
+        assert chunk.num_pass.dtype == np.int64
+        assert chunk.avg_duration_pass[0] == 4.5
+
+    def test_flush_resets_buffers(self):
+        builder = under_test.StatsColumnBuilder()
+        builder.append(_raw_stats(1))
+
+        first = builder.flush()
+        builder.append(_raw_stats(2))
+        second = builder.flush()
+
+        assert len(builder) == 0
+        assert first.num_pass.tolist() == [1]
+        assert second.num_pass.tolist() == [2]
+
+
+class TestIterStatsChunks:
+    def test_chunks_are_bounded(self):
+        stats = _iterate([_raw_stats(i) for i in range(10)])
+
+        chunks = asyncio.run(_collect(under_test.iter_stats_chunks(stats, chunk_size=4)))
+
+        assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+
+
+class TestWriteStats:
+    def test_parquet_round_trip(self, tmp_path):
+        pq = pytest.importorskip("pyarrow.parquet")
+        path = tmp_path / "stats.parquet"
+        stats = _iterate([_raw_stats(i) for i in range(10)])
+
+        n_rows = asyncio.run(under_test.write_stats_parquet(stats, path, chunk_size=3))
+
+        table = pq.read_table(path)
+        assert n_rows == 10
+        assert table.num_rows == 10
+        assert table.column("test_file").to_pylist()[:3] == ["test_0.js", "test_1.js", "test_2.js"]
+
+    def test_arrow_stream_round_trip(self, tmp_path):
+        pa = pytest.importorskip("pyarrow")
+        path = tmp_path / "stats.arrows"
+        stats = _iterate([_raw_stats(i) for i in range(10)])
+
+        asyncio.run(under_test.write_stats_arrow_stream(stats, path, chunk_size=3))
+
+        with pa.ipc.open_stream(str(path)) as reader:
+            table = reader.read_all()
+        assert table.column("num_pass").to_pylist() == list(range(10))
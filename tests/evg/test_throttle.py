@@ -0,0 +1,105 @@
+"""Unit tests for throttle.py"""
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+import evg.throttle as under_test
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestJitteredBackoff:
+    def test_delay_is_capped_exponential(self, monkeypatch):
+        monkeypatch.setattr(under_test.random, "uniform", lambda low, high: high)
+
+        delays = [under_test.jittered_backoff(attempt, 0.5, 3) for attempt in range(4)]
+
+        assert delays == [0.5, 1, 2, 3]
+
+
+class TestParseRetryAfter:
+    @pytest.mark.parametrize("value,expected", [(None, None), ("", None), ("5", 5.0), ("x", None)])
+    def test_seconds(self, value, expected):
+        assert under_test.parse_retry_after(value) == expected
+
+    def test_http_date(self):
+        now = datetime(2020, 9, 13, 12, 0, 0, tzinfo=timezone.utc)
+
+        delay = under_test.parse_retry_after("Sun, 13 Sep 2020 12:00:30 GMT", now=now)
+
+        assert delay == 30.0
+
+
+class TestTokenBucket:
+    def test_burst_is_available_immediately(self):
+        bucket = under_test.TokenBucket(rate=2, burst=3, clock=FakeClock())
+
+        assert [bucket.try_acquire() for _ in range(3)] == [0, 0, 0]
+        assert bucket.try_acquire() == 0.5
+
+    def test_tokens_refill_over_time(self):
+        clock = FakeClock()
+        bucket = under_test.TokenBucket(rate=2, burst=1, clock=clock)
+
+        bucket.try_acquire()
+        clock.now = 0.5
+
+        assert bucket.try_acquire() == 0
+
+
+class TestAdaptiveConcurrencyLimiter:
+    def test_limit_decreases_multiplicatively(self):
+        limiter = under_test.AdaptiveConcurrencyLimiter(initial_limit=8, min_limit=3)
+
+        limiter.on_throttled()
+        assert limiter.current_limit == 4
+        limiter.on_throttled()
+        assert limiter.current_limit == 3
+
+    def test_limit_increases_additively(self):
+        limiter = under_test.AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=5)
+
+        for _ in range(4):
+            limiter.on_success()
+        assert limiter.current_limit == 4
+        for _ in range(20):
+            limiter.on_success()
+        assert limiter.current_limit == 5
+
+    def test_requests_wait_for_a_slot(self):
+        async def run():
+            limiter = under_test.AdaptiveConcurrencyLimiter(initial_limit=1)
+            await limiter.acquire()
+            waiter = asyncio.create_task(limiter.acquire())
+            await asyncio.sleep(0)
+            assert limiter.queue_depth == 1
+            await limiter.release()
+            await waiter
+            assert limiter.queue_depth == 0
+            assert limiter.in_flight == 1
+
+        asyncio.run(run())
+
+
+class TestRequestThrottle:
+    def test_retry_after_is_honored(self):
+        throttle = under_test.RequestThrottle()
+
+        delay = throttle.on_throttled(0, {"Retry-After": "7"})
+
+        assert delay == 7
+        assert throttle.current_limit == 4
+        assert throttle.n_throttled == 1
+
+    def test_backoff_is_bounded(self):
+        config = under_test.ThrottleConfig(base_backoff=1, max_backoff=10)
+        throttle = under_test.RequestThrottle(config)
+
+        assert all(0 <= throttle.backoff(attempt) <= 10 for attempt in range(10))
@@ -0,0 +1,154 @@
+"""Unit tests for version_sync.py"""
+import asyncio
+
+from aiohttp import ClientResponseError
+
+import evg.version_sync as under_test
+from evg.models.evg_version import EvgVersion, Requester
+from evg.retry import RetryPolicy
+
+
+def _version(order, status="success"):
+    return EvgVersion.construct(version_id=f"v{order}", order=order, status=status)
+
+
+class FakeApi:
+    def __init__(self, versions):
+        self.versions = {v.version_id: v for v in versions}
+        self.n_listed = 0
+        self.fetched_by_id = []
+        self.errors = {}
+        self.retry = RetryPolicy()
+
+    async def versions_by_project(self, project_id, requester):
+        return self._list()
+
+    async def _list(self):
+        for version in sorted(self.versions.values(), key=lambda v: -v.order):
+            self.n_listed += 1
+            yield version
+
+    async def version_by_id(self, version_id):
+        self.fetched_by_id.append(version_id)
+        if version_id in self.errors:
+            raise ClientResponseError(None, (), status=self.errors[version_id])
+        return self.versions[version_id]
+
+    def add(self, version):
+        self.versions[version.version_id] = version
+
+
+def _poll(sync, project_id="mongodb-mongo-master"):
+    async def run():
+        return [
+            (update.version.version_id, update.is_new) async for update in sync.poll(project_id)
+        ]
+
+    return asyncio.run(run())
+
+
+class TestVersionSync:
+    def test_first_poll_yields_all_versions(self):
+        api = FakeApi([_version(1), _version(2)])
+        sync = under_test.VersionSync(api)
+
+        assert _poll(sync) == [("v2", True), ("v1", True)]
+
+    def test_first_poll_respects_initial_limit(self):
+        api = FakeApi([_version(i) for i in range(10)])
+        sync = under_test.VersionSync(api, initial_limit=3)
+
+        assert _poll(sync) == [("v9", True), ("v8", True), ("v7", True)]
+        assert api.n_listed == 4
+
+    def test_later_polls_stop_at_watermark(self):
+        api = FakeApi([_version(i) for i in range(10)])
+        sync = under_test.VersionSync(api)
+        _poll(sync)
+        api.n_listed = 0
+
+        api.add(_version(10))
+        api.add(_version(11))
+
+        assert _poll(sync) == [("v11", True), ("v10", True)]
+        assert api.n_listed == 3
+        assert _poll(sync) == []
+
+    def test_incomplete_versions_are_rechecked_until_completed(self):
+        api = FakeApi([_version(1, "started"), _version(2)])
+        sync = under_test.VersionSync(api)
+        _poll(sync)
+
+        assert _poll(sync) == []
+        assert api.fetched_by_id == ["v1"]
+
+        api.add(_version(1, "failed"))
+        assert _poll(sync) == [("v1", False)]
+
+        api.fetched_by_id = []
+        assert _poll(sync) == []
+        assert api.fetched_by_id == []
+
+    def test_missing_pending_version_is_dropped(self):
+        api = FakeApi([_version(1, "started"), _version(2, "started")])
+        sync = under_test.VersionSync(api)
+        _poll(sync)
+
+        api.errors["v2"] = 404
+        api.add(_version(1, "failed"))
+        assert _poll(sync) == [("v1", False)]
+        assert sync.recheck_errors["v2"].status == 404
+
+        api.fetched_by_id = []
+        assert _poll(sync) == []
+        assert api.fetched_by_id == []
+        assert sync.recheck_errors == {}
+
+    def test_transient_recheck_errors_are_retried_next_poll(self):
+        api = FakeApi([_version(1, "started")])
+        sync = under_test.VersionSync(api)
+        _poll(sync)
+
+        api.errors["v1"] = 503
+        assert _poll(sync) == []
+        assert sync.recheck_errors["v1"].status == 503
+
+        del api.errors["v1"]
+        api.add(_version(1, "success"))
+        assert _poll(sync) == [("v1", False)]
+
+    def test_abandoned_poll_does_not_update_checkpoint(self):
+        api = FakeApi([_version(1), _version(2)])
+        sync = under_test.VersionSync(api)
+
+        async def take_one():
+            async for update in sync.poll("project"):
+                return update
+
+        asyncio.run(take_one())
+
+        assert _poll(sync, "project") == [("v2", True), ("v1", True)]
+
+
+class TestVersionCheckpoint:
+    def test_state_is_persisted(self, tmp_path):
+        path = tmp_path / "checkpoint.json"
+        checkpoint = under_test.VersionCheckpoint(path)
+        checkpoint.set(
+            "project", Requester.GITTER_REQUEST, under_test.SyncState(5, {"v4": "started"})
+        )
+
+        reloaded = under_test.VersionCheckpoint(path)
+
+        assert reloaded.get("project", Requester.GITTER_REQUEST) == under_test.SyncState(
+            5, {"v4": "started"}
+        )
+        assert reloaded.get("project", Requester.PATCH_REQUEST) == under_test.SyncState()
+
+    def test_get_returns_a_copy(self):
+        checkpoint = under_test.VersionCheckpoint()
+        checkpoint.set("project", Requester.GITTER_REQUEST, under_test.SyncState(5, {}))
+
+        checkpoint.get("project", Requester.GITTER_REQUEST).pending["v6"] = "started"
+
+        assert checkpoint.get("project", Requester.GITTER_REQUEST).pending == {}
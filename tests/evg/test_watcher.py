@@ -0,0 +1,112 @@
+"""Unit tests for watcher.py"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import evg.watcher as under_test
+from evg.models.evg_build import EvgBuild
+from evg.models.evg_task import EvgTask
+
+FAST = under_test.WatchConfig(
+    min_interval=0.01, max_interval=0.05, batch_window=0.005, max_errors=2
+)
+
+
+class FakeApi:
+    def __init__(self, polls_until_done):
+        self.polls_until_done = polls_until_done
+        self.polls = {}
+        self.task_cache = None
+
+    async def task_by_id(self, task_id):
+        n_polls = self.polls.get(task_id, 0) + 1
+        self.polls[task_id] = n_polls
+        if self.polls_until_done[task_id] is None:
+            raise ValueError(f"{task_id} not found")
+        status = "success" if n_polls >= self.polls_until_done[task_id] else "started"
+        return EvgTask.construct(task_id=task_id, status=status)
+
+    async def build_by_id(self, build_id):
+        return EvgBuild.construct(id=build_id, status="failed")
+
+    async def version_by_id(self, version_id):
+        raise NotImplementedError
+
+
+def _collect(watcher):
+    async def run():
+        return [event async for event in watcher.events()]
+
+    return asyncio.run(run())
+
+
+class TestCompletionWatcher:
+    def test_yields_each_item_once_when_completed(self):
+        api = FakeApi({"t1": 1, "t2": 3})
+        watcher = under_test.CompletionWatcher(api, FAST)
+        watcher.watch_tasks(["t1", "t2", "t1"])
+        watcher.watch_builds(["b1"])
+
+        events = _collect(watcher)
+
+        assert sorted((e.kind.value, e.id) for e in events) == [
+            ("build", "b1"),
+            ("task", "t1"),
+            ("task", "t2"),
+        ]
+        assert api.polls == {"t1": 1, "t2": 3}
+        assert watcher.n_polls == 5
+        assert watcher.n_watching == 0
+
+    def test_gives_up_after_max_errors(self):
+        api = FakeApi({"t1": None})
+        watcher = under_test.CompletionWatcher(api, FAST)
+        watcher.watch_tasks(["t1"])
+
+        events = _collect(watcher)
+
+        assert len(events) == 1
+        assert events[0].item is None
+        assert isinstance(events[0].error, ValueError)
+        assert api.polls == {"t1": 2}
+
+    def test_items_can_be_watched_while_iterating(self):
+        api = FakeApi({"t1": 2, "t2": 1})
+        watcher = under_test.CompletionWatcher(api, FAST)
+        watcher.watch_tasks(["t1"])
+
+        async def run():
+            ids = []
+            async for event in watcher.events():
+                ids.append(event.id)
+                if event.id == "t1":
+                    watcher.watch_tasks(["t2"])
+            return ids
+
+        assert asyncio.run(run()) == ["t1", "t2"]
+
+
+class TestEstimateRemainingSeconds:
+    def test_running_task(self):
+        start = datetime.now(timezone.utc) - timedelta(seconds=60)
+        task = EvgTask.construct(start_time=start, expected_duration_ms=100_000)
+
+        remaining = under_test.estimate_remaining_seconds(under_test.WatchKind.TASK, task)
+
+        assert remaining == pytest.approx(40, abs=1)
+
+    def test_task_waiting_to_start(self):
+        task = EvgTask.construct(
+            start_time=None, est_wait_to_start_ms=30_000, expected_duration_ms=60_000
+        )
+
+        remaining = under_test.estimate_remaining_seconds(under_test.WatchKind.TASK, task)
+
+        assert remaining == 90
+
+    def test_no_estimate(self):
+        task = EvgTask.construct(start_time=None)
+
+        assert under_test.estimate_remaining_seconds(under_test.WatchKind.TASK, task) is None
+        assert under_test.estimate_remaining_seconds(under_test.WatchKind.VERSION, task) is None